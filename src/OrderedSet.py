@@ -1,24 +1,42 @@
 ## @package OrderedSet
-# Definition of the OrderedSet class. 
+# Definition of the OrderedSet class.
 
 class OrderedSet(list):
-    """ Class that stores an ordered set list. """
-    def __init__(self):
-        pass
+    """
+    Class that stores an ordered set list.
+    The elements are kept in a list (so that the insertion order is preserved and the instance can be used
+    wherever a list is expected), and mirrored in a hashed index so that membership tests are O(1).
+    Elements must therefore be hashable.
+    """
+    def __init__(self, _iterable = None):
+        list.__init__(self)
+        self.__index = set()
+        if not _iterable is None:
+            self.update(_iterable)
+
+    def __reduce__(self):
+        """ Pickle (and copy) as the list of elements, the index is rebuilt on construction. """
+        return (self.__class__, (list(self),))
+
+    def __contains__(self, element):
+        return element in self.__index
 
     def __sub__(self, _other):
         """
         Returns self - other (elements of self which are not in _other)
         """
+        if not isinstance(_other, (OrderedSet, set, frozenset, dict)):
+            _other = set(_other)
         result = OrderedSet()
         for x in self:
             if not x in _other:
                 result.add(x)
-        return result 
-        
+        return result
+
     def add(self, element):
         """Add an element to the right side of the OrderedSet."""
-        if not element in self:
+        if not element in self.__index:
+            self.__index.add(element)
             list.append(self, element)
 
     def append(self, element):
@@ -29,3 +47,54 @@ class OrderedSet(list):
         """Extend the right side of the OrderedSet with elements from the iterable."""
         for element in iterable:
             self.add(element)
+
+    def extend(self, iterable):
+        """Extend the right side of the OrderedSet with elements from the iterable."""
+        self.update(iterable)
+
+    def __iadd__(self, iterable):
+        self.update(iterable)
+        return self
+
+    def insert(self, position, element):
+        """Insert element at position, unless it is already in the OrderedSet."""
+        if not element in self.__index:
+            self.__index.add(element)
+            list.insert(self, position, element)
+
+    def discard(self, element):
+        """Remove element if it is present."""
+        if element in self.__index:
+            self.remove(element)
+
+    def remove(self, element):
+        list.remove(self, element)
+        self.__index.discard(element)
+
+    def pop(self, position = -1):
+        element = list.pop(self, position)
+        self.__index.discard(element)
+        return element
+
+    def __RebuildIndex(self):
+        """ Remove duplicates that a slice assignment may have introduced and rebuild the index. """
+        elements = list(self)
+        del self[:]
+        self.update(elements)
+
+    def __setitem__(self, position, value):
+        list.__setitem__(self, position, value)
+        self.__RebuildIndex()
+
+    def __delitem__(self, position):
+        list.__delitem__(self, position)
+        self.__index = set(self)
+
+    # python 2 uses these for simple slices
+    def __setslice__(self, start, end, values):
+        list.__setslice__(self, start, end, values)
+        self.__RebuildIndex()
+
+    def __delslice__(self, start, end):
+        list.__delslice__(self, start, end)
+        self.__index = set(self)
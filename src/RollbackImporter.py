@@ -9,8 +9,9 @@ class RollbackImporter:
     def __init__(self):
         self.previousModules = sys.modules.copy()
 
-    def rollbackImports(self):
+    def rollbackImports(self, keep = ()):
+        """Unloads the modules that were imported since the RollbackImporter was created, except the modules in keep."""
         for modname in sys.modules.keys():
-            if not self.previousModules.has_key(modname):
+            if not self.previousModules.has_key(modname) and not modname in keep:
                 # Force reload when modname next imported
                 del(sys.modules[modname])
@@ -3,15 +3,72 @@
 import csnUtility
 import os
 import csnProject
+import hashlib
+
+class Document:
+    """
+    Text of a file generated by the Writer. The text is collected in a list of strings and joined once. A Document can
+    be passed to functions that expect a file object (such as CMakeInsertBeforeTarget), because it has a write function.
+    The file is written (possibly in a worker thread) by calling Write.
+    """
+    def __init__(self, _filename, _text = "", _saveBackup = False):
+        """
+        _text - Initial text of the file.
+        _saveBackup - If true, the previous version of the file is saved to filename.old when the file is replaced.
+        """
+        self.filename = _filename
+        self.saveBackup = _saveBackup
+        self.__buffer = [_text]
+        
+    def write(self, _text):
+        self.__buffer.append(_text)
+        
+    def writelines(self, _lines):
+        self.__buffer.extend(_lines)
+        
+    def GetText(self):
+        if len(self.__buffer) != 1:
+            self.__buffer = ["".join(self.__buffer)]
+        return self.__buffer[0]
+        
+    def Write(self, _digestIndex = None):
+        """
+        Writes the text to the file, unless the file already contains it (the file is left untouched, which prevents
+        needless rebuilds). Returns true if the file was written.
+        _digestIndex - csnDigestIndex.DigestIndex with the digests of the previously written files (optional).
+        """
+        return csnUtility.WriteFileIfDifferent(self.filename, self.GetText(), _saveBackup = self.saveBackup, _digestIndex = _digestIndex)
 
 class Writer:
-    """ Class responsible for writing the CMake related files."""
-    def __init__(self, _project):
+    """
+    Class responsible for creating the CMake related files.
+    The Generate functions do not write to disk, they add a Document for each file to self.documents.
+    """
+    def __init__(self, _project, _saveBackup = True):
+        """ _saveBackup - If true, the replaced CMakeLists.txt is saved to CMakeLists.txt.old. """
         self.project = _project
-        self.tmpCMakeListsFile = self.project.GetCMakeListsFilename() + ".tmp"
+        self.saveBackup = _saveBackup
+        self.documents = []
+        # output of the (user defined) functions that insert text in the CMakeLists (see __GetInserts)
+        self.__inserts = None
+        
+    def __GetInserts(self):
+        """
+        Returns the text written by the CMakeInsertBeginning, CMakeInsertBeforeTarget and CMakeInsertAfterTarget functions
+        of the project, as a tuple. The functions are called once per Writer (by GetFingerprint, or else by
+        GenerateCMakeLists): they are user code, which can have side effects (such as adding sources).
+        """
+        if self.__inserts is None:
+            inserts = []
+            for function in (self.project.CMakeInsertBeginning, self.project.CMakeInsertBeforeTarget, self.project.CMakeInsertAfterTarget):
+                document = Document("")
+                function(document)
+                inserts.append(document.GetText())
+            self.__inserts = tuple(inserts)
+        return self.__inserts
         
     def __OpenFile(self):
-        self.file = open(self.tmpCMakeListsFile, 'w')
+        self.file = Document(self.project.GetCMakeListsFilename(), _saveBackup = self.saveBackup)
         
     def __WriteHeader(self):
         """ Write header and some cmake fields. """
@@ -131,9 +188,8 @@ class Writer:
         
     def __CreateCMakeSection_Sources(self, cmakeUIHInputVar, cmakeUICppInputVar, cmakeMocInputVar):
         """ Add sources to the target in the CMakeLists.txt """
+        self.__AddDummySource()
         sources = self.project.GetSources()
-        if not self.__HasCompilableFiles():
-            sources.append( csnUtility.GetDummyCppFilename() )
         if self.project.type == "executable":
             self.file.write( "ADD_EXECUTABLE(%s %s %s %s %s)\n" % (self.project.name, cmakeUIHInputVar, cmakeUICppInputVar, cmakeMocInputVar, csnUtility.Join(sources, _addQuotes = 1)) )
             
@@ -201,12 +257,31 @@ class Writer:
             self.file.write("INCLUDE( %s )\n" % "\"%s/cmakeMacros/PCHSupport_26.cmake\"" % csnProject.globalCurrentContext.GetThirdPartyFolder( 0 ) )
             self.file.write("GET_NATIVE_PRECOMPILED_HEADER(\"%s\" \"%s\")\n" % (self.project.name, self.project.GetCompileManager().precompiledHeader) )
             
-            #Add precompiled header to sources. This file is generated for windows only 
-            # after executing CMake, so it doens't exists at the begining
-            if not self.project.context.GetCompiler().IsForPlatform(_WIN32 = 1, _NOT_WIN32 = 0):
-                return
-            precompiledHeaderCxx = "%s/%s_pch.cxx" % (self.project.GetBuildFolder(),self.project.name)
-            self.project.AddSources([precompiledHeaderCxx], _sourceGroup = "PCH Files", _checkExists = 0, _forceAdd = 1)
+            self.__AddPrecompiledHeaderSource()
+        
+    def __AddPrecompiledHeaderSource(self):
+        #Add precompiled header to sources. This file is generated for windows only 
+        # after executing CMake, so it doens't exists at the begining
+        if not self.project.context.GetCompiler().IsForPlatform(_WIN32 = 1, _NOT_WIN32 = 0):
+            return
+        precompiledHeaderCxx = "%s/%s_pch.cxx" % (self.project.GetBuildFolder(),self.project.name)
+        self.project.AddSources([precompiledHeaderCxx], _sourceGroup = "PCH Files", _checkExists = 0, _forceAdd = 1)
+    
+    def __AddDummySource(self):
+        """ Adds a dummy source file to the sources of a project without compilable files. """
+        if not self.__HasCompilableFiles():
+            self.project.GetSources().append( csnUtility.GetDummyCppFilename() )
+    
+    def AddGeneratedSources(self):
+        """
+        Adds the sources that GenerateCMakeLists adds to the project (the precompiled header source and the dummy source),
+        without writing any file. Used when the CMakeLists.txt is up-to-date.
+        """
+        if self.project.type == "container":
+            return
+        if self.project.GetCompileManager().precompiledHeader != "":
+            self.__AddPrecompiledHeaderSource()
+        self.__AddDummySource()
         
     def __CreateCMakePrecompiledHeaderPost(self):
         if self.project.GetCompileManager().precompiledHeader != "":
@@ -218,7 +293,7 @@ class Writer:
     
         self.__CreateCMakeSection_IncludeConfigAndUseFiles()
 
-        self.project.CMakeInsertBeforeTarget( self.file )
+        self.file.write( self.__GetInserts()[1] )
         
         self.__CreateCMakePrecompiledHeaderPre()
         self.__CreateCMakeSection_SourceGroups()
@@ -235,11 +310,11 @@ class Writer:
         self.__CreateCMakeSection_AddProperties()
         self.__CreateCMakePrecompiledHeaderPost()
         
-        self.project.CMakeInsertAfterTarget( self.file )
+        self.file.write( self.__GetInserts()[2] )
     
     def __CloseFile(self):
-        self.file.close()
-        csnUtility.ReplaceDestinationFileIfDifferentAndSaveBackup(self.tmpCMakeListsFile, self.project.GetCMakeListsFilename())
+        self.documents.append(self.file)
+        self.file = None
 
     def GenerateCMakeLists(self, _generatedProjects, _requiredProjects, _writeInstallCommands):
         self.__OpenFile()
@@ -249,7 +324,7 @@ class Writer:
         #        self.file.write( "SET( AlreadyUsing%s FALSE CACHE BOOL \"Internal helper\" FORCE )\n" % (project.name) )
         #        self.file.write( "SET( AlreadyUsing%sPrivate FALSE CACHE BOOL \"Internal helper\" FORCE )\n" % (project.name) )
 
-        self.project.CMakeInsertBeginning( self.file )
+        self.file.write( self.__GetInserts()[0] )
         
         # wxMitkApplications is a container project that just have ADD_SUBDIRECTORY for each application
         self.__WriteCommandsToGenerate(_generatedProjects)
@@ -260,17 +335,71 @@ class Writer:
                 self.__WriteInstallCommands()
         self.__CloseFile()
     
+    def GetGeneratedFilenames(self):
+        """ Returns the files written by GenerateCMakeLists, GenerateConfigFile and GenerateUseFile. """
+        return [
+            self.project.GetCMakeListsFilename(),
+            self.project.pathsManager.GetPathToConfigFile(_public = 0),
+            self.project.pathsManager.GetPathToConfigFile(_public = 1),
+            self.project.pathsManager.GetPathToUseFile()
+        ]
+    
+    def GetFingerprint(self, _generatedProjects, _requiredProjects, _writeInstallCommands):
+        """
+        Returns a digest of all data that is written to the files of GetGeneratedFilenames (the arguments are the same as
+        for GenerateCMakeLists). If the digest did not change, generating the files again would give the same files.
+        """
+        project = self.project
+        context = project.context
+        compileManager = project.GetCompileManager()
+        configurationName = context.GetConfigurationName()
+        includedInSolution = project.dependenciesManager.projectsIncludedInSolution
+        
+        data = [
+            csnUtility.IsWindowsPlatform(),
+            context.GetCompiler().IsForPlatform(_WIN32 = 1, _NOT_WIN32 = 0),
+            configurationName,
+            context.GetOutputFolder(configurationName),
+            context.GetInstallFolder(),
+            csnUtility.GetDummyCppFilename(),
+            project.name,
+            project.type,
+            project.installSubFolder,
+            project.GetBuildFolder(),
+            project.GetBuildResultsFolder(configurationName),
+            project.GetBuildResultsFolder(),
+            self.GetGeneratedFilenames(),
+            compileManager.sources,
+            compileManager.sourceGroups.items(),
+            compileManager.sourcesToBeMoced,
+            compileManager.sourcesToBeUIed,
+            compileManager.precompiledHeader,
+            compileManager.generateWin32Header,
+            [(x.definitions, x.includeFolders, x.libraryFolders, x.libraries.items()) for x in (compileManager.public, compileManager.private)],
+            [(description, rule.output, rule.command, rule.depends, rule.workingDirectory) for (description, rule) in project.rules.iteritems()],
+            project.properties,
+            "".join(self.__GetInserts()),
+            [(x.GetBuildFolder(), x in includedInSolution) for x in _generatedProjects],
+            [(x.name, x.type, isinstance(x, csnProject.GenericProject) and len(x.GetSources())) for x in _requiredProjects],
+            [(x.name, x in includedInSolution, x.pathsManager.GetPathToConfigFile(True), x.pathsManager.GetPathToConfigFile(False), x.pathsManager.GetPathToUseFile()) for x in project.dependenciesManager.ProjectsToUse()],
+            _writeInstallCommands
+        ]
+        if csnUtility.IsWindowsPlatform() or compileManager.precompiledHeader != "":
+            data.append(csnProject.globalCurrentContext.GetThirdPartyFolder(0))
+        if _writeInstallCommands:
+            data.append([x.installManager.filesToInstall for x in project.dependenciesManager.ProjectsToUse()])
+        return hashlib.md5(repr(data)).hexdigest()
+    
     def GenerateConfigFile(self, _public):
         """
         Generates the XXXConfig.cmake file for this project.
         _public - If true, generates a config file that can be used in any cmake file. If false,
         it generates the private config file that is used in the csnake-generated cmake files.
         """
-        fileConfig = self.project.pathsManager.GetPathToConfigFile(_public)
-        f = open(fileConfig, 'w')
+        f = Document(self.project.pathsManager.GetPathToConfigFile(_public))
         
         # create list with folder where libraries should be found. Add the folder where all the targets are placed to this list. 
-        publicLibraryFolders = self.project.GetCompileManager().public.libraryFolders
+        publicLibraryFolders = list(self.project.GetCompileManager().public.libraryFolders)
         if _public:
             publicLibraryFolders.append(self.project.GetBuildResultsFolder()) 
 
@@ -282,26 +411,27 @@ class Writer:
         f.write( "SET( %s_INCLUDE_DIRS %s )\n" % (self.project.name, csnUtility.Join(self.project.GetCompileManager().public.includeFolders, _addQuotes = 1)) )
         f.write( "SET( %s_LIBRARY_DIRS %s )\n" % (self.project.name, csnUtility.Join(publicLibraryFolders, _addQuotes = 1)) )
         if len(self.project.GetCompileManager().public.libraries):
-            libraries = ""
+            libraries = []
             for buildType in self.project.GetCompileManager().public.libraries.keys():
                 typeString = ""
                 if buildType != "":
                     typeString = "\"%s\" " % buildType # something like "debug "
                 for library in self.project.GetCompileManager().public.libraries[buildType]:
-                    libraries += "%s\"%s\"" % (typeString, library)
-            f.write( "SET( %s_LIBRARIES ${%s_LIBRARIES} %s )\n" % (self.project.name, self.project.name, libraries) )
+                    libraries.append("%s\"%s\"" % (typeString, library))
+            f.write( "SET( %s_LIBRARIES ${%s_LIBRARIES} %s )\n" % (self.project.name, self.project.name, "".join(libraries)) )
 
         # add the target of this project to the list of libraries that should be linked
         if _public and len(self.project.GetSources()) > 0 and (self.project.type == "library" or self.project.type == "dll"):
             targetName = self.project.name
             f.write( "SET( %s_LIBRARIES ${%s_LIBRARIES} %s )\n" % (self.project.name, self.project.name, csnUtility.Join([targetName], _addQuotes = 1)) )
+        
+        self.documents.append(f)
                 
     def GenerateUseFile(self):
         """
         Generates the UseXXX.cmake file for this project.
         """
-        fileUse = self.project.pathsManager.GetPathToUseFile()
-        f = open(fileUse, 'w')
+        f = Document(self.project.pathsManager.GetPathToUseFile())
         
         # write header and some cmake fields
         f.write( "# File generated automatically by the CSnake generator.\n" )
@@ -313,6 +443,16 @@ class Writer:
         # write definitions     
         if len(self.project.GetCompileManager().public.definitions):
             f.write( "ADD_DEFINITIONS(%s)\n" % csnUtility.Join(self.project.GetCompileManager().public.definitions) )
+        
+        self.documents.append(f)
+    
+    def GenerateWin32Header(self):
+        """
+        Generates the ProjectNameWin32.h header file for exporting/importing dll functions.
+        The file is only written if its text changed, to prevent recompiling the sources that include it.
+        """
+        compileManager = self.project.GetCompileManager()
+        self.documents.append(Document(compileManager.GetWin32HeaderFilename(), compileManager.GetWin32HeaderText()))
     
     def __CreateCMakeSection_AddProperties(self):
         """ Add properties in the CMakeLists.txt """
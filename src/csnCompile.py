@@ -1,6 +1,7 @@
 ## @package csnCompile
 # General compilation options related classes. 
 import csnUtility
+import OrderedSet
 import os
 
 class CompileAndLinkSettings:
@@ -26,10 +27,12 @@ class Manager:
     """ Compilation Manager. """
     def __init__(self, _project):
         self.project = _project
-        self.sources = []
+        # the source lists are OrderedSets (lists with a hashed index), so that the membership tests of AddSources
+        # and RemoveSources stay cheap for projects with many sources
+        self.sources = OrderedSet.OrderedSet()
         self.sourceGroups = dict()
-        self.sourcesToBeMoced = []
-        self.sourcesToBeUIed = []
+        self.sourcesToBeMoced = OrderedSet.OrderedSet()
+        self.sourcesToBeUIed = OrderedSet.OrderedSet()
         self.public = CompileAndLinkSettings()
         self.private = CompileAndLinkSettings()
         self.precompiledHeader = ""
@@ -59,26 +62,33 @@ class Manager:
                     self.sources.append(source)
                     if _sourceGroup != "":
                         if not self.sourceGroups.has_key(_sourceGroup):
-                            self.sourceGroups[_sourceGroup] = []
+                            self.sourceGroups[_sourceGroup] = OrderedSet.OrderedSet()
                         self.sourceGroups[_sourceGroup].append(source)
                    
     def RemoveSources(self, _listOfSourceFiles):
+        removed = set()
         for sourceFile in _listOfSourceFiles:
             sources = self.project.Glob(sourceFile)
             if not len(sources):
                 sources = [sourceFile]
-            
-            for source in sources:
-                if source in self.sourcesToBeMoced:
-                    self.sourcesToBeMoced.remove(source)
-                
-                if source in self.sources:
-                    if source in self.sourcesToBeUIed:
-                        self.sourcesToBeUIed.remove(source)
-                    self.sources.remove(source)
-                    for sourceGroupKey in self.sourceGroups.keys():
-                        if source in self.sourceGroups[sourceGroupKey]:
-                            self.sourceGroups[sourceGroupKey].remove(source)
+            removed.update(sources)
+        
+        # the ui sources and source groups only lose the sources that are removed from the sources
+        removedSources = set([x for x in removed if x in self.sources])
+        self.__RemoveFromList(self.sourcesToBeMoced, removed)
+        if len(removedSources):
+            for sourceList in [self.sources, self.sourcesToBeUIed] + self.sourceGroups.values():
+                self.__RemoveFromList(sourceList, removedSources)
+
+    def __RemoveFromList(self, _list, _elements):
+        """ Removes the elements in set _elements from _list, keeping the order of the other elements. """
+        elements = [x for x in _elements if x in _list]
+        if len(elements) > 32:
+            # a single pass over the list, instead of one scan of the list per removed element
+            _list[:] = [x for x in _list if not x in _elements]
+        else:
+            for element in elements:
+                _list.remove(element)
 
     def AddIncludeFolders(self, _listOfIncludeFolders, _WIN32 = 0, _NOT_WIN32 = 0):
         """
@@ -166,14 +176,17 @@ class Manager:
         self.precompiledHeader = globResult[0]
         self.AddSources([_precompiledHeader], _sourceGroup = "PCH Files (header)")
 
-    def GenerateWin32Header(self):
+    def GetWin32HeaderFilename(self):
+        """ Returns the path of the ProjectNameWin32.h header file generated by GenerateWin32Header. """
+        return "%s/%sWin32Header.h" % (self.project.GetBuildFolder(), self.project.name)
+
+    def GetWin32HeaderText(self):
         """
-        Generates the ProjectNameWin32.h header file for exporting/importing dll functions.
+        Returns the text of the ProjectNameWin32.h header file for exporting/importing dll functions.
         """
         templateFilename = csnUtility.GetRootOfCSnake() + "/resources/Win32Header.h"
         if self.project.type == "library":
             templateFilename = csnUtility.GetRootOfCSnake() + "/resources/Win32Header.lib.h"
-        templateOutputFilename = "%s/%sWin32Header.h" % (self.project.GetBuildFolder(), self.project.name)
         
         assert os.path.exists(templateFilename), "\n\nError: File not found %s\n" % (templateFilename)
         f = open(templateFilename, 'r')
@@ -181,6 +194,14 @@ class Manager:
         template = template.replace('${PROJECTNAME_UPPERCASE}', self.project.name.upper())
         template = template.replace('${PROJECTNAME}', self.project.name)
         f.close()
+        return template
+
+    def GenerateWin32Header(self):
+        """
+        Generates the ProjectNameWin32.h header file for exporting/importing dll functions.
+        """
+        templateOutputFilename = self.GetWin32HeaderFilename()
+        template = self.GetWin32HeaderText()
         
         # don't overwrite the existing file if it contains the same text, because this will trigger a source recompile later!
         if csnUtility.FileToString(templateOutputFilename) != template:
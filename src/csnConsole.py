@@ -1,7 +1,11 @@
 ## @package csnConsole
 # Command line interface for CSnake. 
-import csnGUIHandler
+import csnDaemon
+import csnInstall
+import csnWatcher
 import sys
+import time
+import traceback
 from optparse import OptionParser
 import os.path
 
@@ -37,6 +41,9 @@ class AskUser:
             raise Exception("Invalid question type!")
 
 class DontAskUser:
+    def __init__(self):
+        self.__questionType = self.QuestionYesNo()
+    
     def QuestionYesNo(self):
         return 1
     
@@ -47,7 +54,7 @@ class DontAskUser:
         return 2
     
     def SetType(self, questionType):
-        pass
+        self.__questionType = questionType
     
     def Ask(self, message, defaultAnswer):
         if self.__questionType == self.QuestionYesNo():
@@ -62,6 +69,7 @@ class DontAskUser:
         print "A project wants to ask you the following question:\n"
         print message
         print "\nAs you have let us know that you don't want to be bothered, we decide for you. The answer is: \"%s\"" % answer
+        return defaultAnswer
 
 parser = OptionParser(usage="%prog contextFile [options]")
 parser.add_option("-i", "--install", dest="install", action="store_true", default=False, help="install files to build folder")
@@ -71,77 +79,223 @@ parser.add_option("-c", "--configure", action="store_true", default=False, help=
 parser.add_option("-b", "--build", action="store_true", default=False, help="build all")
 parser.add_option("-a", "--autoconfig", dest="autoconfig", action="store_true", default=False, help="configure third party or project depending on the context instance")
 parser.add_option("-s", "--silent", dest="silent", action="store_true", default=False, help="Don't ask any questions.")
-(commandLineOptions, commandLineArgs) = parser.parse_args()
-
-
-# check command line
-if len(commandLineArgs) != 1:
-    parser.print_usage()
-    sys.exit(1)
-
-# check if the file exists
-if not os.path.exists(commandLineArgs[0]):
-    print "Error, the input context file does not exists: '%s'" % commandLineArgs[0]
-    sys.exit(1)
-
-handler = csnGUIHandler.Handler()
-context = handler.LoadContext(commandLineArgs[0])
-
-if commandLineOptions.silent:
-    askUser = DontAskUser()
-else:
-    askUser = AskUser()
-
-# configure third parties and project (used by Gimias)
-if commandLineOptions.configure:
-    handler.ConfigureThirdPartyFolders()
-    handler.ConfigureProjectToBuildFolder(_alsoRunCMake = True, _askUser = askUser)
-
-# build third parties and project + install files (used by Gimias)
-if commandLineOptions.build:
-    handler.BuildMultiple(handler.GetThirdPartySolutionPaths(), context.GetConfigurationName(), True)
-    handler.Build(handler.GetTargetSolutionPath(), context.GetConfigurationName(), False)
-    handler.InstallBinariesToBuildFolder()
-
-# configure third parties
-if commandLineOptions.thirdParty:
-    for count in range( 0, context.GetNumberOfThirdPartyFolders() ):
-        sourceFolder = context.GetThirdPartyFolder( count )
-        buildFolder = context.GetThirdPartyBuildFolders()[ count ]
-        taskMsg = "ConfigureThirdPartyFolders from %s to %s..." % (sourceFolder, buildFolder) 
-        print "Starting task: " + taskMsg  
-    result = handler.ConfigureThirdPartyFolders()
-    assert result, "\n\nTask failed: ConfigureThirdPartyFolders." 
-    print "Finished " + taskMsg + "\nYou can now build the 3rd party sources.\n"
-
-# install files
-if commandLineOptions.install:
-    taskMsg = "InstallBinariesToBuildFolder to %s..." % (context.GetBuildFolder())
-    print "Starting task: " + taskMsg 
-    result = handler.InstallBinariesToBuildFolder()
-    assert result, "\n\nTask failed: InstallBinariesToBuildFolder." 
-    print "Finished task: " + taskMsg
-
-# configure project
-if commandLineOptions.project:
-    taskMsg = "ConfigureProjectToBuildFolder to %s..." % (context.GetBuildFolder())
-    print "Starting task: " + taskMsg 
-    result = handler.ConfigureProjectToBuildFolder(_alsoRunCMake = True, _askUser = askUser)
-    assert result, "\n\nTask failed: ConfigureProjectToBuildFolder." 
-    print "Finished task: " + taskMsg + "\nYou can now build the sources in %s.\n" % handler.GetTargetSolutionPath()
-
-# guess what to configure (used by cruise control)
-if commandLineOptions.autoconfig:
-    if context.GetInstance() == "thirdParty":
-        print "Starting task: ConfigureThirdPartyFolders."
+parser.add_option("-j", "--jobs", dest="jobs", type="int", default=None, help="maximum number of parallel jobs, also passed to make (default: numberOfJobs of the context, else the number of cores)")
+parser.add_option("--no-backups", dest="saveBackups", action="store_false", default=True, help="do not save replaced CMakeLists.txt files to CMakeLists.txt.old")
+parser.add_option("--install-mode", dest="installMode", type="choice", choices=csnInstall.installModes, default="copy", help="how to install files to the build folder: %s (default: copy)" % ", ".join(csnInstall.installModes))
+parser.add_option("--list-targets", dest="listTargets", action="store_true", default=False, help="print the targets in the csnake file of the context")
+parser.add_option("--dependencies", dest="dependencies", action="store_true", default=False, help="print the projects that the instance of the context depends on")
+parser.add_option("--daemon", dest="daemon", action="store_true", default=False, help="serve the requests of other csnConsole calls for this context file, keeping the projects loaded (until --stop-daemon)")
+parser.add_option("--stop-daemon", dest="stopDaemon", action="store_true", default=False, help="stop the daemon for this context file")
+parser.add_option("--no-daemon", dest="useDaemon", action="store_false", default=True, help="do not send the request to the daemon for this context file, if one is running")
+parser.add_option("--watch", dest="watch", action="store_true", default=False, help="after the other commands, watch the root folders and csnake files, and regenerate the cmake files of the projects affected by added or removed files (until interrupted)")
+parser.add_option("--watch-polling", dest="watchPolling", action="store_true", default=False, help="watch by scanning the folders, instead of using inotify")
+parser.add_option("--watch-interval", dest="watchInterval", type="float", default=1.0, help="seconds between the scans of --watch-polling (default: 1)")
+parser.add_option("--watch-debounce", dest="watchDebounce", type="float", default=0.5, help="seconds without changes before regenerating (default: 0.5)")
+parser.add_option("--no-project-cache", dest="projectCache", action="store_false", default=True, help="always run the csnake files, instead of loading the project graph stored in the build folder when they did not change")
+parser.add_option("--profile", dest="profile", action="store_true", default=False, help="record the time spent in each phase of the commands, and write it to the build folder as a Chrome trace (csnakeProfile.json) and a summary (csnakeProfile.txt)")
+parser.add_option("--profile-phases", dest="profilePhases", action="store_true", default=False, help="with --profile, also profile each phase with cProfile (written to the csnakeProfile folder in the build folder)")
+parser.add_option("--fs-stats", dest="fileSystemStats", action="store_true", default=False, help="count and time the file system calls (listdir, stat, glob, open) of the commands by call site, phase, project and csnake file, and write them next to projectData.json (csnakeFileSystemStats.txt and .json)")
+
+def RunCommands(handler, options):
+    """ Runs the commands of the command line options, on a handler with a loaded context. """
+    # the spans of the profiler are also the phases of the file system statistics
+    handler.SetProfile(options.profile or options.fileSystemStats, options.profile and options.profilePhases)
+    handler.SetFileSystemStats(options.fileSystemStats)
+    try:
+        RunTasks(handler, options)
+    finally:
+        if options.fileSystemStats:
+            summary = handler.WriteFileSystemStats()
+            handler.SetFileSystemStats(False)
+            print summary
+        if options.profile:
+            summary = handler.WriteProfile()
+            print summary
+            print "Wrote the profile to %s/csnakeProfile.json." % handler.context.GetBuildFolder()
+        handler.SetProfile(False)
+
+def RunTasks(handler, options):
+    """ Runs the tasks of the command line options (see RunCommands). """
+    context = handler.context
+    # also when None: the daemon keeps the handler, the jobs of an earlier request must not be used
+    handler.SetNumberOfJobs(options.jobs)
+    handler.SetSaveBackups(options.saveBackups)
+    handler.SetInstallMode(options.installMode)
+    handler.SetUseProjectCache(options.projectCache)
+    
+    askUser = GetAskUser(options)
+    
+    # configure third parties and project (used by Gimias)
+    if options.configure:
+        handler.ConfigureThirdPartyFolders()
+        handler.ConfigureProjectToBuildFolder(_alsoRunCMake = True, _askUser = askUser)
+        print "Regenerated the cmake files of %s projects, skipped %s unchanged projects." % (handler.generator.nRegeneratedProjects, handler.generator.nSkippedProjects)
+
+    # build third parties and project + install files (used by Gimias)
+    if options.build:
+        handler.BuildMultiple(handler.GetThirdPartySolutionPaths(), context.GetConfigurationName(), True)
+        handler.Build(handler.GetTargetSolutionPath(), context.GetConfigurationName(), False)
+        handler.InstallBinariesToBuildFolder()
+
+    # configure third parties
+    if options.thirdParty:
+        for count in range( 0, context.GetNumberOfThirdPartyFolders() ):
+            sourceFolder = context.GetThirdPartyFolder( count )
+            buildFolder = context.GetThirdPartyBuildFolders()[ count ]
+            taskMsg = "ConfigureThirdPartyFolders from %s to %s..." % (sourceFolder, buildFolder) 
+            print "Starting task: " + taskMsg  
         result = handler.ConfigureThirdPartyFolders()
         assert result, "\n\nTask failed: ConfigureThirdPartyFolders." 
-    else:
-        print "Starting task: ConfigureProjectToBuildFolder."
-        result = handler.ConfigureProjectToBuildFolder(_alsoRunCMake = True, _askUser = askUser)
-        assert result, "\n\nTask failed: ConfigureProjectToBuildFolder." 
-        print "Starting task: InstallBinariesToBuildFolder."
+        print "Finished " + taskMsg + "\nYou can now build the 3rd party sources.\n"
+
+    # install files
+    if options.install:
+        taskMsg = "InstallBinariesToBuildFolder to %s..." % (context.GetBuildFolder())
+        print "Starting task: " + taskMsg 
         result = handler.InstallBinariesToBuildFolder()
         assert result, "\n\nTask failed: InstallBinariesToBuildFolder." 
-    print "Finished task autoconfig."
+        installManager = handler.GetInstallManager()
+        print "Installed %s files, skipped %s unchanged files, removed %s stale files." % (installManager.nInstalledFiles, installManager.nSkippedFiles, installManager.nRemovedFiles)
+        print "Finished task: " + taskMsg
+
+    # configure project
+    if options.project:
+        taskMsg = "ConfigureProjectToBuildFolder to %s..." % (context.GetBuildFolder())
+        print "Starting task: " + taskMsg 
+        result = handler.ConfigureProjectToBuildFolder(_alsoRunCMake = True, _askUser = askUser)
+        assert result, "\n\nTask failed: ConfigureProjectToBuildFolder." 
+        print "Regenerated the cmake files of %s projects, skipped %s unchanged projects." % (handler.generator.nRegeneratedProjects, handler.generator.nSkippedProjects)
+        print "Finished task: " + taskMsg + "\nYou can now build the sources in %s.\n" % handler.GetTargetSolutionPath()
+
+    # guess what to configure (used by cruise control)
+    if options.autoconfig:
+        if context.GetInstance() == "thirdParty":
+            print "Starting task: ConfigureThirdPartyFolders."
+            result = handler.ConfigureThirdPartyFolders()
+            assert result, "\n\nTask failed: ConfigureThirdPartyFolders." 
+        else:
+            print "Starting task: ConfigureProjectToBuildFolder."
+            result = handler.ConfigureProjectToBuildFolder(_alsoRunCMake = True, _askUser = askUser)
+            assert result, "\n\nTask failed: ConfigureProjectToBuildFolder." 
+            print "Starting task: InstallBinariesToBuildFolder."
+            result = handler.InstallBinariesToBuildFolder()
+            assert result, "\n\nTask failed: InstallBinariesToBuildFolder." 
+        print "Finished task autoconfig."
+    
+    # list the targets
+    if options.listTargets:
+        for target in handler.GetListOfPossibleTargets():
+            print target
+    
+    # list the dependencies of the instance
+    if options.dependencies:
+        for project in handler.GetProjectDependencies():
+            print project.name
+
+def GetAskUser(options):
+    if options.silent:
+        return DontAskUser()
+    return AskUser()
+
+def Watch(handler, options):
+    """
+    Regenerates the cmake files when files are added to or removed from the globbed folders of the projects, or when
+    csnake files change, until interrupted. Only the cmake files of the affected projects change (see csnGenerator).
+    """
+    askUser = GetAskUser(options)
+    handler.ConfigureProjectToBuildFolder(_alsoRunCMake = False, _askUser = askUser)
+    (folders, excludedFolders) = handler.GetWatchedFolders()
+    watcher = csnWatcher.CreateWatcher(folders, excludedFolders, options.watchInterval, options.watchPolling)
+    print "Watching %s (%s), press Ctrl+C to stop." % (", ".join(watcher.folders), watcher.name)
+    failed = False
+    try:
+        try:
+            while True:
+                paths = watcher.WaitForChanges(options.watchDebounce)
+                try:
+                    if failed:
+                        print "%s: %s changed files, trying again." % (time.strftime("%H:%M:%S"), len(paths))
+                    else:
+                        projects = handler.GetProjectsAffectedByChanges(paths)
+                        modules = handler.GetChangedCsnakeModules()
+                        if not len(projects) and not len(modules):
+                            continue
+                        print "%s: %s changed files, affected projects: %s, changed csnake modules: %s" % (time.strftime("%H:%M:%S"), len(paths),
+                            ", ".join([x.name for x in projects]) or "none", ", ".join(modules) or "none")
+                    handler.ReloadChangedFiles()
+                    handler.ConfigureProjectToBuildFolder(_alsoRunCMake = False, _askUser = askUser)
+                    print "Regenerated the cmake files of %s projects, skipped %s unchanged projects." % (handler.generator.nRegeneratedProjects, handler.generator.nSkippedProjects)
+                    failed = False
+                except Exception:
+                    # e.g. a syntax error in a csnake file that is being edited: keep watching, and try again after the next change
+                    traceback.print_exc()
+                    failed = True
+        except KeyboardInterrupt:
+            print "Stopped watching."
+    finally:
+        watcher.Close()
+
+def RunDaemonCommands(handler, options):
+    """ Runs the commands of a request to the daemon (see csnDaemon). """
+    # questions cannot be answered through the daemon, and the daemon keeps the project graph in memory
+    options.silent = True
+    options.projectCache = False
+    RunCommands(handler, options)
+
+if __name__ == "__main__":
+    (commandLineOptions, commandLineArgs) = parser.parse_args()
+
+
+    # check command line
+    if len(commandLineArgs) != 1:
+        parser.print_usage()
+        sys.exit(1)
+
+    # check the number of jobs
+    if not commandLineOptions.jobs is None and commandLineOptions.jobs < 1:
+        print "Error, the number of jobs must be at least 1: %s" % commandLineOptions.jobs
+        sys.exit(1)
+
+    # check if the file exists
+    if not os.path.exists(commandLineArgs[0]):
+        print "Error, the input context file does not exists: '%s'" % commandLineArgs[0]
+        sys.exit(1)
+
+    contextFilename = commandLineArgs[0]
+
+    # stop the daemon
+    if commandLineOptions.stopDaemon:
+        if csnDaemon.Stop(contextFilename):
+            print "Stopped the daemon for %s." % contextFilename
+        else:
+            print "No daemon is running for %s." % contextFilename
+        sys.exit(0)
+
+    # serve the requests of other calls
+    if commandLineOptions.daemon:
+        daemon = csnDaemon.Daemon(contextFilename, RunDaemonCommands)
+        try:
+            daemon.Listen()
+        except csnDaemon.DaemonError, e:
+            print "Error, %s" % e
+            sys.exit(1)
+        print "Serving requests for %s on %s." % (contextFilename, daemon.socketFilename)
+        daemon.Serve()
+        sys.exit(0)
+
+    # let the daemon run the commands, if one is running (watching is done in this process)
+    if commandLineOptions.useDaemon and not commandLineOptions.watch:
+        exitCode = csnDaemon.SendRequest(contextFilename, { "command" : "run", "options" : vars(commandLineOptions) })
+        if not exitCode is None:
+            sys.exit(exitCode)
 
+    # imported here, so that the requests to the daemon do not load the handler modules
+    import csnGUIHandler
+    handler = csnGUIHandler.Handler()
+    handler.LoadContext(contextFilename)
+    if commandLineOptions.watch:
+        # the csnake files must be loaded, to find the csnake files that change
+        commandLineOptions.projectCache = False
+    RunCommands(handler, commandLineOptions)
+    if commandLineOptions.watch:
+        Watch(handler, commandLineOptions)
@@ -35,12 +35,16 @@ class ContextData:
         self.__pythonPath = ""
         self.__idePath = ""
         self.__kdevelopProjectFolder = ""
+        # maximum number of jobs of the build tools (0: the number of cores)
+        self.__numberOfJobs = 0
             
         # List of items to filter out of build
         self.__filter = ["Demos", "Applications", "Tests", "Plugins"]
 
         self.__rootFolders = []
         self.__thirdPartySrcAndBuildFolders = []
+        # third party src folder -> list of third party src folders that must be configured before it
+        self.__thirdPartyDependencies = dict()
 
         self.__recentlyUsed = list()
         
@@ -85,6 +89,13 @@ class ContextData:
     def GetThirdPartyBuildFolders(self):
         return [srcAndBuild[1] for srcAndBuild in self._GetThirdPartySrcAndBuildFolders()]
 
+    def GetThirdPartyDependencies(self):
+        return self.__thirdPartyDependencies
+
+    def _SetThirdPartyDependencies(self, value):
+        ''' Protected, should only be accessed by the Context. '''
+        self.__thirdPartyDependencies = value
+
     def GetInstance(self):
         return self.__instance
 
@@ -140,6 +151,12 @@ class ContextData:
 
     def SetKdevelopProjectFolder(self, value):
         self.__kdevelopProjectFolder = value
+
+    def GetNumberOfJobs(self):
+        return self.__numberOfJobs
+
+    def SetNumberOfJobs(self, value):
+        self.__numberOfJobs = value
    
     def Equal(self, other):
         """ Compare two contexts. """
@@ -149,6 +166,7 @@ class ContextData:
             self.__csnakeFile == other.GetCsnakeFile() and \
             self.__rootFolders == other.GetRootFolders() and \
             self.__thirdPartySrcAndBuildFolders == other._GetThirdPartySrcAndBuildFolders() and \
+            self.__thirdPartyDependencies == other.GetThirdPartyDependencies() and \
             self.__instance == other.GetInstance() and \
             self.__testRunnerTemplate == other.GetTestRunnerTemplate() and \
             self.__filter == other.GetFilter() and \
@@ -157,7 +175,8 @@ class ContextData:
             self.__cmakePath == other.GetCmakePath() and \
             self.__pythonPath == other.GetPythonPath() and \
             self.__idePath == other.GetIdePath() and \
-            self.__kdevelopProjectFolder == other.GetKdevelopProjectFolder():
+            self.__kdevelopProjectFolder == other.GetKdevelopProjectFolder() and \
+            self.__numberOfJobs == other.GetNumberOfJobs():
             return True
         # default
         return False
@@ -209,6 +228,8 @@ class Context(object):
         self.RegisterCompiler(csnNMake.Compiler())
         
         self.__subCategoriesOf = dict()
+        # the third party folders, and the dictionary from the normalized third party folders to their index (see GetThirdPartyFolderIndex)
+        self.__thirdPartyFolderIndices = (None, dict())
 
         # listeners
         self.__listeners = []
@@ -313,6 +334,14 @@ class Context(object):
         self.__data.SetKdevelopProjectFolder(value)
         self.__NotifyListeners(ChangeEvent(self))
 
+    def GetNumberOfJobs(self):
+        """ Returns the maximum number of jobs of the build tools (0 means the number of cores). """
+        return self.__data.GetNumberOfJobs()
+
+    def SetNumberOfJobs(self, value):
+        self.__data.SetNumberOfJobs(value)
+        self.__NotifyListeners(ChangeEvent(self))
+
     # Methods ================
 
     def RegisterCompiler(self, compiler):
@@ -473,6 +502,8 @@ class Context(object):
         self.__LoadRootFolders(parser)
         # third parties: now multiple
         self.__LoadThirdPartySrcAndBuildFoldersMultiple(parser)
+        self.__LoadThirdPartyDependencies(parser)
+        self.__LoadNumberOfJobs(parser)
         # recent files
         self.__LoadRecentlyUsedCSnakeFilesOneSection(parser)
         # find the compiler from the compiler name
@@ -546,6 +577,29 @@ class Context(object):
                 parser.get(sectionSrc, "ThirdPartyFolder%s" % count), parser.get(sectionBuild, "ThirdPartyBuildFolder%s" % count))
             count += 1
 
+    def __LoadThirdPartyDependencies(self, parser):
+        """ Load the (optional) dependencies between the third party folders. Used from v2.1. """
+        # section
+        section = "ThirdPartyDependencies"
+        # clear dictionary
+        self.__data._SetThirdPartyDependencies(dict())
+        # read: the option of the n-th third party folder lists the src folders it depends on
+        for index in range(self.GetNumberOfThirdPartyFolders()):
+            if parser.has_option(section, "ThirdPartyDependencies%s" % index):
+                dependencies = [x for x in re.split(";", parser.get(section, "ThirdPartyDependencies%s" % index)) if x != ""]
+                self.__data.GetThirdPartyDependencies()[self.GetThirdPartyFolder(index)] = dependencies
+
+    def __LoadNumberOfJobs(self, parser):
+        """ Load the (optional) number of jobs. Used from v2.1. """
+        # section
+        section = "CSnake"
+        self.__data.SetNumberOfJobs(0)
+        if parser.has_option(section, "numberOfJobs"):
+            try:
+                self.__data.SetNumberOfJobs(max(0, parser.getint(section, "numberOfJobs")))
+            except ValueError:
+                raise IOError("Invalid field: 'numberOfJobs'")
+
     def __LoadThirdPartySrcAndBuildFoldersSingle(self, parser):
         """ Load third party src and build folders. Used in v1.0. """
         # sections
@@ -638,6 +692,9 @@ class Context(object):
             parser.set(mainSection, basicField, getattr(self.__data, field))
         # set the filter
         parser.set(mainSection, "filter", ";".join(self.GetFilter()))
+        # set the number of jobs (only if it is not the default)
+        if self.GetNumberOfJobs():
+            parser.set(mainSection, "numberOfJobs", self.GetNumberOfJobs())
         
         # root folders
         rootFolderSection = "RootFolders"
@@ -658,6 +715,15 @@ class Context(object):
             parser.set(thirdPartyBuildFolderSection, "ThirdPartyBuildFolder%s" % count, self._GetThirdPartySrcAndBuildFolders()[count][1] )
             count += 1
         
+        # dependencies between the third parties (only if they were declared)
+        if len(self.GetThirdPartyDependencies()):
+            thirdPartyDependenciesSection = "ThirdPartyDependencies"
+            parser.add_section(thirdPartyDependenciesSection)
+            for index in range(self.GetNumberOfThirdPartyFolders()):
+                dependencies = self.GetThirdPartyDependencies().get(self.GetThirdPartyFolder(index))
+                if not dependencies is None:
+                    parser.set(thirdPartyDependenciesSection, "ThirdPartyDependencies%s" % index, ";".join(dependencies))
+        
         # recent files
         recentSection = "RecentlyUsedCSnakeFiles"
         parser.add_section(recentSection)
@@ -710,6 +776,36 @@ class Context(object):
     def GetThirdPartyFolders(self):
         return self.__data.GetThirdPartySrcFolders()
 
+    def GetThirdPartyFolderIndex(self, folder):
+        """
+        Returns the index of the third party folder that is equal to folder after normalization (the first one if there
+        are more), or None if there is no such third party folder. Used by each project that is created, so the
+        normalized third party folders are cached until the third party folders change.
+        """
+        thirdPartyFolders = self.GetThirdPartyFolders()
+        if thirdPartyFolders != self.__thirdPartyFolderIndices[0]:
+            indices = dict()
+            for (index, thirdPartyFolder) in enumerate(thirdPartyFolders):
+                indices.setdefault(csnUtility.NormalizePath(thirdPartyFolder), index)
+            self.__thirdPartyFolderIndices = (thirdPartyFolders, indices)
+        return self.__thirdPartyFolderIndices[1].get(folder)
+
+    def GetThirdPartyDependencies(self):
+        """
+        Returns the declared dependencies between the third party folders: a dictionary from a third party src folder
+        to the list of third party src folders that must be configured (and built) before it. Folders without a
+        declared list are not in the dictionary.
+        """
+        return self.__data.GetThirdPartyDependencies()
+
+    def SetThirdPartyDependencies(self, srcFolder, dependencies):
+        """ Declares that the third party folder srcFolder depends on the third party src folders in dependencies (None to undeclare). """
+        if dependencies is None:
+            self.__data.GetThirdPartyDependencies().pop(srcFolder, None)
+        else:
+            self.__data.GetThirdPartyDependencies()[srcFolder] = list(dependencies)
+        self.__NotifyListeners(ChangeEvent(self))
+
     def GetNumberOfThirdPartyFolders( self ):
         return len(self._GetThirdPartySrcAndBuildFolders())
     
@@ -818,8 +914,7 @@ class Context(object):
         
     def CreateProject(self, _name, _type, _sourceRootFolder = None, _categories = None):
         project = csnProject.GenericProject(_name, _type, _sourceRootFolder, _categories, _context = self)
-        for flag in self.GetCompiler().GetCompileFlags():
-            project.GetCompileManager().private.definitions.append(flag)
+        project.GetCompileManager().private.definitions.extend(self.GetCompiler().GetCompileFlags())
         return project
     
     def GetOutputFolder(self, mode):
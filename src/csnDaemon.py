@@ -0,0 +1,216 @@
+## @package csnDaemon
+# Definition of the Daemon class and the client functions.
+import csnUtility
+import errno
+import hashlib
+import json
+import optparse
+import os
+import socket
+import sys
+import threading
+import traceback
+
+class DaemonError(StandardError):
+    pass
+
+def IsSupported():
+    """ True if the platform has unix domain sockets (the daemon is not available on Windows). """
+    return hasattr(socket, "AF_UNIX")
+
+def GetSocketFilename(_contextFilename):
+    """ Returns the unix domain socket on which the daemon for context file _contextFilename listens. """
+    digest = hashlib.md5(os.path.abspath(_contextFilename)).hexdigest()
+    return "%s/daemon-%s.sock" % (csnUtility.GetCSnakeUserFolder(), digest)
+
+def _Send(_connection, _message):
+    _connection.sendall(json.dumps(_message) + "\n")
+
+def _ReadMessages(_connection):
+    """ Yields the messages (one json object per line) received on _connection, until it is closed. """
+    buffer = ""
+    while True:
+        data = _connection.recv(65536)
+        if not data:
+            return
+        buffer += data
+        while "\n" in buffer:
+            (line, buffer) = buffer.split("\n", 1)
+            yield json.loads(line)
+
+def _Connect(_contextFilename):
+    """ Returns a socket connected to the daemon for _contextFilename, or None if no daemon is running. """
+    if not IsSupported():
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(GetSocketFilename(_contextFilename))
+    except socket.error, e:
+        connection.close()
+        if e.args[0] in (errno.ENOENT, errno.ECONNREFUSED):
+            return None
+        raise
+    return connection
+
+def SendRequest(_contextFilename, _request, _stdout = None, _stderr = None):
+    """
+    Sends _request (a dictionary) to the daemon for context file _contextFilename, and writes the output of the
+    request to _stdout and _stderr (default: sys.stdout and sys.stderr) while it runs.
+    Returns the exit code of the request, or None if no daemon is running.
+    """
+    connection = _Connect(_contextFilename)
+    if connection is None:
+        return None
+    streams = { "stdout" : _stdout or sys.stdout, "stderr" : _stderr or sys.stderr }
+    try:
+        _Send(connection, _request)
+        for message in _ReadMessages(connection):
+            if "exit" in message:
+                return message["exit"]
+            streams[message["stream"]].write(message["text"].encode("utf-8"))
+            streams[message["stream"]].flush()
+    finally:
+        connection.close()
+    raise DaemonError("The daemon closed the connection before the request finished.")
+
+def IsRunning(_contextFilename):
+    """ True if a daemon is running for context file _contextFilename. """
+    return SendRequest(_contextFilename, { "command" : "ping" }) == 0
+
+def Stop(_contextFilename):
+    """ Stops the daemon for context file _contextFilename. Returns false if no daemon was running. """
+    return not SendRequest(_contextFilename, { "command" : "stop" }) is None
+
+class _StreamWriter:
+    """ File-like object that sends what is written to the client of a request. """
+    def __init__(self, _connection, _stream, _lock):
+        self.connection = _connection
+        self.stream = _stream
+        self.lock = _lock
+
+    def write(self, _text):
+        if not _text:
+            return
+        if isinstance(_text, str):
+            # the output of the build tools is not necessarily utf-8
+            _text = _text.decode("utf-8", "replace")
+        self.lock.acquire()
+        try:
+            _Send(self.connection, { "stream" : self.stream, "text" : _text })
+        finally:
+            self.lock.release()
+
+    def flush(self):
+        pass
+
+class Daemon:
+    """
+    Serves requests for one context file on a unix domain socket, with a Handler that keeps the context and the
+    project graph loaded between requests. Before each request, the context file is loaded again if it changed, and
+    the csnake files that changed are loaded again (see csnModuleTracker).
+    The requests are handled one at a time. A request is a json object on one line, with a "command":
+    - "run": runs _runCommands(handler, options), with the "options" of the request (a dictionary). What the
+    function writes to standard output and standard error is sent to the client, followed by the exit code (0, or 1
+    if the function raised an exception).
+    - "ping": answers with exit code 0.
+    - "stop": answers with exit code 0, and stops the daemon.
+    """
+    def __init__(self, _contextFilename, _runCommands):
+        """
+        _contextFilename - The context file.
+        _runCommands - Function that runs the commands of a request, called as _runCommands(handler, options), where
+        options is an optparse.Values object.
+        """
+        self.contextFilename = os.path.abspath(_contextFilename)
+        self.socketFilename = GetSocketFilename(_contextFilename)
+        self.runCommands = _runCommands
+        self.handler = None
+        self.nRequests = 0
+        self.__contextState = None
+        self.__socket = None
+        self.__stopped = False
+
+    def Listen(self):
+        """ Creates the socket. Raises DaemonError if the platform has no unix domain sockets, or if a daemon is already running. """
+        if not IsSupported():
+            raise DaemonError("The daemon needs unix domain sockets, which are not available on this platform.")
+        if IsRunning(self.contextFilename):
+            raise DaemonError("A daemon is already running for %s." % self.contextFilename)
+        if os.path.exists(self.socketFilename):
+            # left behind by a daemon that did not stop normally
+            os.remove(self.socketFilename)
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.bind(self.socketFilename)
+        os.chmod(self.socketFilename, 0600)
+        self.__socket.listen(5)
+
+    def Serve(self):
+        """ Handles requests until a stop request is received. Calls Listen if it was not called yet. """
+        if self.__socket is None:
+            self.Listen()
+        try:
+            while not self.__stopped:
+                (connection, unused) = self.__socket.accept()
+                try:
+                    self.__HandleConnection(connection)
+                except socket.error:
+                    # the client went away
+                    pass
+                connection.close()
+        finally:
+            self.__socket.close()
+            self.__socket = None
+            if os.path.exists(self.socketFilename):
+                os.remove(self.socketFilename)
+
+    def __HandleConnection(self, _connection):
+        try:
+            request = _ReadMessages(_connection).next()
+        except (StopIteration, ValueError):
+            return
+        command = request.get("command")
+        if command == "ping":
+            _Send(_connection, { "exit" : 0 })
+        elif command == "stop":
+            self.__stopped = True
+            _Send(_connection, { "exit" : 0 })
+        elif command == "run":
+            _Send(_connection, { "exit" : self.__Run(_connection, request.get("options", {})) })
+        else:
+            _Send(_connection, { "stream" : "stderr", "text" : "Unknown request: %s\n" % command })
+            _Send(_connection, { "exit" : 1 })
+
+    def __Run(self, _connection, _options):
+        """ Runs the commands of a request, with the output sent to the client. Returns the exit code. """
+        lock = threading.Lock()
+        (stdout, stderr) = (sys.stdout, sys.stderr)
+        sys.stdout = _StreamWriter(_connection, "stdout", lock)
+        sys.stderr = _StreamWriter(_connection, "stderr", lock)
+        try:
+            try:
+                self.__Prepare()
+                self.runCommands(self.handler, optparse.Values(_options))
+                return 0
+            except socket.error:
+                raise
+            except SystemExit, e:
+                return e.code or 0
+            except:
+                traceback.print_exc()
+                return 1
+        finally:
+            (sys.stdout, sys.stderr) = (stdout, stderr)
+            self.nRequests += 1
+
+    def __Prepare(self):
+        """ Loads the context file if it changed, and the csnake files that changed. """
+        stat = os.stat(self.contextFilename)
+        contextState = (stat.st_size, stat.st_mtime)
+        if self.handler is None or contextState != self.__contextState:
+            # imported here, so that the clients do not load the handler modules
+            import csnGUIHandler
+            self.handler = csnGUIHandler.Handler()
+            self.handler.LoadContext(self.contextFilename)
+            self.__contextState = contextState
+        else:
+            self.handler.ReloadChangedFiles()
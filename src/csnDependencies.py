@@ -7,6 +7,331 @@ import logging
 class DependencyError(StandardError):
     """ Used when there is a cyclic dependency between CSnake projects. """
     pass
+
+# Number of changes made to the dependencies (AddProjects, UseBefore) of any project. 
+# A Graph built for an older value is outdated.
+_dependencyChanges = 0
+
+# shared by the managers (looking the logger up for each project is a noticeable part of creating a project)
+_logger = logging.getLogger("CSnake")
+
+def _DependenciesChanged():
+    global _dependencyChanges
+    _dependencyChanges += 1
+
+class _GraphView:
+    """
+    Helper class of Graph: the edges selected by one combination of the GetProjects flags, 
+    and the (lazily computed) closures of the projects for these edges.
+    """
+    def __init__(self, _direct):
+        # id -> list of ids of the direct dependencies
+        self.direct = _direct
+        # id -> True if a cycle can be reached from the project (closures are then computed with the recursive walk)
+        self.cyclic = _FindCyclic(_direct)
+        # id -> (tuple of ids in GetProjects order, bitset of these ids)
+        self.closures = dict()
+        
+    def GetClosure(self, _id):
+        """ Returns the closure of the (acyclic) project _id. """
+        closures = self.closures
+        direct = self.direct
+        work = [_id]
+        while len(work):
+            node = work[-1]
+            if node in closures:
+                work.pop()
+                continue
+            pending = [child for child in direct[node] if not child in closures]
+            if len(pending):
+                work.extend(pending)
+                continue
+            work.pop()
+            order = []
+            bits = 0
+            for child in direct[node]:
+                (childOrder, childBits) = closures[child]
+                childBits |= 1 << child
+                if childBits & ~bits:
+                    for x in childOrder + (child,):
+                        bit = 1 << x
+                        if not bits & bit:
+                            bits |= bit
+                            order.append(x)
+            closures[node] = (tuple(order), bits)
+        return closures[_id]
+
+def _FindCyclic(_direct):
+    """
+    Returns a list that tells for each node of the graph _direct (list of lists of successor nodes) if a cycle
+    can be reached from it. Uses an iterative version of Tarjan's strongly connected components algorithm.
+    """
+    n = len(_direct)
+    index = [None] * n
+    low = [0] * n
+    onStack = [False] * n
+    cyclic = [False] * n
+    stack = []
+    counter = 0
+    for start in range(n):
+        if not index[start] is None:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        onStack[start] = True
+        work = [(start, 0)]
+        while len(work):
+            (node, position) = work[-1]
+            children = _direct[node]
+            if position < len(children):
+                work[-1] = (node, position + 1)
+                child = children[position]
+                if index[child] is None:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    onStack[child] = True
+                    work.append((child, 0))
+                elif onStack[child]:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if len(work):
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    onStack[member] = False
+                    members.append(member)
+                    if member == node:
+                        break
+                # components are completed in reverse topological order, so the successors are final
+                isCyclic = len(members) > 1 or node in _direct[node]
+                for member in members:
+                    for child in _direct[member]:
+                        isCyclic = isCyclic or cyclic[child]
+                for member in members:
+                    cyclic[member] = isCyclic
+    return cyclic
+
+class Graph:
+    """
+    Immutable snapshot of the dependency graph below a root project.
+    The projects get integer ids (in discovery order) and the required, non-required and use-before edges are stored as
+    adjacency lists of ids. The recursive queries of the Manager are answered from closures that are computed once per
+    project and per combination of flags, and stored as an ordered tuple of ids plus a bitset (bit i set for project i).
+    When a cycle can be reached from a project, its queries fall back to the recursive walk of the Manager (which 
+    reports the cycle, or returns the same result as before).
+    The graph is outdated as soon as dependencies are added to any project, or the filter of the context changes.
+    Use Manager.GetGraph to get an up-to-date graph.
+    """
+    def __init__(self, _rootProject):
+        self.__dependencyChanges = _dependencyChanges
+        self.__context = _rootProject.context
+        self.__filter = self.__GetFilter()
+        # id -> project, and project -> id
+        self.projects = []
+        self.ids = dict()
+        self.__Discover(_rootProject)
+        # adjacency lists, in the order of the lists of the managers
+        self.dependencies = []
+        self.nonRequired = []
+        self.useBefore = []
+        self.matchesFilter = []
+        for project in self.projects:
+            manager = project.dependenciesManager
+            self.dependencies.append([self.ids[x] for x in manager.projects])
+            self.nonRequired.append(frozenset([self.ids[x] for x in manager.projectsNonRequired]))
+            self.useBefore.append([self.ids[x] for x in manager.useBefore])
+            self.matchesFilter.append(project.MatchesFilter())
+            manager.graph = self
+        self.__views = dict()
+        self.__useBeforeBits = dict()
+        self.__projectsToUse = dict()
+
+    def __GetFilter(self):
+        if self.__context is None:
+            return None
+        return list(self.__context.GetFilter())
+        
+    def __Discover(self, _rootProject):
+        """ Assigns ids to all the projects that can be reached from _rootProject. """
+        work = [_rootProject]
+        while len(work):
+            project = work.pop()
+            if project in self.ids:
+                continue
+            self.ids[project] = len(self.projects)
+            self.projects.append(project)
+            manager = project.dependenciesManager
+            work.extend(reversed(manager.useBefore))
+            work.extend(reversed(manager.projects))
+            
+    def IsValid(self):
+        """ False if dependencies were added since the graph was built, or if the filter has changed. """
+        return self.__dependencyChanges == _dependencyChanges and self.__filter == self.__GetFilter()
+        
+    def __GetView(self, _onlyRequiredProjects, _onlyNonRequiredProjects, _filter):
+        if _onlyRequiredProjects:
+            # filtering only removes non-required projects
+            _filter = False
+        key = (_onlyRequiredProjects, _onlyNonRequiredProjects, _filter)
+        if not key in self.__views:
+            direct = []
+            for id in range(len(self.projects)):
+                nonRequired = self.nonRequired[id]
+                if _onlyNonRequiredProjects:
+                    ids = [x for x in self.dependencies[id] if x in nonRequired]
+                else:
+                    ids = self.dependencies[id]
+                if _filter:
+                    ids = [x for x in ids if not (self.matchesFilter[x] and x in nonRequired)]
+                if _onlyRequiredProjects:
+                    ids = [x for x in ids if not x in nonRequired]
+                direct.append(ids)
+            self.__views[key] = _GraphView(direct)
+        return self.__views[key]
+        
+    def GetProjects(self, _project, _onlyRequiredProjects, _includeSelf, _onlyNonRequiredProjects, _filter):
+        """ Recursive version of Manager.GetProjects. """
+        id = self.ids[_project]
+        view = self.__GetView(_onlyRequiredProjects, _onlyNonRequiredProjects, _filter)
+        if view.cyclic[id]:
+            return _project.dependenciesManager.GetProjects(_recursive = True, _onlyRequiredProjects = _onlyRequiredProjects,
+                _includeSelf = _includeSelf, _onlyNonRequiredProjects = _onlyNonRequiredProjects, _filter = _filter, _cache = dict())
+        result = OrderedSet.OrderedSet([self.projects[x] for x in view.GetClosure(id)[0]])
+        if _includeSelf:
+            result.add(_project)
+        return result
+    
+    def DependsOn(self, _project, _otherProject):
+        """ Version of Manager.DependsOn using the closure of the required projects. """
+        if not _otherProject in self.ids or _project is _otherProject:
+            return False
+        id = self.ids[_project]
+        view = self.__GetView(True, False, False)
+        if view.cyclic[id]:
+            return _project.dependenciesManager.DependsOn(_otherProject, _skipList = [])
+        return bool(view.GetClosure(id)[1] & (1 << self.ids[_otherProject]))
+    
+    def GetSubProjectsToGenerate(self, _project):
+        """
+        Returns the transitive reduction of the required dependencies of _project: the direct required dependencies
+        that are not (recursively) required by another direct required dependency. The projects are in GetProjects order.
+        """
+        id = self.ids[_project]
+        view = self.__GetView(True, False, False)
+        if view.cyclic[id]:
+            # raises the cyclic dependency error
+            _project.dependenciesManager.GetProjects(_recursive = 1, _onlyRequiredProjects = 1, _cache = dict())
+        reachable = 0
+        for x in view.direct[id]:
+            reachable |= view.GetClosure(x)[1]
+        return [self.projects[x] for x in view.direct[id] if not reachable & (1 << x)]
+        
+    def __GetRequiredUseBeforeBits(self, _id):
+        """ Returns the bitset of the projects in the useBefore lists of the projects that _id (recursively) requires. """
+        if not _id in self.__useBeforeBits:
+            view = self.__GetView(True, False, False)
+            if view.cyclic[_id]:
+                # raises the cyclic dependency error
+                self.projects[_id].dependenciesManager.GetProjects(_recursive = 1, _onlyRequiredProjects = 1, _cache = dict())
+            bits = 0
+            for required in view.GetClosure(_id)[0]:
+                for x in self.useBefore[required]:
+                    bits |= 1 << x
+            self.__useBeforeBits[_id] = bits
+        return self.__useBeforeBits[_id]
+        
+    def WantsToBeUsedBefore(self, _project, _otherProject):
+        """ Version of Manager.WantsToBeUsedBefore using the closure of the required projects. """
+        if _project is _otherProject or not _otherProject in self.ids:
+            return False
+        id = self.ids[_project]
+        otherId = self.ids[_otherProject]
+        if otherId in self.useBefore[id]:
+            return True
+        return bool(self.__GetRequiredUseBeforeBits(id) & (1 << otherId))
+    
+    def ProjectsToUse(self, _project):
+        """ Version of Manager.ProjectsToUse, the order is computed once per graph. """
+        id = self.ids[_project]
+        if not id in self.__projectsToUse:
+            self.__projectsToUse[id] = self.__SortProjectsToUse(id)
+        return [self.projects[x] for x in self.__projectsToUse[id]]
+        
+    def __SortProjectsToUse(self, _id):
+        """
+        Topological sort (Kahn) of the required projects of _id and _id itself, using the use-before relation
+        of WantsToBeUsedBefore as edges. The projects without pending predecessors are taken by scanning the list
+        backwards, deferred projects are revisited in a next backward scan; this gives the same order as the
+        original pop-and-reinsert implementation.
+        Raises DependencyError with the projects of the cycle if the use-before relation is cyclic.
+        """
+        view = self.__GetView(True, False, False)
+        if view.cyclic[_id]:
+            # raises the cyclic dependency error
+            self.projects[_id].dependenciesManager.GetProjects(_recursive = 1, _onlyRequiredProjects = 1, _cache = dict())
+        (order, bits) = view.GetClosure(_id)
+        ids = list(order) + [_id]
+        bits |= 1 << _id
+        
+        # u wants to be used before v if v is in the useBefore list of u, or of a project that u requires
+        predecessors = dict()
+        for w in ids:
+            for v in self.useBefore[w]:
+                if not bits & (1 << v):
+                    continue
+                for u in ids:
+                    if u != v and (u == w or view.GetClosure(u)[1] & (1 << w)):
+                        predecessors.setdefault(v, set()).add(u)
+        successors = dict()
+        for (v, us) in predecessors.items():
+            for u in us:
+                successors.setdefault(u, []).append(v)
+        inDegree = dict([(v, len(us)) for (v, us) in predecessors.items()])
+        
+        result = []
+        remaining = ids
+        remainingSet = set(ids)
+        while len(remaining):
+            deferred = []
+            for x in reversed(remaining):
+                if inDegree.get(x, 0):
+                    if _id in remainingSet and _id in predecessors[x]:
+                        raise DependencyError("Logical error: %s cannot be used before %s" % (self.projects[_id].name, self.projects[x].name))
+                    deferred.append(x)
+                else:
+                    result.append(x)
+                    remainingSet.remove(x)
+                    for successor in successors.get(x, []):
+                        inDegree[successor] -= 1
+            deferred.reverse()
+            if len(deferred) == len(remaining):
+                raise DependencyError("Cyclic use-before relation: %s" % self.__FindCycle(predecessors, deferred))
+            remaining = deferred
+        
+        # ensure that the project is the first entry in the result
+        result.remove(_id)
+        result.insert(0, _id)
+        return result
+    
+    def __FindCycle(self, _predecessors, _remaining):
+        """ Returns the names of a cycle of the use-before relation between the projects in _remaining. """
+        path = []
+        position = dict()
+        node = _remaining[0]
+        while not node in position:
+            position[node] = len(path)
+            path.append(node)
+            node = [x for x in _remaining if x in _predecessors[node]][0]
+        cycle = path[position[node]:]
+        cycle.reverse()
+        cycle.append(cycle[0])
+        return " -> ".join([self.projects[x].name for x in cycle])
     
 class Manager:
     """ Dependency checker class. """
@@ -17,9 +342,18 @@ class Manager:
         self.projectsIncludedInSolution = OrderedSet.OrderedSet()
         self.useBefore = []
         self.isTopLevel = False
+        # graph snapshot that contains this project (see GetGraph)
+        self.graph = None
         # logger
-        self.__logger = logging.getLogger("CSnake")
+        self.__logger = _logger
         
+    def __getstate__(self):
+        # the graph snapshot is not stored (see csnProjectCache): its validity is checked against _dependencyChanges,
+        # which starts again at zero in the process that loads it
+        state = dict(self.__dict__)
+        state["graph"] = None
+        return state
+
     def AddProjects(self, _projects, _dependency = True, _includeInSolution = True):
         for project in _projects:
             projectToAdd = csnProject.ToProject(project)
@@ -35,17 +369,32 @@ class Manager:
                     self.projectsNonRequired.add( projectToAdd )
                 if _includeInSolution:
                     self.projectsIncludedInSolution.add( projectToAdd )
+                _DependenciesChanged()
+
+    def GetGraph(self):
+        """ Returns an up-to-date graph snapshot that contains this project, building one if needed. """
+        if self.graph is None or not self.graph.IsValid():
+            Graph(self.project)
+        return self.graph
+                    
+    def GetSubProjectsToGenerate(self):
+        """ 
+        Returns the required projects that are not required by another required project of self (the transitive reduction
+        of the required dependencies). These are the projects for which self must add a subdirectory.
+        """
+        return self.GetGraph().GetSubProjectsToGenerate(self.project)
                     
     def DependsOn(self, _otherProject, _skipList = None):
         """ 
         Returns true if self is (directly or indirectly) dependent upon _otherProject. 
         _otherProject - May be a project, or a function returning a project.
         _skipList - Used to not process project twice during the recursion (also prevents infinite loops).
+        If _skipList is None, the answer is looked up in the graph snapshot.
         """
+        otherProject = csnProject.ToProject(_otherProject)
         if _skipList is None:
-            _skipList = []
+            return self.GetGraph().DependsOn(self.project, otherProject)
         
-        otherProject = csnProject.ToProject(_otherProject)
         assert not self.project in _skipList, "\n\nError: %s should not be in stoplist" % (self.project.name)
         _skipList.append(self.project)
         for requiredProject in self.GetProjects(_onlyRequiredProjects = 1):
@@ -67,7 +416,12 @@ class Manager:
         _filter -- use the filter or not
         _stack -- do not touch, only used internally in recursive loops
         _cache -- cache for intermediate results, can be provided as external dictionary to be shared between calls
+        Recursive calls without _cache are answered by the graph snapshot (see GetGraph). _onlyPublicDependencies
+        is currently ignored.
         """
+        if _recursive and _cache is None and not len(_stack):
+            return self.GetGraph().GetProjects(self.project, bool(_onlyRequiredProjects), bool(_includeSelf), 
+                bool(_onlyNonRequiredProjects), bool(_filter))
         if _cache is None:
             _cache = dict()
         _recursive = bool(_recursive)
@@ -146,6 +500,7 @@ class Manager:
         if otherProject.dependenciesManager.WantsToBeUsedBefore(self.project):
             raise DependencyError, "Cyclic use-before relation between %s and %s" % (self.project.name, otherProject.name)
         self.useBefore.append(otherProject)
+        _DependenciesChanged()
         
     def WantsToBeUsedBefore(self, _otherProject):
         """ 
@@ -159,55 +514,17 @@ class Manager:
         #if self.project in otherProject.dependenciesManager.GetProjects(_recursive = 1, _onlyRequiredProjects = 1):
         #    return 0
         
-        if self.project is otherProject:
-            return 0
-            
-        if otherProject in self.useBefore:
+        if self.GetGraph().WantsToBeUsedBefore(self.project, otherProject):
             return 1
-            
-        for requiredProject in self.GetProjects(_recursive = 1, _onlyRequiredProjects = 1):
-            if otherProject in requiredProject.dependenciesManager.useBefore:
-                return 1
-                
         return 0
            
     def ProjectsToUse(self):
         """
         Determine a list of projects that must be used (meaning: include the config and use file) to generate this project.
-        Note that self is always the last project in this list.
-        The list is sorted in the correct order, using Project.WantsToBeUsedBefore.
+        Note that self is always the first project in this list.
+        The list is sorted in the correct order, using Project.WantsToBeUsedBefore. It is computed once per graph snapshot.
         """
-        result = []
-        
-        projectsToUse = [project for project in self.GetProjects(_recursive = 1, _onlyRequiredProjects = 1)]
-        assert not self in projectsToUse, "\n\nError: %s should not be in projectsToUse" % (self.project.name)
-        projectsToUse.append(self.project)
-        
-        (count, maxCount) = (0, 1)
-        for i in range(len(projectsToUse)):
-            maxCount = maxCount * (i+1)
-        
-        while (len(projectsToUse)):
-            assert count < maxCount
-            count += 1
-            project = projectsToUse.pop()
-
-            # check if we must skip this project for now, because another project must be used before this one
-            skipThisProjectForNow = 0
-            for otherProject in projectsToUse:
-                if otherProject.dependenciesManager.WantsToBeUsedBefore(project):
-                    assert not otherProject is self.project, "\n\nLogical error: %s cannot be used before %s" % (self.project.name, project.name)
-                    skipThisProjectForNow = 1
-            if skipThisProjectForNow:
-                projectsToUse.insert(0, project)
-                continue
-            else:
-                result.append(project)
-          
-        # ensure that self.project is the first entry in the result
-        result.remove(self.project)
-        result.insert(0,self.project)
-        return result
+        return self.GetGraph().ProjectsToUse(self.project)
 
     def WriteDependencyStructureToXML(self, filename):
         """
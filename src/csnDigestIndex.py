@@ -0,0 +1,141 @@
+## @package csnDigestIndex
+# Definition of the DigestIndex class.
+import json
+import os
+import threading
+import time
+import hashlib
+
+def FileDigest(_filename):
+    """ Returns the md5 digest (as a hex string) of the contents of file _filename, read in text mode in blocks. """
+    digest = hashlib.md5()
+    f = open(_filename, 'r')
+    try:
+        block = f.read(1 << 20)
+        while block:
+            digest.update(block)
+            block = f.read(1 << 20)
+    finally:
+        f.close()
+    return digest.hexdigest()
+
+def GetIndexFilename(_folder):
+    """ Returns the file in which the DigestIndex of the files generated in build folder _folder is stored. """
+    return "%s/csnakeDigests.json" % _folder
+
+def TextDigest(_text):
+    """ Returns the md5 digest (as a hex string) of _text, comparable with FileDigest. """
+    return hashlib.md5(_text).hexdigest()
+
+class DigestIndex:
+    """
+    Stores the size, modification time and content digest of the files that CSnake wrote, in a json file. When the size
+    and modification time of a file did not change, its digest is taken from the index, so checking if an existing file
+    already has the right contents costs one stat instead of reading the whole file.
+    A file that was modified within a few seconds of recording its entry could have been changed again without changing
+    its size or modification time (file systems store modification times with a limited precision). Such entries are not
+    trusted: the file is read again, and its entry is recorded again.
+    The functions can be called from several threads.
+    """
+    # seconds between the modification time of a file and the time its entry was recorded, for the entry to be trusted
+    racyInterval = 2.0
+
+    def __init__(self, _filename):
+        """ _filename -- Json file in which the index is stored. """
+        self.filename = _filename
+        self.__lock = threading.Lock()
+        self.Load()
+        self.ResetStatistics()
+
+    def Load(self):
+        """ Reads the index file. An unreadable index is treated as empty. """
+        # absolute filename -> [size, modification time, time of recording, digest]
+        self.__entries = dict()
+        self.__modified = False
+        if not os.path.exists(self.filename):
+            return
+        try:
+            indexFile = open(self.filename, 'r')
+            try:
+                data = json.load(indexFile)
+            finally:
+                indexFile.close()
+        except (IOError, ValueError):
+            return
+        if isinstance(data, dict):
+            self.__entries = data
+
+    def ResetStatistics(self):
+        self.hits = 0
+        self.reads = 0
+
+    def GetStatistics(self):
+        """ Returns a dictionary with the counters: hits (digests found in the index) and reads (files read to compute the digest). """
+        return { "hits" : self.hits, "reads" : self.reads }
+
+    def GetDigest(self, _filename):
+        """ Returns the digest of the contents of file _filename (None if the file does not exist). """
+        try:
+            stat = os.stat(_filename)
+        except OSError:
+            return None
+        return self.__GetDigest(_filename, stat)
+
+    def FileHasDigest(self, _filename, _digest, _size = None):
+        """
+        Returns true if file _filename exists and its contents have digest _digest.
+        _size - If not None, the expected size of the file (a file with another size is not read).
+        """
+        try:
+            stat = os.stat(_filename)
+        except OSError:
+            return False
+        if not _size is None and stat.st_size != _size:
+            return False
+        return self.__GetDigest(_filename, stat) == _digest
+
+    def __GetDigest(self, _filename, _stat):
+        key = os.path.abspath(_filename)
+        self.__lock.acquire()
+        try:
+            entry = self.__entries.get(key)
+            if not entry is None and entry[0] == _stat.st_size and entry[1] == _stat.st_mtime and _stat.st_mtime < entry[2] - self.racyInterval:
+                self.hits += 1
+                return entry[3]
+            self.reads += 1
+        finally:
+            self.__lock.release()
+        digest = FileDigest(_filename)
+        self.__Record(key, _stat, digest)
+        return digest
+
+    def Record(self, _filename, _digest):
+        """ Records that file _filename (which was just written) has contents with digest _digest. """
+        try:
+            stat = os.stat(_filename)
+        except OSError:
+            return
+        self.__Record(os.path.abspath(_filename), stat, _digest)
+
+    def __Record(self, _key, _stat, _digest):
+        self.__lock.acquire()
+        try:
+            self.__entries[_key] = [_stat.st_size, _stat.st_mtime, time.time(), _digest]
+            self.__modified = True
+        finally:
+            self.__lock.release()
+
+    def Save(self):
+        """ Writes the index file (if entries were recorded since it was loaded or saved). """
+        self.__lock.acquire()
+        try:
+            if not self.__modified:
+                return
+            indexFile = open(self.filename, 'w')
+            try:
+                indexFile.write(json.dumps(self.__entries, sort_keys=True))
+            finally:
+                indexFile.close()
+            self.__modified = False
+        finally:
+            self.__lock.release()
@@ -0,0 +1,331 @@
+## @package csnFileSystemIndex
+# Definition of the FileSystemIndex class.
+import os
+import re
+import sys
+import glob
+import fnmatch
+import csnPathCanonicalizer
+
+try:
+    # optional: faster traversal (the entries tell if they are folders without an extra stat)
+    import scandir
+except ImportError:
+    scandir = None
+
+_magicCheck = re.compile('[*?[]')
+
+def _HasMagic(_path):
+    return _magicCheck.search(_path) is not None
+
+class FileSystemIndex:
+    """
+    In-memory snapshot of the folders below a set of indexed folders (the root folders and third party folders of the
+    context), used to answer glob patterns without accessing the file system.
+    Each folder is listed once, when it is first needed (or when the tree is preloaded with Scan). Patterns in folders
+    that are not indexed (such as the build folders, in which files are generated while configuring) are passed to
+    glob.glob. The results are the same as those of glob.glob for the snapshot.
+    When files are added, renamed or removed, call Refresh for the folder, or Invalidate for a whole tree.
+    """
+    def __init__(self, _fallback = None):
+        """ _fallback - If not None, the FileSystemIndex that answers the patterns in folders that are not indexed. """
+        self.__fallback = _fallback
+        # incremented when listings are forgotten, so that users can tell if results they derived may have changed
+        self.generation = 0
+        # functions that are called as listener(pattern, result) for each Glob (see csnModuleTracker and csnProjectCache)
+        self.globListeners = []
+        self.__caseInsensitive = csnPathCanonicalizer.IsCaseInsensitivePlatform()
+        self.__indexedFolders = []
+        self.__excludedFolders = []
+        self.__foldersKey = None
+        # folder -> key in self.__listings (only for absolute folders) and key -> result of IsIndexed
+        self.__keys = dict()
+        self.__isIndexed = dict()
+        self.Invalidate()
+        self.ResetStatistics()
+
+    def ResetStatistics(self):
+        self.globs = 0
+        self.indexedGlobs = 0
+        self.listingHits = 0
+        self.listdirCalls = 0
+
+    def GetStatistics(self):
+        """
+        Returns a dictionary with the counters: globs (number of patterns), indexedGlobs (patterns answered from the index),
+        listingHits (folder listings found in the index) and listdirCalls (folders listed on disk).
+        """
+        return { "globs" : self.globs, "indexedGlobs" : self.indexedGlobs, "listingHits" : self.listingHits, "listdirCalls" : self.listdirCalls }
+
+    def __Key(self, _folder):
+        """ Key of _folder in self.__listings. """
+        if _folder in self.__keys:
+            return self.__keys[_folder]
+        key = os.path.normpath(os.path.abspath(_folder))
+        if self.__caseInsensitive:
+            key = key.lower()
+        if os.path.isabs(_folder):
+            self.__keys[_folder] = key
+        return key
+
+    def SetFolders(self, _indexedFolders, _excludedFolders = None):
+        """
+        Only patterns in (subfolders of) _indexedFolders, but not in _excludedFolders, are answered from the index.
+        Changing the folders does not invalidate the listings in the index.
+        """
+        if _excludedFolders is None:
+            _excludedFolders = []
+        foldersKey = (list(_indexedFolders), list(_excludedFolders))
+        if foldersKey == self.__foldersKey:
+            return
+        self.__foldersKey = foldersKey
+        self.__indexedFolders = [self.__Key(x) for x in _indexedFolders if x != ""]
+        self.__excludedFolders = [self.__Key(x) for x in _excludedFolders if x != ""]
+        self.__isIndexed = dict()
+
+    def __IsInFolders(self, _key, _folders):
+        for folder in _folders:
+            if _key == folder or _key.startswith(os.path.join(folder, "")):
+                return True
+        return False
+
+    def IsIndexed(self, _folder):
+        """ True if glob patterns in _folder are answered from the index. """
+        key = self.__Key(_folder)
+        if not key in self.__isIndexed:
+            self.__isIndexed[key] = self.__IsInFolders(key, self.__indexedFolders) and not self.__IsInFolders(key, self.__excludedFolders)
+        return self.__isIndexed[key]
+
+    def Invalidate(self, _folder = None):
+        """ Forgets the listings of _folder and all its subfolders (all listings if _folder is None). """
+        self.generation += 1
+        if _folder is None:
+            # folder key -> [list of names in os.listdir order, dictionary from name (lower case name if the file system is
+            # case insensitive) to True if the name is a folder (None if unknown), dictionary from pattern to the matching
+            # names], or None if the folder cannot be listed
+            self.__listings = dict()
+            return
+        folder = self.__Key(_folder)
+        for key in self.__listings.keys():
+            if self.__IsInFolders(key, [folder]):
+                del self.__listings[key]
+
+    def Refresh(self, _folder):
+        """ Forgets the listing of _folder (but not of its subfolders): it is listed again when it is needed. """
+        self.generation += 1
+        self.__listings.pop(self.__Key(_folder), None)
+
+    def __GetListing(self, _folder):
+        key = self.__Key(_folder)
+        if key in self.__listings:
+            self.listingHits += 1
+            return self.__listings[key]
+        listing = None
+        (parentKey, name) = os.path.split(key)
+        parentListing = self.__listings.get(parentKey)
+        if name != "" and not parentListing is None and parentListing[1].get(name, False) is False:
+            # the listing of the parent folder tells that the folder does not exist
+            self.listingHits += 1
+            return listing
+        self.listdirCalls += 1
+        try:
+            names = os.listdir(_folder)
+        except os.error:
+            names = None
+        if not names is None:
+            kinds = dict()
+            for name in names:
+                kinds[self.__NameKey(name)] = None
+            listing = [names, kinds, dict()]
+        self.__listings[key] = listing
+        return listing
+
+    def __NameKey(self, _name):
+        if self.__caseInsensitive:
+            return _name.lower()
+        return _name
+
+    def Scan(self, _folder):
+        """ Preloads the listings of _folder and all its subfolders (symbolic links to folders are not followed). """
+        stack = [_folder]
+        while len(stack):
+            folder = stack.pop()
+            key = self.__Key(folder)
+            if scandir is None:
+                listing = self.__GetListing(folder)
+                if listing is None:
+                    continue
+                (names, kinds, matches) = listing
+                for name in names:
+                    path = os.path.join(folder, name)
+                    isFolder = os.path.isdir(path)
+                    kinds[self.__NameKey(name)] = isFolder
+                    if isFolder and not os.path.islink(path):
+                        stack.append(path)
+            else:
+                self.listdirCalls += 1
+                try:
+                    entries = list(scandir.scandir(folder))
+                except os.error:
+                    self.__listings[key] = None
+                    continue
+                names = []
+                kinds = dict()
+                for entry in entries:
+                    names.append(entry.name)
+                    isFolder = entry.is_dir()
+                    kinds[self.__NameKey(entry.name)] = isFolder
+                    if isFolder and not entry.is_symlink():
+                        stack.append(os.path.join(folder, entry.name))
+                self.__listings[key] = [names, kinds, dict()]
+
+    def __LExists(self, _path):
+        (folder, name) = os.path.split(_path)
+        if name == "":
+            return self.__IsDir(folder)
+        if folder == "":
+            folder = os.curdir
+        if name in (os.curdir, os.pardir) or not self.IsIndexed(folder):
+            return os.path.lexists(_path)
+        listing = self.__GetListing(folder)
+        return not listing is None and self.__NameKey(name) in listing[1]
+
+    def __IsDir(self, _path):
+        (folder, name) = os.path.split(os.path.normpath(_path))
+        if name in ("", os.curdir, os.pardir) or not self.IsIndexed(folder):
+            return os.path.isdir(_path)
+        listing = self.__GetListing(folder)
+        if listing is None:
+            return False
+        kinds = listing[1]
+        nameKey = self.__NameKey(name)
+        if not nameKey in kinds:
+            return False
+        if kinds[nameKey] is None:
+            kinds[nameKey] = os.path.isdir(_path)
+        return kinds[nameKey]
+
+    def Glob(self, _pattern):
+        """ Returns the same list as glob.glob(_pattern), using the index if the pattern is in an indexed folder. """
+        self.globs += 1
+        folder = _pattern
+        while _HasMagic(folder):
+            folder = os.path.dirname(folder)
+        if not self.IsIndexed(folder or os.curdir):
+            if not self.__fallback is None:
+                result = self.__fallback.Glob(_pattern)
+            else:
+                result = glob.glob(_pattern)
+        else:
+            self.indexedGlobs += 1
+            result = list(self.__IGlob(_pattern))
+        for listener in self.globListeners:
+            listener(_pattern, result)
+        return result
+
+    def IsDir(self, _path):
+        """ Returns the same as os.path.isdir(_path), using the index if _path is in an indexed folder. """
+        (folder, name) = os.path.split(os.path.normpath(_path))
+        if not self.__fallback is None and not self.IsIndexed(folder or os.curdir):
+            return self.__fallback.IsDir(_path)
+        return self.__IsDir(_path)
+
+    def Walk(self, _folder, _excludedFolderNames = ()):
+        """
+        Returns the files (not the folders) below _folder, in the order in which GlobDirectoryWalker.Walker finds them.
+        Folders with a name in _excludedFolderNames, and symbolic links to folders, are not entered.
+        """
+        if not self.__fallback is None and not self.IsIndexed(_folder):
+            return self.__fallback.Walk(_folder, _excludedFolderNames)
+        result = []
+        stack = [_folder]
+        while len(stack):
+            folder = stack.pop()
+            for name in self.__ListFolder(folder):
+                path = os.path.join(folder, name)
+                if self.__IsDir(path):
+                    if not name in _excludedFolderNames and not os.path.islink(path):
+                        stack.append(path)
+                else:
+                    result.append(path)
+        return result
+
+    def __ListFolder(self, _folder):
+        """ Returns the names in _folder (an empty list if it cannot be listed). """
+        if self.IsIndexed(_folder):
+            listing = self.__GetListing(_folder)
+            if listing is None:
+                return []
+            return listing[0]
+        try:
+            return os.listdir(_folder)
+        except os.error:
+            return []
+
+    # The functions below follow glob.iglob, glob.glob1 and glob.glob0 of the python library
+
+    def __IGlob(self, _pathname):
+        dirname, basename = os.path.split(_pathname)
+        if not _HasMagic(_pathname):
+            if basename:
+                if self.__LExists(_pathname):
+                    yield _pathname
+            else:
+                # Patterns ending with a slash should match only directories
+                if self.__IsDir(dirname):
+                    yield _pathname
+            return
+        if not dirname:
+            for name in self.__Glob1(os.curdir, basename):
+                yield name
+            return
+        if dirname != _pathname and _HasMagic(dirname):
+            dirs = self.__IGlob(dirname)
+        else:
+            dirs = [dirname]
+        if _HasMagic(basename):
+            globInDir = self.__Glob1
+        else:
+            globInDir = self.__Glob0
+        for dirname in dirs:
+            for name in globInDir(dirname, basename):
+                yield os.path.join(dirname, name)
+
+    def __Glob1(self, _dirname, _pattern):
+        if not _dirname:
+            _dirname = os.curdir
+        if isinstance(_pattern, unicode) and not isinstance(_dirname, unicode):
+            _dirname = unicode(_dirname, sys.getfilesystemencoding() or sys.getdefaultencoding())
+        listing = self.__GetListing(_dirname)
+        if listing is None:
+            return []
+        matches = listing[2]
+        matchesKey = (_pattern, isinstance(_dirname, unicode))
+        if not matchesKey in matches:
+            names = listing[0]
+            if isinstance(_dirname, unicode):
+                names = [self.__ToUnicode(x) for x in names]
+            if _pattern[0] != '.':
+                names = [x for x in names if x[0] != '.']
+            matches[matchesKey] = fnmatch.filter(names, _pattern)
+        return list(matches[matchesKey])
+
+    def __ToUnicode(self, _name):
+        # os.listdir returns unicode names for a unicode folder
+        if isinstance(_name, unicode):
+            return _name
+        try:
+            return unicode(_name, sys.getfilesystemencoding() or sys.getdefaultencoding())
+        except UnicodeDecodeError:
+            return _name
+
+    def __Glob0(self, _dirname, _basename):
+        if _basename == '':
+            # `os.path.split()` returns an empty basename for paths ending with a
+            # directory separator.  'q*x/' should match only directories.
+            if self.__IsDir(_dirname):
+                return [_basename]
+        else:
+            if self.__LExists(os.path.join(_dirname, _basename)):
+                return [_basename]
+        return []
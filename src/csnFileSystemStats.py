@@ -0,0 +1,223 @@
+## @package csnFileSystemStats
+# Definition of the FileSystemStats class, which counts and times the file system calls of csnake (opt-in).
+import __builtin__
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import csnProfiler
+
+# the operations that are counted, in the order of the summary tables
+operations = ["listdir", "stat", "glob", "open"]
+
+# frames in these folders are not call sites (the python library, such as os.path.exists calling os.stat)
+_libraryFolders = set([os.path.normcase(os.path.dirname(os.path.abspath(x.__file__))) for x in (os, glob)])
+# csnake files outside this folder are scripts
+_csnakeFolder = os.path.normcase(os.path.dirname(os.path.abspath(__file__)))
+
+class FileSystemStats:
+    """
+    While enabled, counts and times the calls of os.listdir, os.stat and os.lstat (also used by os.path.exists, isdir,
+    isfile and getmtime), glob.glob and open, in all threads. The calls are added up by:
+    - call site: the file, line and function of the first caller outside the python library;
+    - phase: the innermost span of csnProfiler (if the profiler is enabled);
+    - project: the innermost span of csnProfiler with a "project" argument (e.g. Generate);
+    - script: the innermost csnake file (csn*.py outside the csnake source folder) on the stack, such as the csnake
+      file of a project that is being loaded.
+    A call made by a counted call (e.g. the listdir calls of a glob) is only counted as part of that call.
+    Enabling replaces the functions of the os, glob and __builtin__ modules; disabling restores them.
+    """
+    def __init__(self):
+        self.__enabled = False
+        self.__originals = None
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.Clear()
+
+    def Clear(self):
+        self.__lock.acquire()
+        try:
+            # operation -> [count, time]
+            self.__totals = dict([(x, [0, 0.0]) for x in operations])
+            # dimension -> { (key, operation) : [count, time] }
+            self.__tables = { "callSite" : dict(), "phase" : dict(), "project" : dict(), "script" : dict() }
+        finally:
+            self.__lock.release()
+
+    def IsEnabled(self):
+        return self.__enabled
+
+    def Enable(self):
+        if self.__enabled:
+            return
+        self.__originals = {
+            "listdir" : (os, "listdir", os.listdir),
+            "stat" : (os, "stat", os.stat),
+            "lstat" : (os, "lstat", os.lstat),
+            "glob" : (glob, "glob", glob.glob),
+            "open" : (__builtin__, "open", __builtin__.open)
+        }
+        for (name, (module, attribute, function)) in self.__originals.items():
+            operation = name
+            if name == "lstat":
+                operation = "stat"
+            setattr(module, attribute, self.__Wrap(operation, function))
+        self.__enabled = True
+
+    def Disable(self):
+        if not self.__enabled:
+            return
+        for (module, attribute, function) in self.__originals.values():
+            setattr(module, attribute, function)
+        self.__originals = None
+        self.__enabled = False
+
+    def __Wrap(self, _operation, _function):
+        local = self.__local
+        def Counted(*args, **kwargs):
+            if getattr(local, "busy", False):
+                return _function(*args, **kwargs)
+            local.busy = True
+            start = time.time()
+            try:
+                return _function(*args, **kwargs)
+            finally:
+                try:
+                    self.__Add(_operation, time.time() - start, sys._getframe(1))
+                finally:
+                    local.busy = False
+        Counted.__name__ = _function.__name__
+        Counted.__doc__ = _function.__doc__
+        return Counted
+
+    def __Add(self, _operation, _time, _frame):
+        # the first frame outside the python library is the call site; the innermost csnake file is the script
+        callSite = None
+        script = None
+        frame = _frame
+        while not frame is None and (callSite is None or script is None):
+            filename = os.path.abspath(frame.f_code.co_filename)
+            folder = os.path.normcase(os.path.dirname(filename))
+            if callSite is None and not folder in _libraryFolders:
+                callSite = "%s:%s %s" % (os.path.basename(filename), frame.f_lineno, frame.f_code.co_name)
+            if script is None and folder != _csnakeFolder and os.path.basename(filename).startswith("csn") and filename.endswith(".py"):
+                script = filename.replace("\\", "/")
+            frame = frame.f_back
+        spans = csnProfiler.profiler.GetOpenSpans()
+        if len(spans):
+            phase = spans[-1].name
+        elif threading.currentThread().getName() == "MainThread":
+            phase = None
+        else:
+            phase = "(other threads)"
+        project = None
+        for span in reversed(spans):
+            if "project" in span.args:
+                project = span.args["project"]
+                break
+        self.__lock.acquire()
+        try:
+            total = self.__totals[_operation]
+            total[0] += 1
+            total[1] += _time
+            for (dimension, key) in (("callSite", callSite), ("phase", phase), ("project", project), ("script", script)):
+                if key is None:
+                    continue
+                table = self.__tables[dimension]
+                if not (key, _operation) in table:
+                    table[(key, _operation)] = [0, 0.0]
+                row = table[(key, _operation)]
+                row[0] += 1
+                row[1] += _time
+        finally:
+            self.__lock.release()
+
+    def GetTotals(self):
+        """ Returns a dictionary from operation to (number of calls, time in seconds). """
+        self.__lock.acquire()
+        try:
+            return dict([(x, tuple(y)) for (x, y) in self.__totals.items()])
+        finally:
+            self.__lock.release()
+
+    def GetTable(self, _dimension):
+        """
+        Returns the calls added up by _dimension ("callSite", "phase", "project" or "script"), as a list of
+        (key, { operation : (number of calls, time in seconds) }, total time), the key with the most time first.
+        """
+        self.__lock.acquire()
+        try:
+            rows = dict()
+            for ((key, operation), (count, seconds)) in self.__tables[_dimension].items():
+                if not key in rows:
+                    rows[key] = dict()
+                rows[key][operation] = (count, seconds)
+        finally:
+            self.__lock.release()
+        result = [(key, values, sum([x[1] for x in values.values()])) for (key, values) in rows.items()]
+        result.sort(key = lambda x: (-x[2], x[0]))
+        return result
+
+    def Dump(self):
+        """ Returns the totals and the tables as a dictionary that can be written as json. """
+        result = { "totals" : dict() }
+        for (operation, (count, seconds)) in self.GetTotals().items():
+            result["totals"][operation] = { "count" : count, "time" : seconds }
+        for dimension in self.__tables.keys():
+            rows = []
+            for (key, values, seconds) in self.GetTable(dimension):
+                row = { dimension : key, "time" : seconds }
+                for (operation, (count, operationSeconds)) in values.items():
+                    row[operation] = { "count" : count, "time" : operationSeconds }
+                rows.append(row)
+            result[dimension] = rows
+        return result
+
+    def GetSummary(self, _maxRows = 20):
+        """ Returns tables with the number of calls of each operation and their time, by call site, phase, project and script. """
+        def Format(_title, _rows):
+            width = max([len(str(x[0])) for x in _rows] + [len(_title)])
+            lines = ["%-*s" % (width, _title) + "".join(["%10s" % x for x in operations]) + "%12s" % "time (s)"]
+            for (key, counts, seconds) in _rows:
+                lines.append("%-*s" % (width, key) + "".join(["%10d" % counts.get(x, 0) for x in operations]) + "%12.3f" % seconds)
+            return "\n".join(lines) + "\n"
+        totals = self.GetTotals()
+        text = Format("total", [("all", dict([(x, totals[x][0]) for x in operations]), sum([x[1] for x in totals.values()]))])
+        for (dimension, title) in (("callSite", "call site"), ("phase", "phase"), ("project", "project"), ("script", "csnake file")):
+            rows = [(key, dict([(x, y[0]) for (x, y) in values.items()]), seconds) for (key, values, seconds) in self.GetTable(dimension)]
+            if not len(rows):
+                continue
+            text += "\n" + Format(title, rows[:_maxRows])
+            if len(rows) > _maxRows:
+                text += "(%s more)\n" % (len(rows) - _maxRows)
+        return text
+
+    def Write(self, _folder):
+        """
+        Writes the statistics to _folder, as csnakeFileSystemStats.json (all of them) and csnakeFileSystemStats.txt
+        (see GetSummary). Returns the summary. The files are written while the calls are not counted.
+        """
+        enabled = self.__enabled
+        self.Disable()
+        try:
+            if not os.path.exists(_folder):
+                os.makedirs(_folder)
+            summary = self.GetSummary()
+            f = open("%s/csnakeFileSystemStats.json" % _folder, "w")
+            try:
+                f.write(json.dumps(self.Dump(), sort_keys = True, indent = 2))
+            finally:
+                f.close()
+            f = open("%s/csnakeFileSystemStats.txt" % _folder, "w")
+            try:
+                f.write(summary)
+            finally:
+                f.close()
+        finally:
+            if enabled:
+                self.Enable()
+        return summary
+
+fileSystemStats = FileSystemStats()
@@ -334,6 +334,7 @@ class CSnakeGUIApp(wx.App):
         self.binder.AddDropDownList("cmbBuildType", valueListFunctor = self.GetBuildTypeComboBoxItems, buddyClass = "context", buddyField = "_ContextData__configurationName")
         self.binder.AddListBox("lbxRootFolders", buddyClass = "context", buddyField = "_ContextData__rootFolders", isFilename = True)
         self.binder.AddCheckBox("chkAskToLaunchVisualStudio", buddyClass = "options", buddyField = "_Options__askToLaunchIDE")
+        self.binder.AddCheckBox("chkProfile", buddyClass = "options", buddyField = "_Options__profile")
         
         self.binder.AddGrid("gridThirdPartySrcAndBuildFolders", buddyClass = "context", buddyField = "_ContextData__thirdPartySrcAndBuildFolders", isFilename = True)
 
@@ -944,6 +945,7 @@ class CSnakeGUIApp(wx.App):
         self.__Report("Working, patience please...")
         
         startTime = time.time()
+        self.__guiHandler.SetProfile(self.options.GetProfile())
         
         # progress bar
         # The initial message seems to fix the window size...
@@ -991,6 +993,14 @@ class CSnakeGUIApp(wx.App):
                 self.Error(message)
                 break
             
+        if self.options.GetProfile():
+            try:
+                self.__Report(self.__guiHandler.WriteProfile())
+                self.__Report("Wrote the profile to %s/csnakeProfile.json." % self.context.GetBuildFolder())
+            except (IOError, OSError), error:
+                self.__Report("Cannot write the profile: %s" % error)
+            self.__guiHandler.SetProfile(False)
+        
         elapsedTime = time.time() - startTime
         minutes = int(elapsedTime) / 60
         seconds = elapsedTime - 60*minutes
@@ -1471,7 +1481,6 @@ class CSnakeGUIApp(wx.App):
             if self.__projectTree:
                 self.__projectTree.Destroy()
             self.__projectTreeItems = dict()
-            self.__projectTreeDependencyCache = dict()
             
             # create tree
             wxVersion = [int(number) for number in wx.__version__.split('.')]
@@ -1533,7 +1542,7 @@ class CSnakeGUIApp(wx.App):
                 # For all active projects
                 if not category in self.context.GetFilter():
                     # Activate all dependent projects
-                    self.CheckUncheckDependentItems(category, True, self.__projectTreeDependencyCache)
+                    self.CheckUncheckDependentItems(category, True)
             
             # display
             self.__projectTree.ExpandAll()
@@ -1591,13 +1600,13 @@ class CSnakeGUIApp(wx.App):
         if filterOut and not self.context.HasFilter(category):
             self.context.AddFilter(category)
             if checkDependencies:
-                self.CheckUncheckDependentItems(category, False, self.__projectTreeDependencyCache)
+                self.CheckUncheckDependentItems(category, False)
         elif not filterOut and self.context.HasFilter(category):
             self.context.RemoveFilter(category)
             if checkDependencies:
-                self.CheckUncheckDependentItems(category, True, self.__projectTreeDependencyCache)
+                self.CheckUncheckDependentItems(category, True)
                 
-    def CheckUncheckDependentItems(self, category, selected, dependenciesCache):
+    def CheckUncheckDependentItems(self, category, selected):
         if category in self.__projectTreeItems:
             catTreeItem = self.__projectTreeItems[category]
         else:
@@ -1610,7 +1619,7 @@ class CSnakeGUIApp(wx.App):
         if selected:
             # Project "catProject" recently selected: Select all projects it depends on
             # Go through all projects that "catProjects" depends on
-            for depProject in catProject.dependenciesManager.GetProjects(_recursive=True, _onlyRequiredProjects=True, _cache = dependenciesCache):
+            for depProject in catProject.dependenciesManager.GetProjects(_recursive=True, _onlyRequiredProjects=True):
                 # Get the category/-ies (~ "name") of depProject (can have several ones)
                 for depProjectCategory in depProject.categories:
                     # Is there an item in the project-tree for this project?
@@ -1624,7 +1633,7 @@ class CSnakeGUIApp(wx.App):
             for otherCategory, otherTreeItem in self.__projectTreeItems.items():
                 otherProject = otherTreeItem.GetData()
                 # Depends?
-                if catProject in otherProject.dependenciesManager.GetProjects(_recursive=True, _onlyRequiredProjects=True, _cache = dependenciesCache):
+                if otherProject.dependenciesManager.DependsOn(catProject):
                     # "project" depends on "catProject", so deselect it
                     item = self.__projectTreeItems[otherCategory]
                     self.__projectTree.CheckItem(item, False) # Uncheck it
@@ -3,10 +3,18 @@
 import csnAPIPublic # not used here, but necessary in order to keep the function GetAPI working after the rollback handler has been executed (e.g. in callback functions registered via AddPostCMakeTasks)
 import csnUtility
 import csnContext
+import csnFileSystemStats
 import csnGenerator
 import csnProject
 import csnPrebuilt
 import csnAPIImplementation
+import csnModuleTracker
+import csnProcess
+import csnProfiler
+import csnProjectCache
+import csnScheduler
+import csnThreadPool
+import csnWatcher
 import RollbackImporter
 import glob
 import json
@@ -25,6 +33,17 @@ class RootNotFound(IOError):
 class NotARoot(IOError):
     pass
 
+def UsesThirdPartyBuildFolders(_folder):
+    """
+    Returns true if the cmake files of third party folder _folder (the CMakeLists.txt and cmake files in the folder, and
+    the CMakeLists.txt files in its subfolders) use THIRDPARTY_BUILD_FOLDERS, to find the other third parties.
+    """
+    filenames = glob.glob("%s/CMakeLists.txt" % _folder) + glob.glob("%s/*.cmake" % _folder) + glob.glob("%s/*/CMakeLists.txt" % _folder)
+    for filename in filenames:
+        if "THIRDPARTY_BUILD_FOLDERS" in csnUtility.FileToString(filename):
+            return True
+    return False
+
 class RollbackHandler:
     """
     This helper class instantiates the RollbackImporter and extends the python search path 
@@ -45,12 +64,12 @@ class RollbackHandler:
             if not path in sys.path:
                 sys.path.append(path)
     
-    def TearDown(self):
+    def TearDown(self, _keep = ()):
         """
-        Execute roll back. 
+        Execute roll back. The modules in _keep stay loaded.
         """
         # roll back imported modules
-        self.rbi.rollbackImports()
+        self.rbi.rollbackImports(_keep)
 
         # undo additions to the python path
         sys.path = list(self.previousPaths)
@@ -72,18 +91,94 @@ class Handler:
         self.changeListener = ChangeListener(self)
         # listeners
         self.__listeners = []
-        # progress start and range (in case of multiple actions)
-        self.__progressStart = 0
-        self.__progressRange = 100
         self.__userCanceled = False
         # error message
         self.__errorMessage = ""
-        self.__errorFilename = "%s/errors.txt" % csnUtility.GetCSnakeUserFolder() 
+        # maximum number of jobs set by the user (overrides the number of jobs of the context)
+        self.__numberOfJobs = None
+        # store the evaluated project graph in the build folder (see SetUseProjectCache)
+        self.__useProjectCache = False
     
     def LoadContext(self, filename):
         self.SetContext(csnContext.Load(filename))
         return self.context
         
+    def SetNumberOfJobs(self, _numberOfJobs):
+        """
+        Sets the maximum number of jobs (e.g. from the command line), overriding the number of jobs of the context.
+        None restores the number of jobs of the context. See GetNumberOfJobs.
+        """
+        self.__numberOfJobs = _numberOfJobs
+        
+    def GetNumberOfJobs(self):
+        """
+        Returns the maximum number of jobs: the number of threads used to write the generated cmake files, the number
+        of third party folders that are configured at the same time, and the total number of jobs of the build tools.
+        This is the number set with SetNumberOfJobs, else the number of jobs of the context, else the number of cores.
+        """
+        if not self.__numberOfJobs is None:
+            return self.__numberOfJobs
+        if self.context and self.context.GetNumberOfJobs():
+            return self.context.GetNumberOfJobs()
+        return csnThreadPool.GetNumberOfCores()
+        
+    def SetInstallMode(self, _installMode):
+        """ Sets how InstallBinariesToBuildFolder installs the files: one of csnInstall.installModes (default: copy). """
+        self.generator.installMode = _installMode
+        
+    def SetUseProjectCache(self, _useProjectCache):
+        """
+        If _useProjectCache is true, the evaluated project graph is stored in the build folder, and loaded from there
+        (instead of running the csnake files) while the csnake files and the globbed folders do not change.
+        """
+        self.__useProjectCache = _useProjectCache
+        
+    def SetSaveBackups(self, _saveBackups):
+        """ If _saveBackups is true (the default), replaced CMakeLists.txt files are saved to CMakeLists.txt.old. """
+        self.generator.saveBackups = _saveBackups
+
+    def SetProfile(self, _profile, _profilePhases = False):
+        """
+        Starts (or stops) recording the time spent in the phases of the commands (see csnProfiler), forgetting the
+        spans recorded before. If _profilePhases, the phases are also profiled with cProfile.
+        """
+        csnProfiler.profiler.Clear()
+        if _profile:
+            csnProfiler.profiler.Enable(_profilePhases)
+        else:
+            csnProfiler.profiler.Disable()
+
+    def WriteProfile(self):
+        """
+        Writes the spans recorded since SetProfile to the build folder, as a Chrome trace (csnakeProfile.json) and a
+        summary (csnakeProfile.txt), with the cProfile statistics of the phases in the csnakeProfile folder.
+        Returns the summary.
+        """
+        return csnProfiler.profiler.Write(self.context.GetBuildFolder())
+
+    def SetFileSystemStats(self, _fileSystemStats):
+        """
+        Starts (or stops) counting the file system calls (see csnFileSystemStats), forgetting the calls counted before.
+        The calls are added up by phase and project while the profiler records spans (see SetProfile).
+        """
+        csnFileSystemStats.fileSystemStats.Clear()
+        if _fileSystemStats:
+            csnFileSystemStats.fileSystemStats.Enable()
+        else:
+            csnFileSystemStats.fileSystemStats.Disable()
+
+    def WriteFileSystemStats(self):
+        """
+        Writes the file system calls counted since SetFileSystemStats next to projectData.json (in the build folder of
+        the instance, or of the context if no instance was created), as csnakeFileSystemStats.json and
+        csnakeFileSystemStats.txt. Returns the summary.
+        """
+        folder = self.context.GetBuildFolder()
+        instance = self.cachedProjectInstance.get(self.context.GetInstance())
+        if not instance is None:
+            folder = instance.GetBuildFolder()
+        return csnFileSystemStats.fileSystemStats.Write(folder)
+        
     def SetContext(self, context):
         self.context = context
         self.context.AddListener(self.changeListener)
@@ -102,6 +197,12 @@ class Handler:
     
     def __CheckReloadChanges(self, contextA, contextB):
         """Have there been done changes to the context that justify reloading the .py files?"""
+        if contextA is None or contextB is None:
+            return True
+        return self.__GetReloadKey(contextA) != self.__GetReloadKey(contextB)
+    
+    def __GetReloadKey(self, contextData):
+        """Returns the values of the context that justify reloading the .py files when they change."""
         # changes that justify reload: src, TP-src, Compiler, Compile-Mode, csn-file
         functionsToCompare = [csnContext.ContextData.GetRootFolders,
                                 csnContext.ContextData.GetBuildFolder,
@@ -110,13 +211,7 @@ class Handler:
                                 csnContext.ContextData.GetCompilername,
                                 csnContext.ContextData.GetConfigurationName,
                                 csnContext.ContextData.GetCsnakeFile]
-        
-        if contextA is None or contextB is None:
-            return True
-        for function in functionsToCompare:
-            if function(contextA) != function(contextB):
-                return True
-        return False
+        return [function(contextData) for function in functionsToCompare]
     
     def __GetProjectModule(self, _forceReload = True):
         reloadFiles = _forceReload or self.__CheckReloadChanges(self.cachedProjectInstanceContext, self.context.GetData())
@@ -125,30 +220,111 @@ class Handler:
             # reset cached stuff
             self.cachedProjectInstanceContext = copy.deepcopy(self.context.GetData())
             self.cachedProjectInstance = dict()
-            self.DeletePycFiles()
+            # the project files will see the current state of the file system
+            csnUtility.InvalidatePathCache()
+            (projectFolder, name) = os.path.split(self.context.GetCsnakeFile())
+            (name, _) = os.path.splitext(name)
+            
+            # unload the csnake modules that changed (and the modules that refer to them), the other modules stay loaded;
+            # the projects of the kept modules refer to the context, so a different context object reloads everything
+            tracker = csnModuleTracker.tracker
+            folders = list(self.context.GetRootFolders()) + list(self.context.GetThirdPartyFolders()) + [projectFolder]
+            tracker.Prepare((self.context, self.__GetReloadKey(self.context.GetData())), folders, csnUtility.fileSystemIndex)
+            self.__logger.debug("Reloading %s csnake modules, keeping %s" % (tracker.nReloadedModules, tracker.nKeptModules))
             
             # set up roll back of imported modules
             rollbackHandler = RollbackHandler()
             rollbackHandler.SetUp(self.context.GetCsnakeFile(), self.context.GetRootFolders(), self.context.GetThirdPartyFolders())
-            (projectFolder, name) = os.path.split(self.context.GetCsnakeFile())
-            (name, _) = os.path.splitext(name)
-            
+            tracker.Begin()
+            span = csnProfiler.profiler.Begin("Load csnake modules", { "csnakeFile" : self.context.GetCsnakeFile() }, _phase = True)
             try:
                 self.cachedProjectModule = csnUtility.LoadModule(projectFolder, name)
             finally:
-                # undo additions to the python path
-                rollbackHandler.TearDown()
+                csnProfiler.profiler.End(span)
+                tracker.End()
+                # undo additions to the python path, and unload the modules that are not tracked
+                rollbackHandler.TearDown(tracker.GetTrackedModules())
             
             self.UpdateRecentlyUsedCSnakeFiles()
         return self.cachedProjectModule
     
+    def ReloadChangedFiles(self):
+        """
+        Loads the csnake files that changed (and the csnake files that use them) again, if the csnake files were loaded.
+        The project instances are created again when they are needed.
+        """
+        if not self.cachedProjectModule is None:
+            self.__GetProjectModule(_forceReload = True)
+
+    def GetWatchedFolders(self):
+        """
+        Returns the folders in which added, removed or changed files can change the project graph (the root folders,
+        third party folders and the folder of the csnake file), and the folders within them that must not be watched
+        (the build folders, in which files are generated).
+        """
+        folders = list(self.context.GetRootFolders()) + list(self.context.GetThirdPartyFolders()) + [os.path.dirname(self.context.GetCsnakeFile())]
+        excludedFolders = [self.context.GetBuildFolder()] + list(self.context.GetThirdPartyBuildFolders())
+        return (folders, excludedFolders)
+
+    def GetProjectsAffectedByChanges(self, _paths):
+        """
+        Returns the projects of the instance for which a glob (see csnProjectPaths.Manager.Glob) has a different result
+        since the project was created, after the files or folders _paths were added, removed or changed.
+        """
+        csnUtility.InvalidatePathCache()
+        result = []
+        instance = self.__GetProjectInstance()
+        for project in instance.GetProjects(_recursive = True, _filter = False, _includeSelf = True):
+            pathsManager = getattr(project, "pathsManager", None)
+            if pathsManager is None:
+                continue
+            for (pattern, globResult) in pathsManager.globs.items():
+                matches = [x for x in _paths if csnWatcher.MatchesPattern(x, pattern)]
+                if len(matches) and csnUtility.fileSystemIndex.Glob(pattern) != globResult:
+                    result.append(project)
+                    break
+        return result
+
+    def GetChangedCsnakeModules(self):
+        """ Returns the names of the loaded csnake modules that must be loaded again (see csnModuleTracker). """
+        csnUtility.InvalidatePathCache()
+        return csnModuleTracker.tracker.GetModulesToReload()
+
     def __GetProjectInstance(self, _forceReload = False):
         """ Instantiates and returns the _instance in _projectPath. """
         instanceName = self.context.GetInstance()
         reloadFiles = _forceReload or self.__CheckReloadChanges(self.cachedProjectInstanceContext, self.context.GetData())
         
         if not instanceName in self.cachedProjectInstance or reloadFiles:
+            span = csnProfiler.profiler.Begin("Create instance", { "instance" : instanceName }, _phase = True)
+            try:
+                return self.__CreateProjectInstance(instanceName, _forceReload, reloadFiles)
+            finally:
+                csnProfiler.profiler.End(span)
+        
+        return self.cachedProjectInstance[instanceName]
+
+    def __CreateProjectInstance(self, instanceName, _forceReload, reloadFiles):
+        """ Creates the instance, or loads it from the project cache (see __GetProjectInstance), and returns it. """
+        # the project graph can be taken from the cache if no csnake files were loaded yet
+        cache = None
+        if self.__useProjectCache and self.cachedProjectModule is None:
+            cache = self.__GetProjectCache(instanceName)
+            csnUtility.InvalidatePathCache()
+            instance = cache.Load(self.context, csnUtility.fileSystemIndex)
+            if not instance is None:
+                self.__logger.info("Loaded the project graph from %s" % cache.filename)
+                self.cachedProjectInstanceContext = copy.deepcopy(self.context.GetData())
+                self.cachedProjectInstance = { instanceName : instance }
+                self.UpdateRecentlyUsedCSnakeFiles()
+                return instance
+            cache.Record(csnUtility.fileSystemIndex)
+        
+        try:
             projectModule = self.__GetProjectModule(_forceReload = _forceReload)
+            # the project instance is created from the current state of the file system
+            if not reloadFiles:
+                csnUtility.InvalidatePathCache()
             exec "self.cachedProjectInstance[instanceName] = csnProject.ToProject(projectModule.%s)" % instanceName
             if isinstance(self.cachedProjectInstance[instanceName], csnAPIImplementation._APIGenericProject_Base):
                 # Unwrap it from the API
@@ -158,11 +334,34 @@ class Handler:
                 raise Exception("Instance \"%s\" is not a valid CSnake project, but rather of type \"%s\"!" %
                         (instanceName, type(self.cachedProjectInstance[instanceName]).__name__))
             relocator = csnPrebuilt.ProjectRelocator()
-            relocator.Do(self.cachedProjectInstance[instanceName], self.context.GetPrebuiltBinariesFolder())
-            self.UpdateRecentlyUsedCSnakeFiles()
+            span = csnProfiler.profiler.Begin("Relocate prebuilt binaries", { "folder" : self.context.GetPrebuiltBinariesFolder() }, _phase = True)
+            try:
+                relocator.Do(self.cachedProjectInstance[instanceName], self.context.GetPrebuiltBinariesFolder())
+            finally:
+                csnProfiler.profiler.End(span)
+        finally:
+            if not cache is None:
+                cache.StopRecording()
         
+        # the globs of the csnake files that stayed loaded were not recorded
+        if not cache is None and csnModuleTracker.tracker.nKeptModules == 0:
+            try:
+                cache.Save(self.cachedProjectInstance[instanceName], self.context)
+            except csnProjectCache.UncacheableError, e:
+                self.__logger.info("Not storing the project graph: %s" % e)
+                cache.Remove()
+        self.UpdateRecentlyUsedCSnakeFiles()
         return self.cachedProjectInstance[instanceName]
 
+    def __GetProjectCache(self, instanceName):
+        """ Returns the ProjectCache for instance instanceName in the build folder. """
+        context = self.context
+        key = [self.__GetReloadKey(context.GetData()), instanceName, context.GetPrebuiltBinariesFolder()]
+        folders = list(context.GetRootFolders()) + list(context.GetThirdPartyFolders()) + [os.path.dirname(context.GetCsnakeFile())]
+        if context.GetPrebuiltBinariesFolder() != "":
+            folders.append(context.GetPrebuiltBinariesFolder())
+        return csnProjectCache.ProjectCache(csnProjectCache.GetCacheFilename(context.GetBuildFolder()), key, folders)
+    
     def WriteDumpFileAndProjectStructureToBuildFolder(self, instance):
         """
         Writes a json file with all gathered information for instance to the build folder
@@ -177,11 +376,23 @@ class Handler:
         """ 
         Configures the project to the build folder.
         """
+        span = csnProfiler.profiler.Begin("Configure project", { "instance" : self.context.GetInstance() })
+        try:
+            return self.__ConfigureProjectToBuildFolder(_alsoRunCMake, _askUser)
+        finally:
+            csnProfiler.profiler.End(span)
+
+    def __ConfigureProjectToBuildFolder(self, _alsoRunCMake, _askUser):
         instance = self.__GetProjectInstance()
         
         instance.installManager.ResolvePathsOfFilesToInstall()
+        self.generator.numberOfJobs = self.GetNumberOfJobs()
         self.generator.Generate(instance)
-        self.WriteDumpFileAndProjectStructureToBuildFolder(instance)
+        span = csnProfiler.profiler.Begin("Write project data", _phase = True)
+        try:
+            self.WriteDumpFileAndProjectStructureToBuildFolder(instance)
+        finally:
+            csnProfiler.profiler.End(span)
 
         if _alsoRunCMake:
             # check if CMake is present
@@ -207,7 +418,17 @@ class Handler:
         return True
             
     def InstallBinariesToBuildFolder(self):
-        return self.generator.InstallBinariesToBuildFolder(self.__GetProjectInstance())
+        self.generator.numberOfJobs = self.GetNumberOfJobs()
+        instance = self.__GetProjectInstance()
+        span = csnProfiler.profiler.Begin("Install files", { "instance" : instance.name }, _phase = True)
+        try:
+            return self.generator.InstallBinariesToBuildFolder(instance)
+        finally:
+            csnProfiler.profiler.End(span)
+             
+    def GetInstallManager(self):
+        """ Returns the install manager of the project instance (see InstallBinariesToBuildFolder). """
+        return self.__GetProjectInstance().installManager
              
     def CMakeIsFound(self):
         """ Check if Cmake is present by launching it. """
@@ -225,26 +446,67 @@ class Handler:
         if not os.path.exists( self.context.GetCmakePath() ):
             raise Exception( "Please provide a valid CMake path." )
     
+    def GetThirdPartyDependencies(self):
+        """
+        Returns a dictionary from the index of each third party folder to the indices of the third party folders that
+        must be configured before it. The dependencies are taken from the context (see Context.GetThirdPartyDependencies).
+        If they are not declared for a folder, and its cmake files use THIRDPARTY_BUILD_FOLDERS, the folder depends on
+        all folders before it (as when configuring the folders one by one); otherwise it does not depend on any folder.
+        """
+        folders = self.context.GetThirdPartyFolders()
+        declared = self.context.GetThirdPartyDependencies()
+        result = dict()
+        for index in range(len(folders)):
+            if folders[index] in declared:
+                result[index] = [folders.index(x) for x in declared[folders[index]] if x in folders]
+            elif UsesThirdPartyBuildFolders(folders[index]):
+                result[index] = range(index)
+            else:
+                result[index] = []
+        return result
+        
     def ConfigureThirdPartyFolders(self):
         """ 
-        Runs cmake to install the libraries in the third party folder.
-        By default, the third party folder is configured twice because this works around
-        some problems with incomplete configurations.
+        Runs cmake to install the libraries in the third party folders.
+        Folders that do not depend on each other (see GetThirdPartyDependencies) are configured at the same time
+        (at most GetNumberOfJobs()). A folder is not configured if a folder it depends on failed.
+        The error message (see GetErrorMessage) lists the errors of each folder separately.
         """
-        result = True
         nTP = self.context.GetNumberOfThirdPartyFolders()
+        allBuildFolders = self.context.GetThirdPartyBuildFoldersComplete()
+        # check if CMake is present
+        self.CheckCMake()
+        # reset errors
+        self.__ResetCancel()
+        self.__SetErrorMessage("")
         
-        # set the progress range
-        self.__progressRange = 100 / nTP
-        # Configure third parties
-        for index in range(0, nTP ):
-            result = self.ConfigureThirdPartyFolder( self.context.GetThirdPartyFolder( index ), self.context.GetThirdPartyBuildFolderByIndex( index ), allBuildFolders = self.context.GetThirdPartyBuildFoldersComplete() )
-            self.__progressStart += self.__progressRange
-        # reset the progress range
-        self.__progressStart = 0
-        self.__progressRange = 100
+        # the progress is the average of the progress of the folders
+        progress = [0] * nTP
+        def OnProgress(index, folderProgress):
+            progress[index] = folderProgress
+            self.__NotifyListeners(ProgressEvent(self, sum(progress) / nTP))
         
-        return result
+        errorMessages = dict()
+        def Configure(index, postProgress):
+            (result, errorMessages[index]) = self.__ConfigureThirdPartyFolder(self.context.GetThirdPartyFolder(index), 
+                self.context.GetThirdPartyBuildFolderByIndex(index), allBuildFolders, postProgress)
+            postProgress(100)
+            return result
+        
+        scheduler = csnScheduler.Scheduler(self.GetNumberOfJobs())
+        results = scheduler.Run(range(nTP), self.GetThirdPartyDependencies(), Configure, OnProgress, self.IsCanceled)
+        
+        # report the errors of each folder
+        message = ""
+        for index in range(nTP):
+            folderMessage = errorMessages.get(index, "")
+            if results[index] is None and not self.IsCanceled():
+                folderMessage = "Not configured, because a third party folder it depends on failed."
+            if folderMessage != "":
+                message += "Third party folder %s:\n%s\n" % (self.context.GetThirdPartyFolder(index), folderMessage)
+        self.__SetErrorMessage(message)
+        
+        return len([x for x in results.values() if not x]) == 0
 
     def ConfigureThirdPartyFolder(self, source, build, allBuildFolders):
         """ 
@@ -253,11 +515,23 @@ class Handler:
         @param build: The build folder.
         @param allBuildFolders: Root of the build folder.
         """
-        # create the build folder if it doesn't exist
-        os.path.exists(build) or os.makedirs(build)
-        
         # check if CMake is present
         self.CheckCMake()
+        # reset errors
+        self.__ResetCancel()
+        self.__SetErrorMessage("")
+        
+        (result, message) = self.__ConfigureThirdPartyFolder(source, build, allBuildFolders)
+        self.__SetErrorMessage(message)
+        return result
+        
+    def __ConfigureThirdPartyFolder(self, source, build, allBuildFolders, postProgress = None):
+        """ 
+        Runs cmake in a third party build folder (see ConfigureThirdPartyFolder). Returns the result and the error message.
+        @param postProgress: Function that is called with the progress (the listeners are notified by default).
+        """
+        # create the build folder if it doesn't exist
+        os.path.exists(build) or os.makedirs(build)
         
         cmakeModulePath = ""
         for buildFolder in allBuildFolders:
@@ -269,31 +543,8 @@ class Handler:
                   self.context.GetCompiler().GetThirdPartyCMakeParameters() + \
                   [source]
         
-        return self.__ConfigureThirdParty(argList, build) 
-
-    def DeletePycFiles(self):
-        """
-        Tries to delete all pyc files from _projectPath, _rootFolders and thirdPartyFolders.
-        However, __init__.pyc files are not removed.
-        """
-        # determine list of folders to search for pyc files
-        folderList = []
-        if self.context:
-            folderList.extend(self.context.GetThirdPartyFolders())
-            folderList.extend(self.context.GetRootFolders())
-
-        # remove pyc files
-        while len(folderList) > 0:
-            newFolders = []
-            for folder in folderList:
-                pycFiles = [csnUtility.NormalizePath(x) for x in glob.glob("%s/*.pyc" % folder)]
-                for pycFile in pycFiles:
-                    if not os.path.basename(pycFile) == "__init__.pyc":
-                        os.remove(pycFile)
+        return self.__ConfigureThirdParty(argList, build, postProgress)
 
-                newFolders.extend( [csnUtility.NormalizePath(os.path.dirname(x)) for x in glob.glob("%s/*/__init__.py" % folder)] )
-            folderList = list(newFolders)
-        
     def GetListOfPossibleTargets(self):
         """
         Returns a list of possible targets which are defined in CSnake file _projectPath.
@@ -366,28 +617,126 @@ class Handler:
             folder = csnUtility.NormalizePath(os.path.split(folder)[0])
         return result
 
+    def GetBuildSlots(self, dependencies):
+        """
+        Returns the number of solutions that are built at the same time and the number of jobs of the build tool for
+        each solution, such that the total number of jobs is at most GetNumberOfJobs().
+        The number of solutions is limited to the largest number of solutions that can be built at the same time
+        according to dependencies (a dictionary from a solution to the solutions that must be built before it).
+        """
+        numberOfJobs = max(1, self.GetNumberOfJobs())
+        # group the solutions by their depth in the dependency graph, the solutions of a group can be built at the same time
+        depth = dict()
+        def GetDepth(solution, visiting):
+            if not solution in depth:
+                depth[solution] = 0
+                for dependency in dependencies.get(solution, []):
+                    if dependency in dependencies and not dependency in visiting:
+                        depth[solution] = max(depth[solution], GetDepth(dependency, visiting + [solution]) + 1)
+            return depth[solution]
+        width = dict()
+        for solution in dependencies.keys():
+            level = GetDepth(solution, [])
+            width[level] = width.get(level, 0) + 1
+        nSlots = min(numberOfJobs, max(width.values() or [1]))
+        return (nSlots, max(1, numberOfJobs / nSlots))
+        
     def BuildMultiple(self, solutionNames, buildMode, isThirdParty):
-        # result flag
-        result = True
-        # set the progress range
-        self.__progressRange = 100 / len(solutionNames)
-        # build the solutions
-        for solutionName in solutionNames:
-            result = result and self.Build(solutionName, buildMode, isThirdParty)
-            self.__progressStart += self.__progressRange
-        # reset the progress start and range
-        self.__progressStart = 0
-        self.__progressRange = 100
+        """
+        Builds the solutions in solutionNames. For third party solutions (one for each third party folder), the
+        solutions that do not depend on each other (see GetThirdPartyDependencies) are built at the same time, dividing
+        the jobs (see GetNumberOfJobs) over them (see GetBuildSlots). Other solutions are built one after another.
+        A solution is not built if a solution it depends on failed.
+        The output of the build tool for each solution is written to a log file in the CSnake user folder (and also to
+        the console when the solutions are built one after another).
+        The error message (see GetErrorMessage) lists the errors of each solution separately.
+        """
+        nSolutions = len(solutionNames)
+        # reset errors
+        self.__ResetCancel()
+        self.__SetErrorMessage("")
         
-        return result
+        # dependencies between the solutions
+        if isThirdParty and nSolutions == self.context.GetNumberOfThirdPartyFolders():
+            dependencies = self.GetThirdPartyDependencies()
+        else:
+            dependencies = dict()
+            for index in range(nSolutions):
+                dependencies[index] = range(index)
+        (nSlots, numberOfJobs) = self.GetBuildSlots(dependencies)
+        nProjects = self.__GetNumberOfProjectsToBuild()
+        
+        # the progress is the average of the progress of the solutions
+        progress = [0] * nSolutions
+        def OnProgress(index, solutionProgress):
+            progress[index] = solutionProgress
+            self.__NotifyListeners(ProgressEvent(self, sum(progress) / nSolutions))
+        
+        errorMessages = dict()
+        def BuildSolution(index, postProgress):
+            logFilename = "%s/buildLog%s.txt" % (csnUtility.GetCSnakeUserFolder(), index)
+            self.__logger.info("Writing the output of building '%s' to: %s" % (solutionNames[index], logFilename))
+            logFile = open(logFilename, 'w')
+            try:
+                def Output(line, isError):
+                    logFile.write(line)
+                    if nSlots == 1:
+                        self.__ConsoleOutput(line, isError)
+                (result, errorMessages[index]) = self.__Build(solutionNames[index], buildMode, isThirdParty, 
+                    numberOfJobs, nProjects, Output, postProgress, "the build log (%s)" % logFilename)
+            finally:
+                logFile.close()
+            postProgress(100)
+            return result
+        
+        scheduler = csnScheduler.Scheduler(nSlots)
+        results = scheduler.Run(range(nSolutions), dependencies, BuildSolution, OnProgress, self.IsCanceled)
+        
+        # report the errors of each solution
+        message = ""
+        for index in range(nSolutions):
+            solutionMessage = errorMessages.get(index, "")
+            if results[index] is None and not self.IsCanceled():
+                solutionMessage = "Not built, because a solution it depends on failed."
+            if solutionMessage != "":
+                message += "Solution %s:\n%s\n" % (solutionNames[index], solutionMessage)
+        self.__SetErrorMessage(message)
+        
+        return len([x for x in results.values() if not x]) == 0
 
     def Build(self, solutionName, buildMode, isThirdParty):
+        """ Builds the solution solutionName, with at most GetNumberOfJobs() jobs. Returns True if success. """
+        # reset errors
+        self.__ResetCancel()
+        self.__SetErrorMessage("")
+        
+        postProgress = lambda progress: self.__NotifyListeners(ProgressEvent(self, progress))
+        (result, message) = self.__Build(solutionName, buildMode, isThirdParty, self.GetNumberOfJobs(), 
+            self.__GetNumberOfProjectsToBuild(), self.__ConsoleOutput, postProgress)
+        self.__SetErrorMessage(message)
+        postProgress(100)
+        return result
+        
+    def __GetNumberOfProjectsToBuild(self):
+        """ Returns the number of projects of the instance, used for the progress of Visual Studio (0 for other compilers). """
+        if not self.context.GetCompilername().startswith("Visual Studio"):
+            return 0
+        instance = self.__GetProjectInstance()
+        return len(instance.dependenciesManager.GetProjects(_recursive = True))
+
+    def __Build(self, solutionName, buildMode, isThirdParty, numberOfJobs, nProjects, output, postProgress, details = None):
+        """ 
+        Builds a solution (see Build). Returns the result and the error message.
+        @param numberOfJobs: Maximum number of jobs of the build tool.
+        @param nProjects: Number of projects (see __GetNumberOfProjectsToBuild).
+        @param output, postProgress, details: See __RunProcess.
+        """
         # result flag
         result = True
+        message = ""
 
         # first progress
-        progress = self.__progressStart
-        self.__NotifyListeners(ProgressEvent(self,progress))
+        postProgress(0)
 
         # visual studio case
         if self.context.GetCompilername().startswith("Visual Studio"):
@@ -404,17 +753,14 @@ class Handler:
             if not os.path.exists(pathIDE):
                 raise Exception( "Please provide a valid Visual Studio path" )
             
-            instance = self.__GetProjectInstance()
-            nProjects = len(instance.dependenciesManager.GetProjects(_recursive = True))
-            
             # build in debug
             self.__logger.info("Building '%s' in debug mode [visual studio]." % solutionName)
-            result = result and self.__BuildVisualStudio(pathIDE, solutionName, "debug", nProjects)
-            if not result: return False
+            (result, message) = self.__BuildVisualStudio(pathIDE, solutionName, "debug", nProjects, output, postProgress, details)
+            if not result: return (False, message)
             # build in release
             self.__logger.info("Building '%s' in release mode [visual studio]." % solutionName)
-            result = result and self.__BuildVisualStudio(pathIDE, solutionName, "release", nProjects)
-            if not result: return False
+            (result, message) = self.__BuildVisualStudio(pathIDE, solutionName, "release", nProjects, output, postProgress, details)
+            if not result: return (False, message)
         
         elif self.context.GetCompilername().startswith("Unix") or \
              self.context.GetCompilername().startswith("KDevelop3") :
@@ -426,12 +772,9 @@ class Handler:
                 buildPath = "%s/%s" % (buildPath, buildMode)
             # build
             self.__logger.info("Building '%s' [make]." % buildPath)
-            result = result and self.__BuildMake(buildPath)
+            (result, message) = self.__BuildMake(buildPath, numberOfJobs, output, postProgress, details)
             
-        # last progress
-        self.__NotifyListeners(ProgressEvent(self,self.__progressRange))
-
-        return result
+        return (result, message)
 
     def SetContextModified(self, modified):
         self.contextModified = modified
@@ -463,42 +806,45 @@ class Handler:
     def GetErrorMessage(self):
         return self.__errorMessage
     
-    def __ConfigureThirdParty(self, argList, workingDir):
-        """ Run cmake on a third party. Returns True is success. """
+    def __ConsoleOutput(self, line, isError):
+        """ Writes an output line of a process to the console. """
+        if isError:
+            sys.stderr.write(line)
+        else:
+            sys.stdout.write(line)
+    
+    def __RunProcess(self, argList, workingDir, matcher, output, postProgress, details = None):
+        """ 
+        Runs cmake or a build tool. The process is killed when the handler is canceled.
+        Returns True is success, and the error message.
+        @param matcher: csnProcess.ProgressMatcher for the output lines.
+        @param output: Function that is called with each output line, and True for the lines of the error stream.
+        @param postProgress: Function that is called with the progress.
+        @param details: Where the user can find the complete output (the console by default).
+        """
+        runner = csnProcess.ProcessRunner(argList, workingDir, [matcher], postProgress, 
+            lambda line: output(line, False), lambda line: output(line, True), self.IsCanceled)
+        name = os.path.splitext(os.path.basename(argList[0]))[0]
+        span = csnProfiler.profiler.Begin("Run %s" % name, { "command" : " ".join(argList), "workingDir" : workingDir })
+        try:
+            res = (runner.Run() == 0)
+        finally:
+            csnProfiler.profiler.End(span)
+        if runner.IsCanceled():
+            return (False, "")
+        return (res, self.__GetErrorMessageFromLines(runner.GetErrors(), runner.GetNumberOfErrorLines(), details))
+    
+    def __ConfigureThirdParty(self, argList, workingDir, postProgress = None):
+        """ Run cmake on a third party. Returns True is success, and the error message. """
+        if postProgress is None:
+            postProgress = lambda progress: self.__NotifyListeners(ProgressEvent(self, progress))
         # log
         self.__logger.info("Running cmake in: %s" % workingDir)
-        # reset errors
-        self.__ResetCancel()
-        self.__SetErrorMessage("")
-        # run process
-        errorFile = open(self.__errorFilename, 'w')
-        sub = subprocess.Popen(argList, cwd=workingDir, stdout=subprocess.PIPE, stderr=errorFile)
-        # catch lines to indicate progress (has to be bellow Popen)
-        count = 0
+        # progress: looks like '-- Parsing ...'
         tpFolder = argList[len(argList)-1]
         dirs = [d for d in os.listdir(tpFolder) if os.path.isdir(os.path.join(tpFolder, d))]
-        nProjects = len(dirs)
-        while True:
-            line = sub.stdout.readline()
-            if not line: 
-                break
-            sys.stdout.write(line)
-            # progress: looks like '-- Processing ...'
-            str = line[0:11].strip()
-            if str == "-- Parsing":
-                progress = count*100/nProjects
-                if progress >= 100: progress = 99
-                self.__NotifyListeners(ProgressEvent(self,progress))
-                if self.IsCanceled(): return False
-                count += 1
-        # wait till the process finishes
-        res = (sub.wait() == 0)
-        errorFile.close()
-        # process error file
-        if( os.path.getsize(self.__errorFilename) != 0 ):
-            self.__ProcessErrorFile()
-        # return result
-        return res
+        matcher = csnProcess.CountMatcher("-- Parsing", len(dirs))
+        return self.__RunProcess(argList, workingDir, matcher, self.__ConsoleOutput, postProgress)
     
     def __ConfigureProject(self, argList, workingDir, nProjects):
         """ Run cmake on a project. Returns True is success. """
@@ -507,125 +853,46 @@ class Handler:
         # reset errors
         self.__ResetCancel()
         self.__SetErrorMessage("")
-        # run process
-        errorFile = open(self.__errorFilename, 'w')
-        sub = subprocess.Popen(argList, cwd=workingDir, stdout=subprocess.PIPE, stderr=errorFile)
-        # catch lines to indicate progress (has to be bellow Popen)
-        count = 0
-        while True:
-            line = sub.stdout.readline()
-            if not line:
-                break
-            sys.stdout.write(line)
-            # progress: looks like '-- Processing ...'
-            str = line[0:13].strip()
-            if str == "-- Processing":
-                progress = count*100/nProjects
-                if progress >= 100: progress = 99
-                self.__NotifyListeners(ProgressEvent(self,progress))
-                if self.IsCanceled(): return False
-                count += 1
-        # wait till the process finishes
-        res = (sub.wait() == 0)
-        errorFile.close()
-        # process error file
-        if( os.path.getsize(self.__errorFilename) != 0 ):
-            self.__ProcessErrorFile()
-        # return result
+        # progress: looks like '-- Processing ...'
+        matcher = csnProcess.CountMatcher("-- Processing", nProjects)
+        postProgress = lambda progress: self.__NotifyListeners(ProgressEvent(self, progress))
+        (res, message) = self.__RunProcess(argList, workingDir, matcher, self.__ConsoleOutput, postProgress)
+        self.__SetErrorMessage(message)
         return res
     
-    def __BuildVisualStudio(self, pathIDE, solution, buildMode, nProjects):
-        """ Build using the Visual Studio Compiler. Returns True is success. """
+    def __BuildVisualStudio(self, pathIDE, solution, buildMode, nProjects, output, postProgress, details = None):
+        """ Build using the Visual Studio Compiler. Returns True is success, and the error message. """
         # log
         self.__logger.info("Running vc for: %s" % solution)
-        # reset errors
-        self.__ResetCancel()
-        self.__SetErrorMessage("")
         # arguments
         argList = [pathIDE, solution, "/build", buildMode ]
-        # run process
-        errorFile = open(self.__errorFilename, 'w')
-        sub = subprocess.Popen(argList, stdout=subprocess.PIPE, stderr=errorFile)
-        # catch lines to indicate progress (has to be bellow Popen)
-        count = 0
-        while True:
-            line = sub.stdout.readline()
-            if not line:
-                break
-            sys.stdout.write(line)
-            # progress: looks like '#>Build log was saved'
-            str = line[1:11].strip()
-            if str == ">Build log":
-                progress = count*100/nProjects
-                if progress >= 100: progress = 99
-                self.__NotifyListeners(ProgressEvent(self,progress))
-                if self.IsCanceled(): return False
-                count += 1
-        # wait till the process finishes
-        res = (sub.wait() == 0)
-        errorFile.close()
-        # process error file
-        if( os.path.getsize(self.__errorFilename) != 0 ):
-            self.__ProcessErrorFile()
-        # return result
-        return res
+        # progress: looks like '#>Build log was saved'
+        matcher = csnProcess.CountMatcher(r"\d+>Build log", nProjects)
+        return self.__RunProcess(argList, None, matcher, output, postProgress, details)
     
-    def __BuildMake(self, buildPath):
-        """ Build using Make. Returns True is success. """
+    def __BuildMake(self, buildPath, numberOfJobs, output, postProgress, details = None):
+        """ Build using Make, with at most numberOfJobs jobs. Returns True is success, and the error message. """
         # log
         self.__logger.info("Running make in: %s" % buildPath)
-        # reset errors
-        self.__ResetCancel()
-        self.__SetErrorMessage("")
         # arguments
-        argList = ["make", "-s"]
-        # run process
-        errorFile = open(self.__errorFilename, 'w')
-        sub = subprocess.Popen(argList, cwd=buildPath, stdout=subprocess.PIPE, stderr=errorFile)
-        # catch lines to indicate progress (has to be bellow Popen)
-        while True:
-            line = sub.stdout.readline()
-            if not line: 
-                break
-            sys.stdout.write(line)
-            # progress: looks like '[ 10%] ...'
-            str = line[1:4].strip()
-            if str.isdigit():
-                progress = self.__progressStart + int(str)*self.__progressRange/100
-                if progress >= 100: progress = 99
-                self.__NotifyListeners(ProgressEvent(self, progress))
-                if self.IsCanceled(): return False
-        # wait till the process finishes
-        res = (sub.wait() == 0)
-        errorFile.close()
-        # process error file
-        if( os.path.getsize(self.__errorFilename) != 0 ):
-            self.__ProcessErrorFile()
-        # return result
-        return res
+        argList = ["make", "-s", "-j%s" % numberOfJobs]
+        # progress: looks like '[ 10%] ...'
+        return self.__RunProcess(argList, buildPath, csnProcess.PercentMatcher(), output, postProgress, details)
     
-    def __ProcessErrorFile(self):
-        """ Process an error stream. """
+    def __GetErrorMessageFromLines(self, errorLines, nLines, details = None):
+        """ 
+        Returns the error message for the user from the (last) lines of an error stream.
+        @param nLines: Number of lines of the error stream (errorLines may only have the last lines).
+        @param details: Where the user can find the complete error stream (the console by default).
+        """
         limit = 10
-        # error lines
-        errorFile = open(self.__errorFilename, 'r')
-        errorLines = errorFile.readlines()
-        nLines = len(errorLines)
-        # output all to console
-        for line in errorLines:
-            sys.stderr.write(line)
+        if details is None:
+            details = "the console output"
         # error message, limit if too big
-        iMax = nLines
-        if nLines >= limit:
-            iMax = limit
-        message = ""
-        for i in range(0,iMax):
-            message += errorLines[i]
+        message = "".join(errorLines[0:limit])
         # if too long, tell the user
-        if nLines >= limit:
+        if nLines > limit:
             message += "\n... and more ..."
-            message += "\nSee error log (%s) for full details." % self.__errorFilename
-        # save message    
-        self.__SetErrorMessage(message)
-        # close
-        errorFile.close()
+            message += "\nSee %s for full details." % details
+
+        return message
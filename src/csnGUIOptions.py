@@ -14,6 +14,7 @@ class Options:
         # options
         self.__contextFilename = ""
         self.__askToLaunchIDE = False
+        self.__profile = False
         self.__recentContextPaths = []
         # listeners
         self.__listeners = []
@@ -31,6 +32,10 @@ class Options:
     def GetAskToLaunchIDE(self):
         return self.__askToLaunchIDE
 
+    def GetProfile(self):
+        """ True if the time spent in the phases of the actions is written to the build folder (see csnProfiler). """
+        return self.__profile
+
     def GetRecentContextPathLength(self):
         """ Get the length of the recent context path array. """
         return len(self.__recentContextPaths)
@@ -94,6 +99,9 @@ class Options:
             path = parser.get(mainSection, "recentcontext%s" % count)
             self.__recentContextPaths.insert( count, path)
             count += 1
+        # profile (optional)
+        if parser.has_option(mainSection, "profile"):
+            self.__profile = parser.get(mainSection, "profile") == str(True)
 
     def __Read10(self, parser):
         """ Read options file version 1.0. """ 
@@ -117,6 +125,7 @@ class Options:
         parser.add_section(section)
         parser.set(section, "contextFilename", self.__contextFilename)
         parser.set(section, "askToLaunchIDE", self.__askToLaunchIDE)
+        parser.set(section, "profile", self.__profile)
         parser.set(section, "version", latestFileFormatVersion)
         for index in range( len(self.__recentContextPaths) ):
             parser.set(section, "recentcontext%s" % index, self.__recentContextPaths[index]) 
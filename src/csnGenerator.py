@@ -7,6 +7,11 @@ import warnings
 import sys
 import types
 import OrderedSet
+import csnManifest
+import csnThreadPool
+import csnDigestIndex
+import csnProfiler
+import logging
 from about import About
 from csnListener import ProgressListener
 import csnVersion
@@ -117,25 +122,56 @@ class Generator:
     def __init__(self):
         # listeners
         self.__listeners = []
+        # fingerprints of the generated projects (see Generate)
+        self.__manifest = None
+        # files to write, collected while planning the generation (see Generate)
+        self.__documents = []
+        # maximum number of threads used to write the generated files
+        self.numberOfJobs = csnThreadPool.GetNumberOfCores()
+        # if true, a replaced CMakeLists.txt is saved to CMakeLists.txt.old
+        self.saveBackups = True
+        # how InstallBinariesToBuildFolder installs the files (see csnInstall.installModes)
+        self.installMode = "copy"
+        # number of projects of which the cmake files were (re)generated, resp. found up-to-date, in the last call to Generate
+        self.nRegeneratedProjects = 0
+        self.nSkippedProjects = 0
+        self.__logger = logging.getLogger("CSnake")
         
-    def Generate(self, _targetProject, _generatedList = None):
+    def Generate(self, _targetProject, _generatedList = None, _generatedNames = None):
         """
         Generates the CMakeLists.txt for _targetProject (a csnBuild.Project) in the build folder.
-        _generatedList -- List of projects for which Generate was already called (internal to the function).
+        Generation has two phases: the recursion over the projects (in this thread) plans the generation and creates 
+        the text of all files, then the top level call writes the files using self.numberOfJobs threads.
+        The fingerprints of the inputs of the generated files are stored in a manifest in the build folder. Projects
+        of which the fingerprint did not change since the last generation (and of which the files still exist) are skipped.
+        _generatedList -- Set of projects for which Generate was already called (internal to the function).
+        _generatedNames -- Dictionary from project name to project, for the projects in _generatedList (internal to the function).
         """
+        span = csnProfiler.profiler.Begin("Generate", { "project" : _targetProject.name }, _phase = True)
+        try:
+            self.__Generate(_targetProject, _generatedList, _generatedNames)
+        finally:
+            csnProfiler.profiler.End(span)
 
+    def __Generate(self, _targetProject, _generatedList, _generatedNames):
         _targetProject.dependenciesManager.isTopLevel = _generatedList is None
         if _targetProject.dependenciesManager.isTopLevel:
             _targetProject.installManager.ResolvePathsOfFilesToInstall()
-            _generatedList = []
+            _generatedList = OrderedSet.OrderedSet()
+            _generatedNames = dict()
+            self.__manifest = csnManifest.Manifest(self.GetManifestFilename(_targetProject), versionString)
+            self.__documents = []
+            self.nRegeneratedProjects = 0
+            self.nSkippedProjects = 0
 
         # Trying to Generate a project twice indicates a logical error in the code        
         assert not _targetProject in _generatedList, "\n\nError: Trying to Generate a project twice. Target project name = %s" % (_targetProject.name)
 
-        for generatedProject in _generatedList:
-            if generatedProject.name == _targetProject.name:
-                raise NameError, "Each project must have a unique name. Conflicting projects are %s (in folder %s) and %s (in folder %s)\n" % (_targetProject.name, _targetProject.GetSourceRootFolder(), generatedProject.name, generatedProject.GetSourceRootFolder())
-        _generatedList.append(_targetProject)
+        if _targetProject.name in _generatedNames:
+            generatedProject = _generatedNames[_targetProject.name]
+            raise NameError, "Each project must have a unique name. Conflicting projects are %s (in folder %s) and %s (in folder %s)\n" % (_targetProject.name, _targetProject.GetSourceRootFolder(), generatedProject.name, generatedProject.GetSourceRootFolder())
+        _generatedList.add(_targetProject)
+        _generatedNames[_targetProject.name] = _targetProject
         
         # check for backward slashes
         if csnUtility.HasBackSlash(_targetProject.context.GetBuildFolder()):
@@ -149,29 +185,23 @@ class Generator:
         # create build folder
         os.path.exists(_targetProject.GetBuildFolder()) or os.makedirs(_targetProject.GetBuildFolder())
     
-        # create Win32Header
-        if _targetProject.type != "executable" and _targetProject.GetCompileManager().generateWin32Header:
-            _targetProject.GetCompileManager().GenerateWin32Header()
-            # add search path to the generated win32 header
+        # add search path to the Win32Header (that is generated together with the cmake files)
+        generateWin32Header = _targetProject.type != "executable" and _targetProject.GetCompileManager().generateWin32Header
+        if generateWin32Header:
             if not _targetProject.GetBuildFolder() in _targetProject.GetCompileManager().public.includeFolders:
                 _targetProject.GetCompileManager().public.includeFolders.append(_targetProject.GetBuildFolder())
         
         _targetProject.RunCustomCommands()
 
         # Find projects that must be generated. A separate list is used to ease debugging.
+        # Determine if we must Generate the project. If a required project will generate it, 
+        # then leave it to the required project. This will prevent multiple generation of the same project.
+        # If a non-required project will generate it, then still generate the project 
+        # (the non-required project may depend on target project to generate project, creating a race condition).
         projectsToGenerate = OrderedSet.OrderedSet()
         requiredProjects = _targetProject.GetProjects(_recursive = 1, _onlyRequiredProjects = 1)        
-        for projectToGenerate in requiredProjects:
-            # determine if we must Generate the project. If a required project will generate it, 
-            # then leave it to the required project. This will prevent multiple generation of the same project.
-            # If a non-required project will generate it, then still generate the project 
-            # (the non-required project may depend on target project to generate project, creating a race condition).
-            generateProject = not projectToGenerate in _generatedList and projectToGenerate.type in ("dll", "executable", "library")
-            if generateProject:
-                for requiredProject in _targetProject.GetProjects(_recursive = 0, _onlyRequiredProjects = 1):
-                    if requiredProject.dependenciesManager.DependsOn(projectToGenerate):
-                        generateProject = 0
-            if generateProject:
+        for projectToGenerate in _targetProject.dependenciesManager.GetSubProjectsToGenerate():
+            if not projectToGenerate in _generatedList and projectToGenerate.type in ("dll", "executable", "library"):
                 projectsToGenerate.add(projectToGenerate)
         
         # add non-required projects that have not yet been generated to projectsToGenerate
@@ -184,15 +214,55 @@ class Generator:
         for project in projectsToGenerate:
             # check again if a previous iteration of this loop didn't add project to the generated list
             if not project in _generatedList:
-                self.Generate(project, _generatedList)
+                self.Generate(project, _generatedList, _generatedNames)
                 generatedProjects.append(project)
            
-        # write cmake files
-        writer = csnCMake.Writer(_targetProject)
-        writer.GenerateConfigFile( _public = 0)
-        writer.GenerateConfigFile( _public = 1)
-        writer.GenerateUseFile()
-        writer.GenerateCMakeLists(generatedProjects, requiredProjects, _writeInstallCommands = _targetProject.dependenciesManager.isTopLevel)
+        # create cmake files (and the Win32Header), unless they are up-to-date
+        writer = csnCMake.Writer(_targetProject, _saveBackup = self.saveBackups)
+        writeInstallCommands = _targetProject.dependenciesManager.isTopLevel
+        fingerprint = writer.GetFingerprint(generatedProjects, requiredProjects, _writeInstallCommands = writeInstallCommands)
+        generatedFiles = writer.GetGeneratedFilenames()
+        if generateWin32Header:
+            generatedFiles.append(_targetProject.GetCompileManager().GetWin32HeaderFilename())
+        upToDate = self.__manifest.IsUpToDate(_targetProject.name, fingerprint)
+        for generatedFile in generatedFiles:
+            upToDate = upToDate and os.path.exists(generatedFile)
+        if upToDate:
+            writer.AddGeneratedSources()
+            self.nSkippedProjects += 1
+        else:
+            if generateWin32Header:
+                writer.GenerateWin32Header()
+            writer.GenerateConfigFile( _public = 0)
+            writer.GenerateConfigFile( _public = 1)
+            writer.GenerateUseFile()
+            writer.GenerateCMakeLists(generatedProjects, requiredProjects, _writeInstallCommands = writeInstallCommands)
+            self.__documents.extend(writer.documents)
+            self.nRegeneratedProjects += 1
+        self.__manifest.Update(_targetProject.name, fingerprint)
+        
+        if _targetProject.dependenciesManager.isTopLevel:
+            # write the files; if a file was generated more than once (e.g. the public and private config files
+            # of a container are the same file), only the last version is written, as when writing them one by one
+            documents = []
+            lastDocuments = dict((document.filename, document) for document in self.__documents)
+            for document in self.__documents:
+                if lastDocuments[document.filename] is document:
+                    documents.append(document)
+            self.__documents = []
+            span = csnProfiler.profiler.Begin("Write cmake files", { "files" : len(documents) })
+            try:
+                digestIndex = csnDigestIndex.DigestIndex(csnDigestIndex.GetIndexFilename(_targetProject.context.GetBuildFolder()))
+                csnThreadPool.ThreadPool(self.numberOfJobs).Map(lambda document: document.Write(digestIndex), documents)
+                digestIndex.Save()
+                self.__manifest.Save()
+            finally:
+                csnProfiler.profiler.End(span)
+            self.__logger.info("Generated cmake files: %s projects regenerated, %s projects skipped (unchanged)." % (self.nRegeneratedProjects, self.nSkippedProjects))
+
+    def GetManifestFilename(self, _targetProject):
+        """ Returns the manifest file with the fingerprints of the projects generated in the build folder of _targetProject. """
+        return "%s/csnakeGenerationManifest.json" % _targetProject.context.GetBuildFolder()
 
     def InstallBinariesToBuildFolder(self, _targetProject):
         """ 
@@ -201,16 +271,23 @@ class Generator:
         """
         progressListener = ProgressListener(self)
         _targetProject.installManager.AddListener(progressListener)
-        return _targetProject.installManager.InstallBinariesToBuildFolder()
+        return _targetProject.installManager.InstallBinariesToBuildFolder(self.installMode, self.numberOfJobs)
                         
     def PostProcess(self, _targetProject):
         """
         Apply post-processing after the CMake generation for _targetProject and all its child projects.
         """
-        for project in _targetProject.GetProjects(_recursive = 1, _includeSelf = True):
+        span = csnProfiler.profiler.Begin("Post-process", { "project" : _targetProject.name }, _phase = True)
+        try:
             postprocessor = _targetProject.context.GetCompiler().GetPostProcessor()
             if not (postprocessor is None):
-                _targetProject.context.GetCompiler().GetPostProcessor().Do(project)
+                # one digest index for all the projects, saved once
+                digestIndex = csnDigestIndex.DigestIndex(csnDigestIndex.GetIndexFilename(_targetProject.context.GetBuildFolder()))
+                for project in _targetProject.GetProjects(_recursive = 1, _includeSelf = True):
+                    postprocessor.Do(project, _digestIndex = digestIndex)
+                digestIndex.Save()
+        finally:
+            csnProfiler.profiler.End(span)
 
     def ProgressChanged(self, event):
         """ Called by the ProgressListener. """
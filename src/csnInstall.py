@@ -1,27 +1,139 @@
 ## @package csnInstall
 # Definition of install Manager class. 
 import csnUtility
+import csnScheduler
+import csnInstallManifest
+import csnProfiler
 import os
-import glob
+import sys
+import stat
 import shutil
-import GlobDirectoryWalker
 import logging
 from csnListener import ProgressEvent
 import time
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ways to install a file: copy it, or make a hard link, symbolic link or copy-on-write clone (reflink) of it
+installModes = ("copy", "hardlink", "symlink", "reflink")
+
+# shared by the managers (looking the logger up for each project is a noticeable part of creating a project)
+_logger = logging.getLogger("CSnake")
+
+# ioctl that clones a file on linux file systems that support it (btrfs, xfs)
+_FICLONE = 0x40049409
+
+def _Reflink(_source, _destination):
+    """ Clones _source to _destination. Returns false (and creates no file) if the file system does not support it. """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    sourceFile = open(_source, 'rb')
+    try:
+        destinationFile = open(_destination, 'wb')
+        try:
+            fcntl.ioctl(destinationFile.fileno(), _FICLONE, sourceFile.fileno())
+            cloned = True
+        except IOError:
+            cloned = False
+        destinationFile.close()
+    finally:
+        sourceFile.close()
+    if not cloned:
+        os.remove(_destination)
+        return False
+    shutil.copymode(_source, _destination)
+    return True
+
+def _IsInstalledWithMode(_source, _destination, _mode, _sourceStat):
+    """
+    True if _destination is the kind of file that _mode installs: a symbolic link to _source (symlink), a hard link of
+    _source (hardlink), or a file that is not a link of _source (copy and reflink). A hard link that could not be made
+    because _destination is on another device is a copy.
+    """
+    try:
+        destinationStat = os.lstat(_destination)
+    except OSError:
+        return False
+    if _mode == "symlink" and hasattr(os, "symlink"):
+        return stat.S_ISLNK(destinationStat.st_mode) and os.readlink(_destination) == os.path.abspath(_source)
+    if stat.S_ISLNK(destinationStat.st_mode):
+        return False
+    if not hasattr(os, "link"):
+        # no hard links (and no inode numbers in os.stat, on Windows)
+        return True
+    isHardLink = (destinationStat.st_dev, destinationStat.st_ino) == (_sourceStat.st_dev, _sourceStat.st_ino)
+    if _mode == "hardlink" and destinationStat.st_dev == _sourceStat.st_dev:
+        return isHardLink
+    return not isHardLink
+
+def InstallFile(_source, _destination, _mode = "copy", _sourceStat = None, _force = False):
+    """
+    Installs file _source as file _destination, using _mode (see installModes), unless _destination is up to date:
+    the kind of file that _mode installs (e.g. not a link for copy), and not older than _source (as is a link to _source).
+    Returns true if the file was installed.
+    When the file cannot be linked or cloned (e.g. to another file system), it is copied.
+    _sourceStat - If not None, the result of os.stat(_source).
+    _force - If true, _destination is installed even if it is up to date.
+    """
+    sourceStat = _sourceStat
+    if sourceStat is None:
+        sourceStat = os.stat(_source)
+    # check input file is not a folder
+    assert not stat.S_ISDIR(sourceStat.st_mode), "\n\nError: InstallBinariesToBuildFolder cannot install a folder (%s)" % _source
+    if not _force and _IsInstalledWithMode(_source, _destination, _mode, sourceStat):
+        try:
+            if os.stat(_destination).st_mtime >= sourceStat.st_mtime:
+                return False
+        except OSError:
+            pass
+    # remove the old file (or link): writing to it could change the source (if it is a link to it)
+    if os.path.lexists(_destination):
+        os.remove(_destination)
+    installed = False
+    try:
+        if _mode == "hardlink" and hasattr(os, "link"):
+            os.link(_source, _destination)
+            installed = True
+        elif _mode == "symlink" and hasattr(os, "symlink"):
+            os.symlink(os.path.abspath(_source), _destination)
+            installed = True
+        elif _mode == "reflink":
+            installed = _Reflink(_source, _destination)
+    except OSError:
+        installed = False
+    if not installed:
+        shutil.copy(_source, _destination)
+    return True
+
 class Manager:
     """ Class responsible for installing files (in the CMake way). """
+    # number of files installed by one task of InstallBinariesToBuildFolder
+    batchSize = 64
+    
     def __init__(self, _project):
         self.project = _project
         self.filesToInstall = dict()
         self.filesToInstall["Debug"] = dict()
         self.filesToInstall["Release"] = dict()
+        # the (unresolved) filesToInstall, kept when ResolvePathsOfFilesToInstall replaces them by the resolved files
+        self.__patterns = None
+        # incremented when files to install are added
+        self.__version = 0
+        # the state of the inputs of the last ResolvePathsOfFilesToInstall (it is skipped if they did not change)
+        self.__resolveKey = None
         # listeners
         self.__listeners = []
         # logger
-        self.__logger = logging.getLogger("CSnake")
+        self.__logger = _logger
         # cancel flag
         self.__userCanceled = False
+        # number of files installed, skipped (up to date) and removed (stale) by the last InstallBinariesToBuildFolder
+        self.nInstalledFiles = 0
+        self.nSkippedFiles = 0
+        self.nRemovedFiles = 0
 
     def Cancel(self):
         self.__userCanceled = True
@@ -39,123 +151,208 @@ class Manager:
         if _location is None:
             _location = '.'
             
-        for file in _list:
-            if not _debugOnly:
-                if not self.filesToInstall["Release"].has_key(_location):
-                    self.filesToInstall["Release"][_location] = []
-                if not file in self.filesToInstall["Release"][_location]:
-                    self.filesToInstall["Release"][_location].append( file )
-            if not _releaseOnly:
-                if not self.filesToInstall["Debug"].has_key(_location):
-                    self.filesToInstall["Debug"][_location] = []
-                if not file in self.filesToInstall["Debug"][_location]:
-                    self.filesToInstall["Debug"][_location].append( file )
+        self.__version += 1
+        filesToInstallList = [self.filesToInstall]
+        if not self.__patterns is None:
+            filesToInstallList.append(self.__patterns)
+        for filesToInstall in filesToInstallList:
+            for file in _list:
+                if not _debugOnly:
+                    if not filesToInstall["Release"].has_key(_location):
+                        filesToInstall["Release"][_location] = []
+                    if not file in filesToInstall["Release"][_location]:
+                        filesToInstall["Release"][_location].append( file )
+                if not _releaseOnly:
+                    if not filesToInstall["Debug"].has_key(_location):
+                        filesToInstall["Debug"][_location] = []
+                    if not file in filesToInstall["Debug"][_location]:
+                        filesToInstall["Debug"][_location].append( file )
     
     def ResolvePathsOfFilesToInstall(self, _skipCVS = 1):
         """ 
         This function replaces relative paths and wildcards in self.filesToInstall with absolute paths without wildcards.
         Any folder is replaced by a complete list of the files in that folder.
         _skipCVS - If true, folders called CVS and .svn are automatically skipped. 
+        The patterns are matched against an index of the third party build folders (csnUtility.thirdPartyBuildIndex), 
+        and each pattern is resolved once (also when several projects or both modes use it). The result is kept until
+        files to install are added, the third party folders change, or the index is invalidated.
         """
+        span = csnProfiler.profiler.Begin("Resolve files to install", { "project" : self.project.name }, _phase = True)
+        try:
+            self.__ResolvePathsOfFilesToInstall(_skipCVS)
+        finally:
+            csnProfiler.profiler.End(span)
+
+    def __ResolvePathsOfFilesToInstall(self, _skipCVS):
         excludedFolderList = ("CVS", ".svn")
+        index = csnUtility.thirdPartyBuildIndex
+        tpfolders = ["%s/%s" % (x, self.project.context.GetCompiler().GetThirdPartySubFolder()) for x in self.project.context.GetThirdPartyBuildFolders()]
+        index.SetFolders(tpfolders)
+        projects = self.project.GetProjects(_recursive = 1, _includeSelf = True)
+        for project in projects:
+            manager = project.installManager
+            if manager.__patterns is None:
+                # keep the dictionaries of patterns (they are replaced by new dictionaries below)
+                manager.__patterns = dict(manager.filesToInstall)
+        resolveKey = [tpfolders, bool(_skipCVS), index.generation, csnUtility.fileSystemIndex.generation]
+        resolveKey.extend([(id(x.installManager), x.installManager.__version) for x in projects])
+        if resolveKey == self.__resolveKey:
+            return
+        
+        # pattern -> list of (folder relative to the matching folder, or None for a matching file; file)
+        resolved = dict()
+        def Resolve(_path):
+            result = []
+            for file in index.Glob(_path):
+                isFolder = index.IsDir(file)
+                if (os.path.basename(file) in excludedFolderList) and _skipCVS and isFolder:
+                    continue
+                if isFolder:
+                    for folderFile in index.Walk(file, excludedFolderList):
+                        result.append((csnUtility.RemovePrefixFromPath(os.path.dirname(folderFile), file), csnUtility.NormalizePath(folderFile)))
+                else:
+                    result.append((None, csnUtility.NormalizePath(file)))
+            return result
+        
         for mode in ("Debug", "Release"):
-            for project in self.project.GetProjects(_recursive = 1, _includeSelf = True):
+            for project in projects:
                 filesToInstall = dict()
-                for location in project.installManager.filesToInstall[mode].keys():
-                    for dllPattern in project.installManager.filesToInstall[mode][location]:
-                        for tpfolder in self.project.context.GetThirdPartyBuildFolders():
-                            tpfolder += "/" + self.project.context.GetCompiler().GetThirdPartySubFolder()
-                            path = csnUtility.NormalizePath(dllPattern)
+                patterns = project.installManager.__patterns[mode]
+                for location in patterns.keys():
+                    for dllPattern in patterns[location]:
+                        pattern = csnUtility.NormalizePath(dllPattern)
+                        for tpfolder in tpfolders:
+                            path = pattern
                             if not os.path.isabs(path):
                                 path = "%s/%s" % (tpfolder, path)
-                            for file in glob.glob(path):
-                                if (os.path.basename(file) in excludedFolderList) and _skipCVS and os.path.isdir(file):
-                                    continue
-                                if os.path.isdir(file):
-                                    for folderFile in GlobDirectoryWalker.Walker(file, ["*"], excludedFolderList):
-                                        if not os.path.isdir(folderFile):
-                                            normalizedLocation = location + "/" + csnUtility.RemovePrefixFromPath(os.path.dirname(folderFile), file)
-                                            normalizedLocation = csnUtility.NormalizePath(normalizedLocation)
-                                            if not filesToInstall.has_key(normalizedLocation):
-                                                filesToInstall[normalizedLocation] = []
-                                            filesToInstall[normalizedLocation].append(csnUtility.NormalizePath(folderFile))
-                                else:
+                            if not path in resolved:
+                                resolved[path] = Resolve(path)
+                            for (folder, file) in resolved[path]:
+                                if folder is None:
                                     normalizedLocation = csnUtility.NormalizePath(location)
-                                    if not filesToInstall.has_key(normalizedLocation):
-                                        filesToInstall[normalizedLocation] = []
-                                    filesToInstall[normalizedLocation].append(csnUtility.NormalizePath(file))
+                                else:
+                                    normalizedLocation = csnUtility.NormalizePath(location + "/" + folder)
+                                if not filesToInstall.has_key(normalizedLocation):
+                                    filesToInstall[normalizedLocation] = []
+                                filesToInstall[normalizedLocation].append(file)
                     
                 project.installManager.filesToInstall[mode] = filesToInstall
+        self.__resolveKey = resolveKey
+ 
+    def PlanInstallBinariesToBuildFolder(self):
+        """ 
+        Returns the list of files that InstallBinariesToBuildFolder installs (for all projects and configurations), as
+        [source file, output folder, destination file relative to the output folder] lists. A destination file is only
+        in the list once (with the first source).
+        """
+        plan = []
+        destinations = set()
+        projects = self.project.GetProjects(_recursive = 1, _includeSelf = True)
+        for mode in ("Debug", "Release"):
+            outputFolder = self.project.context.GetOutputFolder(mode)
+            for project in projects:
+                filesToInstall = project.installManager.filesToInstall[mode]
+                for location in filesToInstall.keys():
+                    for file in filesToInstall[location]:
+                        destFile = "%s/%s" % (location, os.path.basename(file))
+                        if not (outputFolder, destFile) in destinations:
+                            destinations.add((outputFolder, destFile))
+                            plan.append([file, outputFolder, destFile])
+        return plan
  
-    def InstallBinariesToBuildFolder(self):
+    def InstallBinariesToBuildFolder(self, _mode = "copy", _numberOfJobs = None):
         """ 
         This function copies all third party dlls to the build folder, so that you can run the executables in the
         build folder without having to build the INSTALL target.
+        The files are installed by _numberOfJobs threads (default: the number of cores) using _mode (see InstallFile).
+        The installed files are recorded in a manifest in each output folder (see csnInstallManifest). A file of which
+        the source did not change since it was installed is skipped without looking at the installed file (remove the
+        manifest to check all installed files again). Installed files that are no longer in the list of files to
+        install are removed. The numbers of installed, skipped and removed files are stored in nInstalledFiles,
+        nSkippedFiles and nRemovedFiles.
         """
+        if not _mode in installModes:
+            raise ValueError("Unknown install mode: '%s' (expected one of: %s)" % (_mode, ", ".join(installModes)))
         self.__ResetCancel()
-        result = True
+        # files may have been built in the third party build folders since the paths were resolved
+        csnUtility.thirdPartyBuildIndex.Invalidate()
         self.ResolvePathsOfFilesToInstall()
+        self.nInstalledFiles = 0
+        self.nSkippedFiles = 0
+        self.nRemovedFiles = 0
 
         logger = logging.getLogger("CSnake")
         logger.info( "Install Binaries To Build Folder." )
         
-        # progress
-        progress = 0
-        # increment = 100 / (n1 modes * n2 projects * n3 locations * n4 files)
-        # n are taken from the first valid array values
-        increment = 100.0
+        plan = self.PlanInstallBinariesToBuildFolder()
         
-        for mode in ("Debug", "Release"):
-            n1 = 2
-            outputFolder = self.project.context.GetOutputFolder(mode)
-            os.path.exists(outputFolder) or os.makedirs(outputFolder)
-            for project in self.project.GetProjects(_recursive = 1, _includeSelf = True):
-                n2 = len(self.project.GetProjects(_recursive = 1, _includeSelf = True))
-                for location in project.installManager.filesToInstall[mode].keys():
-                    n3 = len(project.installManager.filesToInstall[mode].keys())
-                    for file in project.installManager.filesToInstall[mode][location]:
-                        # progress
-                        n4 = len(project.installManager.filesToInstall[mode][location])
-                        if increment == 100:
-                            increment /= n1*n2*n3*n4
-                        # destination folder
-                        absLocation = "%s/%s" % (outputFolder, location)
-                        # check input file is not a fodler
-                        assert not os.path.isdir(file), "\n\nError: InstallBinariesToBuildFolder cannot install a folder (%s)" % file
-                        # create destination folder if it does not exist
-                        os.path.exists(absLocation) or os.makedirs(absLocation)
-                        # check that the destination folder exists
-                        assert os.path.exists(absLocation), "Could not create %s\n" % absLocation
-                        # copy file
-                        destFile = "%s/%s" % (absLocation, os.path.basename(file))
-                        # check if copy is needed
-                        needCopy = True
-                        if os.path.exists(destFile):
-                            # compare modification time
-                            if os.path.getmtime(destFile) >= os.path.getmtime(file):
-                                needCopy = False
-                        # copy if necessary
-                        copyResult = True
-                        if needCopy:
-                            copyResult = (0 != shutil.copy(file, absLocation))
-                        # global result
-                        result = copyResult and result
-                        # progress
-                        if progress >= 100: progress = 99
-                        self.__NotifyListeners(ProgressEvent(self,progress))
-                        if self.IsCanceled(): return False
-                        progress += increment
-                        # check error
-                        if needCopy:
-                            if copyResult:
-                                logger.debug( "Copied %s to %s" % (file, absLocation) )
-                            else:
-                                message = "Failed to copy %s to %s\n" % (file, absLocation)
-                                logger.error( message )
+        # create the destination folders
+        outputFolders = [self.project.context.GetOutputFolder(mode) for mode in ("Debug", "Release")]
+        folders = set(outputFolders)
+        folders.update([os.path.dirname("%s/%s" % (outputFolder, destFile)) for (file, outputFolder, destFile) in plan])
+        for folder in folders:
+            os.path.exists(folder) or os.makedirs(folder)
+            # check that the destination folder exists
+            assert os.path.exists(folder), "Could not create %s\n" % folder
+        
+        manifests = dict()
+        for outputFolder in outputFolders:
+            manifests[outputFolder] = csnInstallManifest.InstallManifest(csnInstallManifest.GetManifestFilename(outputFolder))
+        try:
+            # remove the files that were installed before, but are no longer in the plan
+            for outputFolder in manifests.keys():
+                destFiles = set([destFile for (file, folder, destFile) in plan if folder == outputFolder])
+                for destFile in manifests[outputFolder].GetStaleFiles(destFiles):
+                    absDestFile = "%s/%s" % (outputFolder, destFile)
+                    if os.path.lexists(absDestFile):
+                        os.remove(absDestFile)
+                        logger.debug( "Removed %s" % absDestFile )
+                        self.nRemovedFiles += 1
+                    manifests[outputFolder].Remove(destFile)
+            
+            # progress
+            nDone = [0]
+            def OnProgress(batch, nFiles):
+                nDone[0] += nFiles
+                self.__NotifyListeners(ProgressEvent(self, min(99, nDone[0] * 100 / len(plan))))
+            self.__NotifyListeners(ProgressEvent(self, 0))
+            
+            # install the files in batches (progress is posted per file); installed[i] tells if plan[i] was installed
+            # (False if it was skipped, None if it was not handled because of canceling)
+            installed = [None] * len(plan)
+            def InstallBatch(batch, postProgress):
+                for index in range(batch * self.batchSize, min(len(plan), (batch + 1) * self.batchSize)):
+                    if self.IsCanceled():
+                        return False
+                    (file, outputFolder, destFile) = plan[index]
+                    sourceStat = os.stat(file)
+                    manifest = manifests[outputFolder]
+                    if manifest.IsUpToDate(destFile, file, sourceStat, _mode):
+                        installed[index] = False
+                        logger.debug( "No copy needed for %s (unchanged)" % (file) )
+                    else:
+                        absDestFile = "%s/%s" % (outputFolder, destFile)
+                        # a file installed with another mode is replaced (e.g. a link by a copy)
+                        recordedMode = manifest.GetMode(destFile)
+                        force = not recordedMode is None and recordedMode != _mode
+                        installed[index] = InstallFile(file, absDestFile, _mode, sourceStat, force)
+                        if installed[index]:
+                            logger.debug( "Installed %s to %s" % (file, absDestFile) )
                         else:
                             logger.debug( "No copy needed for %s" % (file) )
-                            
-        return result
+                        manifest.Record(destFile, file, sourceStat, _mode)
+                    postProgress(1)
+                return True
+            
+            nBatches = (len(plan) + self.batchSize - 1) / self.batchSize
+            scheduler = csnScheduler.Scheduler(_numberOfJobs)
+            scheduler.Run(range(nBatches), dict(), InstallBatch, OnProgress, self.IsCanceled)
+            self.nInstalledFiles = installed.count(True)
+            self.nSkippedFiles = installed.count(False)
+        finally:
+            for manifest in manifests.values():
+                manifest.Save()
+        return not self.IsCanceled()
 
     def __NotifyListeners(self, event):
         """ Notify the attached listeners about the event. """
@@ -0,0 +1,101 @@
+## @package csnInstallManifest
+# Definition of the InstallManifest class.
+import json
+import os
+import threading
+
+def GetManifestFilename(_folder):
+    """ Returns the file in which the InstallManifest of output folder _folder is stored. """
+    return "%s/csnakeInstallManifest.json" % _folder
+
+class InstallManifest:
+    """
+    Stores, for each file that was installed in an output folder, the source file, and the size and modification time
+    the source file had when it was installed. A file of which the source did not change is up to date, without
+    looking at the installed file. Files that are no longer installed can be found with GetStaleFiles.
+    The installed files are identified by their path relative to the output folder.
+    The functions can be called from several threads.
+    """
+    version = 1
+
+    def __init__(self, _filename):
+        """ _filename -- Json file in which the manifest is stored. """
+        self.filename = _filename
+        self.__lock = threading.Lock()
+        self.Load()
+
+    def Load(self):
+        """ Reads the manifest file. An unreadable manifest is treated as empty. """
+        # installed file -> [source file, size, modification time, install mode]
+        self.__entries = dict()
+        self.__modified = False
+        if not os.path.exists(self.filename):
+            return
+        try:
+            manifestFile = open(self.filename, 'r')
+            try:
+                data = json.load(manifestFile)
+            finally:
+                manifestFile.close()
+        except (IOError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == self.version and isinstance(data.get("files"), dict):
+            self.__entries = data["files"]
+
+    def IsUpToDate(self, _file, _source, _sourceStat, _mode):
+        """ True if _file was installed from _source (with os.stat result _sourceStat) using _mode, and _source did not change since. """
+        self.__lock.acquire()
+        try:
+            entry = self.__entries.get(_file)
+        finally:
+            self.__lock.release()
+        return entry == [_source, _sourceStat.st_size, _sourceStat.st_mtime, _mode]
+
+    def GetMode(self, _file):
+        """ Returns the install mode with which _file was installed, or None if it is not in the manifest. """
+        self.__lock.acquire()
+        try:
+            entry = self.__entries.get(_file)
+        finally:
+            self.__lock.release()
+        if entry is None:
+            return None
+        return entry[3]
+
+    def Record(self, _file, _source, _sourceStat, _mode):
+        """ Records that _file was installed from _source (with os.stat result _sourceStat) using _mode. """
+        self.__lock.acquire()
+        try:
+            self.__entries[_file] = [_source, _sourceStat.st_size, _sourceStat.st_mtime, _mode]
+            self.__modified = True
+        finally:
+            self.__lock.release()
+
+    def GetStaleFiles(self, _files):
+        """ Returns the installed files that are not in _files (a set). """
+        return [x for x in self.__entries.keys() if not x in _files]
+
+    def Remove(self, _file):
+        """ Forgets installed file _file. """
+        self.__lock.acquire()
+        try:
+            if _file in self.__entries:
+                del self.__entries[_file]
+                self.__modified = True
+        finally:
+            self.__lock.release()
+
+    def Save(self):
+        """ Writes the manifest file (if it changed since it was loaded or saved). """
+        self.__lock.acquire()
+        try:
+            if not self.__modified:
+                return
+            manifestFile = open(self.filename, 'w')
+            try:
+                manifestFile.write(json.dumps({ "version" : self.version, "files" : self.__entries }, sort_keys=True, indent=2))
+            finally:
+                manifestFile.close()
+            self.__modified = False
+        finally:
+            self.__lock.release()
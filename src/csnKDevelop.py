@@ -3,6 +3,7 @@
 # \ingroup compiler
 import os
 import csnUtility
+import csnDigestIndex
 from csnLinuxCommon import LinuxCommon
 
 class Makefile(LinuxCommon):
@@ -49,7 +50,12 @@ class KDevelopPostProcessor:
     def __GetFilelistFilename(self, _project, _folder = None):
         return "%s.filelist" % self.__GetKDevelopProjectFilename(_project, _folder)
         
-    def Do(self, _project):
+    def Do(self, _project, _digestIndex = None):
+        """
+        Post processes the KDevelop project and file list generated for _project.
+        _digestIndex - csnDigestIndex.DigestIndex of the generated files, saved by the caller. If None, the index of the
+        build folder is loaded and saved by this call.
+        """
         # create folder if it does not exist
         if not os.path.exists(_project.context.GetKdevelopProjectFolder()):
             os.makedirs(_project.context.GetKdevelopProjectFolder())
@@ -69,7 +75,12 @@ class KDevelopPostProcessor:
                 f.write(fileListItem + "/n")
         f.close()
         
-        csnUtility.ReplaceDestinationFileIfDifferent(self.__GetFilelistFilename(_project), self.__GetFilelistFilename(_project, kdevelopProjectFolder))
+        digestIndex = _digestIndex
+        if digestIndex is None:
+            digestIndex = csnDigestIndex.DigestIndex(csnDigestIndex.GetIndexFilename(_project.context.GetBuildFolder()))
+        csnUtility.ReplaceDestinationFileIfDifferent(self.__GetFilelistFilename(_project), self.__GetFilelistFilename(_project, kdevelopProjectFolder), _digestIndex = digestIndex)
+        if _digestIndex is None:
+            digestIndex.Save()
         
         # Postprocess "*.kdevelop" file (KDevelop project)
         
@@ -0,0 +1,60 @@
+## @package csnManifest
+# Definition of the Manifest class.
+import json
+import os.path
+
+class Manifest:
+    """
+    Stores, per project, the fingerprint of the inputs of the cmake files that were generated in a build folder.
+    The Generator uses it to skip the projects of which the generated files are up-to-date.
+    The fingerprints of the previous generation are read from a json file. The fingerprints of the current generation are
+    collected with Update, and only written when Save is called (the fingerprints of projects that were not generated
+    again are kept).
+    """
+    def __init__(self, _filename, _version):
+        """
+        _filename -- Json file in which the fingerprints are stored.
+        _version -- CSnake version string. Fingerprints stored by another version of CSnake are ignored.
+        """
+        self.filename = _filename
+        self.version = _version
+        self.__previous = dict()
+        self.__current = dict()
+        self.Load()
+
+    def Load(self):
+        """ Reads the fingerprints of the previous generation. An unreadable manifest is treated as empty. """
+        self.__previous = dict()
+        if not os.path.exists(self.filename):
+            return
+        try:
+            manifestFile = open(self.filename, 'r')
+            try:
+                data = json.load(manifestFile)
+            finally:
+                manifestFile.close()
+        except (IOError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == self.version and isinstance(data.get("projects"), dict):
+            self.__previous = data["projects"]
+
+    def IsUpToDate(self, _name, _fingerprint):
+        """ True if the files of project _name were generated from inputs with the same _fingerprint. """
+        return self.__previous.get(_name) == _fingerprint
+
+    def Update(self, _name, _fingerprint):
+        """ Records the fingerprint of the files of project _name in the current generation. """
+        self.__current[_name] = _fingerprint
+
+    def Save(self):
+        """ Writes the fingerprints of the current generation to the manifest file. """
+        projects = dict(self.__previous)
+        projects.update(self.__current)
+        data = { "version" : self.version, "projects" : projects }
+        manifestFile = open(self.filename, 'w')
+        try:
+            manifestFile.write(json.dumps(data, sort_keys=True, indent=2))
+        finally:
+            manifestFile.close()
+        self.__previous = projects
+        self.__current = dict()
@@ -0,0 +1,206 @@
+## @package csnModuleTracker
+# Definition of the ModuleTracker class.
+import os
+import re
+import sys
+import tokenize
+
+_identifier = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+def GetSourceFilename(_module):
+    """ Returns the python source file of _module, or None if _module was not loaded from a file. """
+    filename = getattr(_module, "__file__", None)
+    if filename is None:
+        return None
+    (base, extension) = os.path.splitext(filename)
+    if extension in (".pyc", ".pyo"):
+        filename = base + ".py"
+    return os.path.abspath(filename)
+
+def GetReferencedNames(_filename):
+    """
+    Returns the set of identifiers in python source file _filename, including the identifiers in its string literals
+    (modules are also loaded by name, e.g. with LoadThirdPartyModule('Two', 'csnTwo')).
+    """
+    result = set()
+    sourceFile = open(_filename, 'r')
+    try:
+        try:
+            for token in tokenize.generate_tokens(sourceFile.readline):
+                if token[0] == tokenize.NAME:
+                    result.add(token[1])
+                elif token[0] == tokenize.STRING:
+                    result.update(_identifier.findall(token[1]))
+        except (tokenize.TokenError, IndentationError):
+            # the module will fail to load anyway
+            pass
+    finally:
+        sourceFile.close()
+    return result
+
+class ModuleState:
+    """ What a tracked module depends on: its source file (size and modification time), names and glob results. """
+    def __init__(self, _filename):
+        self.filename = _filename
+        self.stat = self.__Stat()
+        self.names = GetReferencedNames(_filename)
+        # list of (pattern, result) of the globs done while the module was loaded
+        self.globs = []
+
+    def __Stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime)
+
+    def SourceChanged(self):
+        return self.stat is None or self.__Stat() != self.stat
+
+class ModuleTracker:
+    """
+    Keeps the csnake modules (the python modules in the csnake folders, such as the root folders and third party folders)
+    loaded between loads of a csnake file, and unloads only the modules that must be loaded again:
+    - modules of which the source file changed (or was removed);
+    - modules for which a glob (see csnFileSystemIndex) done while loading now has a different result, and modules
+    with a project of which a glob now has a different result (projects glob their sources when they are first used);
+    - the modules that refer to such a module, recursively. A module refers to another module if the name of the other
+    module (the last part of its dotted name) appears in its source, as identifier or in a string literal.
+    The bytecode (pyc) files of the unchanged modules are kept.
+    Modules that are not in the csnake folders (such as the modules of CSnake itself) are not tracked.
+    """
+    def __init__(self):
+        # module name -> ModuleState
+        self.__modules = dict()
+        self.__key = None
+        self.__folders = []
+        self.__index = None
+        self.__loading = None
+        self.nReloadedModules = 0
+        self.nKeptModules = 0
+
+    def GetTrackedModules(self):
+        """ Returns the names of the tracked modules. """
+        return sorted(self.__modules.keys())
+
+    def Prepare(self, _key, _folders, _index = None):
+        """
+        Unloads the modules that must be loaded again, before loading a csnake file.
+        _key - If _key differs from the _key of the previous call (compared with ==), all tracked modules are unloaded.
+        _folders - The csnake folders.
+        _index - The FileSystemIndex of which the globs are tracked (None to not track globs).
+        Returns the names of the unloaded modules.
+        """
+        if _key != self.__key or [os.path.abspath(x) for x in _folders] != self.__folders:
+            unload = sorted(self.__modules.keys())
+        else:
+            unload = self.GetModulesToReload()
+        self.__key = _key
+        self.__folders = [os.path.abspath(x) for x in _folders]
+        self.__index = _index
+        self.Unload(unload)
+        self.nReloadedModules = len(unload)
+        self.nKeptModules = len(self.__modules)
+        return unload
+
+    def Begin(self):
+        """ Starts recording the modules that are loaded (and the globs they do). Call End afterwards. """
+        self.__loading = dict()
+        if not self.__index is None:
+            self.__index.globListeners.append(self.__OnGlob)
+
+    def End(self):
+        """ Starts tracking the csnake modules that were loaded since Begin, and returns their names. """
+        if not self.__index is None:
+            self.__index.globListeners.remove(self.__OnGlob)
+        globs = self.__loading
+        self.__loading = None
+        result = []
+        for (name, module) in sys.modules.items():
+            if module is None or name in self.__modules:
+                continue
+            filename = GetSourceFilename(module)
+            if filename is None or not self.__IsCsnakeFile(filename) or not os.path.exists(filename):
+                continue
+            state = ModuleState(filename)
+            state.globs = globs.get(name, [])
+            self.__modules[name] = state
+            result.append(name)
+        return result
+
+    def GetModulesToReload(self):
+        """ Returns the tracked modules that changed, and the modules that refer to them (recursively). """
+        changed = set([name for (name, state) in self.__modules.items() if self.__Changed(name, state)])
+        # add the modules that refer to changed modules, until no more modules are added
+        added = changed
+        while len(added):
+            shortNames = set([x.split(".")[-1] for x in added])
+            added = set()
+            for (name, state) in self.__modules.items():
+                if not name in changed and (state.names & shortNames or self.__ImportsAny(name, changed)):
+                    added.add(name)
+            changed |= added
+        return sorted(changed)
+
+    def Unload(self, _names):
+        """ Removes modules _names from sys.modules and stops tracking them. """
+        for name in _names:
+            state = self.__modules.pop(name, None)
+            if not state is None and state.SourceChanged():
+                # the source may have changed within the resolution of the modification time stored in the pyc file
+                for extension in ("c", "o"):
+                    if os.path.exists(state.filename + extension):
+                        os.remove(state.filename + extension)
+            if name in sys.modules:
+                del sys.modules[name]
+
+    def Clear(self):
+        """ Unloads all tracked modules. """
+        self.Unload(self.__modules.keys())
+        self.__key = None
+
+    def __Changed(self, _name, _state):
+        if not _name in sys.modules or _state.SourceChanged():
+            return True
+        if self.__index is None:
+            return False
+        globs = list(_state.globs)
+        for value in vars(sys.modules[_name]).values():
+            # projects, and projects wrapped by the API (see csnProject.ToProject)
+            project = getattr(value, "_APIVeryGenericProject_Base__project", value)
+            pathsManager = getattr(project, "pathsManager", None)
+            if not pathsManager is None:
+                globs.extend(getattr(pathsManager, "globs", dict()).items())
+        for (pattern, result) in globs:
+            if self.__index.Glob(pattern) != result:
+                return True
+        return False
+
+    def __ImportsAny(self, _name, _names):
+        """ True if a global of module _name is one of the modules _names. """
+        module = sys.modules.get(_name)
+        if module is None:
+            return False
+        for value in vars(module).values():
+            if type(value) is type(sys) and getattr(value, "__name__", None) in _names:
+                return True
+        return False
+
+    def __IsCsnakeFile(self, _filename):
+        for folder in self.__folders:
+            if _filename.startswith(folder + os.sep):
+                return True
+        return False
+
+    def __OnGlob(self, _pattern, _result):
+        """ Records that the csnake module that is calling Glob got _result for _pattern. """
+        frame = sys._getframe(1)
+        while not frame is None:
+            filename = frame.f_globals.get("__file__")
+            if not filename is None and self.__IsCsnakeFile(os.path.abspath(filename)):
+                self.__loading.setdefault(frame.f_globals.get("__name__"), []).append((_pattern, list(_result)))
+                return
+            frame = frame.f_back
+
+# the modules of the csnake files are shared by all handlers (sys.modules is global)
+tracker = ModuleTracker()
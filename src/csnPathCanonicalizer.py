@@ -0,0 +1,111 @@
+## @package csnPathCanonicalizer
+# Definition of the PathCanonicalizer class.
+import os.path
+import sys
+
+def IsCaseInsensitivePlatform():
+    """ Returns true if the file systems of this platform are case insensitive by default (Windows and Mac). """
+    return sys.platform in ("win32", "cygwin", "darwin")
+
+class PathCanonicalizer:
+    """
+    Memoized implementation of csnUtility.CorrectPath and csnUtility.NormalizePath.
+    The listing of each folder is read (with os.listdir) only once, and stored together with an index from the
+    lower case names to the names on disk. The results of CorrectPath and NormalizePath are memoized as well.
+    When files or folders are created, renamed or removed, call Invalidate to forget the cached listings.
+    The counters in GetStatistics tell how many results were found in the caches, and how many folders were listed.
+    """
+    def __init__(self, _correctCase = None):
+        """
+        _correctCase - If true, Normalize corrects the case of the paths (see CorrectPath). By default, the case
+        is only corrected on platforms with case insensitive file systems (on other platforms, a path with the wrong
+        case does not refer to an existing file anyway).
+        """
+        if _correctCase is None:
+            _correctCase = IsCaseInsensitivePlatform()
+        self.correctCase = _correctCase
+        self.Invalidate()
+        self.ResetStatistics()
+
+    def Invalidate(self, _folder = None):
+        """
+        Forgets the cached listing of _folder and all its subfolders, and the memoized results.
+        If _folder is None, all cached listings are forgotten.
+        """
+        if _folder is None:
+            # folder -> dictionary from lower case name to name (None if the folder cannot be listed)
+            self.__indexes = dict()
+        else:
+            folder = os.path.normpath(_folder)
+            prefix = os.path.join(folder, "")
+            for key in self.__indexes.keys():
+                normalizedKey = os.path.normpath(key)
+                if normalizedKey == folder or normalizedKey.startswith(prefix):
+                    del self.__indexes[key]
+        # path -> result of CorrectPath, and (path, correctCase) -> result of Normalize
+        self.__corrected = dict()
+        self.__normalized = dict()
+
+    def ResetStatistics(self):
+        self.hits = 0
+        self.listingHits = 0
+        self.listdirCalls = 0
+
+    def GetStatistics(self):
+        """
+        Returns a dictionary with the counters: hits (results found in the memo), listingHits (folder listings found
+        in the cache) and listdirCalls (folders listed on disk).
+        """
+        return { "hits" : self.hits, "listingHits" : self.listingHits, "listdirCalls" : self.listdirCalls }
+
+    def __GetIndex(self, _folder):
+        """ Returns the dictionary from lower case name to name for the files in _folder (None if it cannot be listed). """
+        if _folder in self.__indexes:
+            self.listingHits += 1
+            return self.__indexes[_folder]
+        index = None
+        if _folder != "":
+            self.listdirCalls += 1
+            try:
+                names = os.listdir(_folder)
+            except OSError:
+                names = None
+            if not names is None:
+                index = dict()
+                # if several names only differ in case, the last one is used (as in the original CorrectPath)
+                for name in names:
+                    index[name.lower()] = name
+        self.__indexes[_folder] = index
+        return index
+
+    def CorrectPath(self, _path):
+        """ Returns _path, with the case of each part replaced by the case of the matching file or folder on disk. """
+        if _path in self.__corrected:
+            self.hits += 1
+            return self.__corrected[_path]
+        (first, second) = os.path.split(_path)
+        if second != "":
+            index = self.__GetIndex(first)
+            if not index is None:
+                second = index.get(second.lower(), second)
+            result = os.path.join(self.CorrectPath(first), second)
+        else:
+            result = first
+        self.__corrected[_path] = result
+        return result
+
+    def Normalize(self, _path, _correctCase = True):
+        """
+        Returns the normalized _path with forward slashes. If _correctCase and self.correctCase are true, the case
+        of the path is corrected.
+        """
+        key = (_path, _correctCase)
+        if key in self.__normalized:
+            self.hits += 1
+            return self.__normalized[key]
+        path = os.path.normpath(_path)
+        if _correctCase and self.correctCase:
+            path = self.CorrectPath(path)
+        path = path.replace("\\", "/")
+        self.__normalized[key] = path
+        return path
@@ -0,0 +1,224 @@
+## @package csnProcess
+# Definition of the ProcessRunner class and the progress matchers.
+import collections
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import Queue
+
+try:
+    import select
+except ImportError:
+    select = None
+
+# on windows, select does not work with pipes: the pipes are read in threads
+_useSelect = not select is None and sys.platform != "win32"
+
+class ProgressMatcher:
+    """ Extracts the progress (0 to 99) from the output lines of a process. Derived classes implement Match. """
+    def Match(self, _line):
+        """ Returns the progress for output line _line, or None if the line does not tell the progress. """
+        return None
+
+class CountMatcher(ProgressMatcher):
+    """
+    Counts the output lines that match a regular expression (such as the '-- Processing' lines of cmake). The progress
+    for the n-th matching line (starting at 0) is n * 100 / _total.
+    """
+    def __init__(self, _regex, _total):
+        self.regex = re.compile(_regex)
+        self.total = max(1, _total)
+        self.count = 0
+
+    def Match(self, _line):
+        if not self.regex.match(_line):
+            return None
+        progress = min(99, self.count * 100 / self.total)
+        self.count += 1
+        return progress
+
+class PercentMatcher(ProgressMatcher):
+    """ Takes the progress from the output lines that contain a percentage (such as the '[ 10%] ...' lines of make). """
+    def __init__(self, _regex = r"\[\s*(\d+)%\]"):
+        """ _regex - Regular expression of which the first group is the percentage. """
+        self.regex = re.compile(_regex)
+
+    def Match(self, _line):
+        match = self.regex.match(_line)
+        if not match:
+            return None
+        return min(99, int(match.group(1)))
+
+class ProcessRunner:
+    """
+    Runs a process, and reads its standard output and standard error at the same time, line by line. The last lines of
+    both streams are kept in memory (see GetOutput and GetErrors), and can be passed on while the process runs.
+    The process runs in its own process group, so that canceling kills the process and all processes it started.
+    Several ProcessRunners can run at the same time (in different threads).
+    """
+    # seconds between the checks if the process must be canceled
+    pollInterval = 0.1
+
+    def __init__(self, _argList, _workingDir = None, _matchers = None, _onProgress = None, _onOutput = None, _onErrors = None, _isCanceled = None, _bufferSize = 1000):
+        """
+        _argList - Program and arguments.
+        _workingDir - If not None, the working folder of the process.
+        _matchers - List of ProgressMatchers that are applied to the standard output lines.
+        _onProgress - If not None, _onProgress(progress) is called for each progress found by the matchers.
+        _onOutput - If not None, _onOutput(line) is called for each line of standard output.
+        _onErrors - If not None, _onErrors(line) is called for each line of standard error.
+        _isCanceled - If not None, the process is killed once _isCanceled() returns true.
+        _bufferSize - Number of lines of each stream that are kept in memory.
+        The callbacks are called in the thread that calls Run.
+        """
+        self.argList = _argList
+        self.workingDir = _workingDir
+        self.matchers = list(_matchers or [])
+        self.onProgress = _onProgress
+        self.onOutput = _onOutput
+        self.onErrors = _onErrors
+        self.isCanceled = _isCanceled
+        self.__output = collections.deque(maxlen = _bufferSize)
+        self.__errors = collections.deque(maxlen = _bufferSize)
+        self.__nErrorLines = 0
+        self.__canceled = False
+        self.__process = None
+
+    def GetOutput(self):
+        """ Returns the last lines of standard output. """
+        return list(self.__output)
+
+    def GetErrors(self):
+        """ Returns the last lines of standard error. """
+        return list(self.__errors)
+
+    def GetNumberOfErrorLines(self):
+        """ Returns the number of lines of standard error (including the lines that are no longer kept in memory). """
+        return self.__nErrorLines
+
+    def IsCanceled(self):
+        """ True if the process was killed because Run was canceled. """
+        return self.__canceled
+
+    def Run(self):
+        """ Runs the process, and returns its exit code (None if it was canceled). """
+        if sys.platform == "win32":
+            # CREATE_NEW_PROCESS_GROUP
+            self.__process = subprocess.Popen(self.argList, cwd = self.workingDir, stdout = subprocess.PIPE, stderr = subprocess.PIPE, creationflags = 0x200)
+        else:
+            self.__process = subprocess.Popen(self.argList, cwd = self.workingDir, stdout = subprocess.PIPE, stderr = subprocess.PIPE, preexec_fn = os.setsid)
+        try:
+            if _useSelect:
+                self.__ReadWithSelect()
+            else:
+                self.__ReadWithThreads()
+        except:
+            self.__Kill()
+            raise
+        returnCode = self.__process.wait()
+        if self.__canceled:
+            return None
+        return returnCode
+
+    def __CheckCanceled(self):
+        if not self.__canceled and not self.isCanceled is None and self.isCanceled():
+            self.__canceled = True
+            self.__Kill()
+        return self.__canceled
+
+    def __Kill(self):
+        """ Kills the process group of the process. """
+        if sys.platform == "win32":
+            subprocess.call(["taskkill", "/F", "/T", "/PID", str(self.__process.pid)], stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+            return
+        try:
+            os.killpg(self.__process.pid, signal.SIGTERM)
+        except OSError:
+            return
+        # give the processes a moment to exit, then force them
+        deadline = time.time() + 2.0
+        while self.__process.poll() is None and time.time() < deadline:
+            time.sleep(0.05)
+        try:
+            os.killpg(self.__process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def __ReadWithSelect(self):
+        # file descriptor -> [function called with each line, incomplete last line]
+        streams = {
+            self.__process.stdout.fileno() : [self.__HandleOutput, ""],
+            self.__process.stderr.fileno() : [self.__HandleErrors, ""]
+        }
+        try:
+            while len(streams):
+                if self.__CheckCanceled():
+                    return
+                try:
+                    (ready, unused, unused) = select.select(streams.keys(), [], [], self.pollInterval)
+                except select.error, e:
+                    if e.args[0] == 4: # EINTR
+                        continue
+                    raise
+                for fd in ready:
+                    data = os.read(fd, 65536)
+                    stream = streams[fd]
+                    if not data:
+                        if stream[1]:
+                            stream[0](stream[1])
+                        del streams[fd]
+                        continue
+                    lines = (stream[1] + data).split("\n")
+                    stream[1] = lines.pop()
+                    for line in lines:
+                        stream[0](line + "\n")
+        finally:
+            self.__process.stdout.close()
+            self.__process.stderr.close()
+
+    def __ReadWithThreads(self):
+        lines = Queue.Queue()
+        def Read(_pipe, _handler):
+            for line in iter(_pipe.readline, ""):
+                lines.put((_handler, line))
+            lines.put((_handler, None))
+        threads = [
+            threading.Thread(target = Read, args = (self.__process.stdout, self.__HandleOutput)),
+            threading.Thread(target = Read, args = (self.__process.stderr, self.__HandleErrors))
+        ]
+        for thread in threads:
+            thread.setDaemon(True)
+            thread.start()
+        nOpen = len(threads)
+        while nOpen:
+            if self.__CheckCanceled():
+                return
+            try:
+                (handler, line) = lines.get(True, self.pollInterval)
+            except Queue.Empty:
+                continue
+            if line is None:
+                nOpen -= 1
+            else:
+                handler(line)
+
+    def __HandleOutput(self, _line):
+        self.__output.append(_line)
+        if not self.onOutput is None:
+            self.onOutput(_line)
+        for matcher in self.matchers:
+            progress = matcher.Match(_line)
+            if not progress is None:
+                if not self.onProgress is None:
+                    self.onProgress(progress)
+                break
+
+    def __HandleErrors(self, _line):
+        self.__errors.append(_line)
+        self.__nErrorLines += 1
+        if not self.onErrors is None:
+            self.onErrors(_line)
@@ -0,0 +1,217 @@
+## @package csnProfiler
+# Definition of the Profiler class, which records the time spent in the phases of configuring and building (spans).
+import json
+import os
+import threading
+import time
+
+try:
+    # optional: without cProfile, the phases are timed but not profiled
+    import cProfile
+except ImportError:
+    cProfile = None
+
+class Span:
+    """ A named interval of time in a thread. Spans of a thread are nested: a span ends before the span that contains it. """
+    def __init__(self, _name, _args, _threadIndex, _depth):
+        self.name = _name
+        self.args = _args
+        self.threadIndex = _threadIndex
+        self.depth = _depth
+        self.start = time.time()
+        self.duration = None
+        # time spent in nested spans
+        self.childDuration = 0.0
+        self.profile = None
+
+class Profiler:
+    """
+    Records spans (see Begin and End) while it is enabled. The spans are written as a Chrome trace (see WriteTrace, which
+    can be opened with chrome://tracing or https://ui.perfetto.dev) and summarized in a table (see GetSummary).
+    Spans that are phases can also be profiled with cProfile (see Enable); the profile of each phase is written with
+    WriteProfiles. Begin and End can be called from several threads. When the profiler is disabled, they do nothing.
+    """
+    def __init__(self):
+        self.__enabled = False
+        self.__profilePhases = False
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.Clear()
+
+    def Enable(self, _profilePhases = False):
+        """ Starts recording spans. If _profilePhases, the phases are profiled with cProfile (if it is available). """
+        self.__enabled = True
+        self.__profilePhases = _profilePhases and not cProfile is None
+
+    def Disable(self):
+        self.__enabled = False
+
+    def IsEnabled(self):
+        return self.__enabled
+
+    def Clear(self):
+        """ Forgets the recorded spans. """
+        self.__lock.acquire()
+        try:
+            self.__spans = []
+            # thread identifier -> (index, name)
+            self.__threads = dict()
+            self.__startTime = time.time()
+        finally:
+            self.__lock.release()
+
+    def __GetStack(self):
+        if not hasattr(self.__local, "stack"):
+            self.__local.stack = []
+        return self.__local.stack
+
+    def Begin(self, _name, _args = None, _phase = False):
+        """
+        Starts a span with name _name, and returns it (None if the profiler is disabled). The span must be ended with End
+        (use try...finally). _args is a dictionary with details of the span, such as the name of a project.
+        If _phase, the span is profiled with cProfile (see Enable), unless a span that contains it is profiled.
+        """
+        if not self.__enabled:
+            return None
+        thread = threading.currentThread()
+        self.__lock.acquire()
+        try:
+            if not thread.ident in self.__threads:
+                self.__threads[thread.ident] = (len(self.__threads), thread.getName())
+            threadIndex = self.__threads[thread.ident][0]
+        finally:
+            self.__lock.release()
+        stack = self.__GetStack()
+        span = Span(_name, _args or dict(), threadIndex, len(stack))
+        stack.append(span)
+        if _phase and self.__profilePhases and not [x for x in stack if not x.profile is None]:
+            span.profile = cProfile.Profile()
+            span.profile.enable()
+        return span
+
+    def End(self, _span):
+        """ Ends _span (returned by Begin). Does nothing if _span is None. """
+        if _span is None:
+            return
+        if not _span.profile is None:
+            _span.profile.disable()
+        _span.duration = time.time() - _span.start
+        stack = self.__GetStack()
+        # spans that were not ended (because of an exception) end with the span that contains them
+        while len(stack) and not stack[-1] is _span:
+            stack.pop()
+        if len(stack):
+            stack.pop()
+        if len(stack):
+            stack[-1].childDuration += _span.duration
+        self.__lock.acquire()
+        try:
+            self.__spans.append(_span)
+        finally:
+            self.__lock.release()
+
+    def GetOpenSpans(self):
+        """ Returns the spans of this thread that were begun but not yet ended (outermost first). """
+        if not self.__enabled:
+            return []
+        return list(self.__GetStack())
+
+    def GetSpans(self):
+        """ Returns the ended spans, in order of their start. """
+        self.__lock.acquire()
+        try:
+            spans = list(self.__spans)
+        finally:
+            self.__lock.release()
+        spans.sort(key = lambda x: (x.start, x.depth))
+        return spans
+
+    def GetTrace(self):
+        """ Returns the spans in the Chrome trace event format (a dictionary that can be written as json). """
+        events = []
+        pid = os.getpid()
+        self.__lock.acquire()
+        try:
+            threads = self.__threads.values()
+        finally:
+            self.__lock.release()
+        for (index, name) in sorted(threads):
+            events.append({ "name" : "thread_name", "ph" : "M", "pid" : pid, "tid" : index, "args" : { "name" : name } })
+        for span in self.GetSpans():
+            events.append({
+                "name" : span.name,
+                "cat" : "csnake",
+                "ph" : "X",
+                "ts" : int((span.start - self.__startTime) * 1e6),
+                "dur" : int(span.duration * 1e6),
+                "pid" : pid,
+                "tid" : span.threadIndex,
+                "args" : span.args
+            })
+        return { "traceEvents" : events, "displayTimeUnit" : "ms" }
+
+    def WriteTrace(self, _filename):
+        f = open(_filename, "w")
+        try:
+            json.dump(self.GetTrace(), f)
+        finally:
+            f.close()
+
+    def GetSummary(self):
+        """
+        Returns a table with, for each span name, the number of spans, their total time, their self time (the total time
+        minus the time in nested spans) and the longest span, sorted by total time.
+        """
+        # name -> [count, total, self, max]
+        rows = dict()
+        names = []
+        for span in self.GetSpans():
+            if not span.name in rows:
+                rows[span.name] = [0, 0.0, 0.0, 0.0]
+                names.append(span.name)
+            row = rows[span.name]
+            row[0] += 1
+            row[1] += span.duration
+            row[2] += max(0.0, span.duration - span.childDuration)
+            row[3] = max(row[3], span.duration)
+        width = max([len(x) for x in names] + [len("span")])
+        lines = ["%-*s %8s %12s %12s %12s" % (width, "span", "calls", "total (s)", "self (s)", "max (s)")]
+        for name in sorted(names, key = lambda x: -rows[x][1]):
+            (count, total, selfTime, longest) = rows[name]
+            lines.append("%-*s %8d %12.3f %12.3f %12.3f" % (width, name, count, total, selfTime, longest))
+        return "\n".join(lines) + "\n"
+
+    def WriteProfiles(self, _folder):
+        """
+        Writes the cProfile statistics of each profiled phase to _folder, as <number>_<span name>.prof (in order of the
+        start of the phases; they can be read with the pstats module). Returns the names of the written files.
+        """
+        result = []
+        profiled = [x for x in self.GetSpans() if not x.profile is None]
+        if len(profiled) and not os.path.exists(_folder):
+            os.makedirs(_folder)
+        for (index, span) in enumerate(profiled):
+            name = "".join([x for x in span.name.title() if x.isalnum()])
+            filename = "%s/%03d_%s.prof" % (_folder, index, name)
+            span.profile.dump_stats(filename)
+            result.append(filename)
+        return result
+
+    def Write(self, _folder):
+        """
+        Writes the trace (csnakeProfile.json), the summary (csnakeProfile.txt) and the profiles of the phases
+        (the csnakeProfile folder) to _folder. Returns the summary.
+        """
+        if not os.path.exists(_folder):
+            os.makedirs(_folder)
+        self.WriteTrace("%s/csnakeProfile.json" % _folder)
+        summary = self.GetSummary()
+        f = open("%s/csnakeProfile.txt" % _folder, "w")
+        try:
+            f.write(summary)
+        finally:
+            f.close()
+        self.WriteProfiles("%s/csnakeProfile" % _folder)
+        return summary
+
+profiler = Profiler()
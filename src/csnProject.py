@@ -8,8 +8,8 @@ import csnCompile
 import csnTests
 import inspect
 import os.path
+import sys
 import types
-import new
 from csnUtility import MakeValidIdentifier
 import re
 
@@ -20,14 +20,14 @@ def FindFilename(level = 0):
     level - 0: Find filename of the script calling FindFilename (default),
             1: Find filename of the script calling the function that calls FindFilename,
             x: Find filename of the script calling FindFilename indirectly through x+1 function calls
+    The filename is taken from the code of the calling frame, without reading the source of the script.
     """
-    frame = inspect.currentframe(1+level)
+    if not hasattr(sys, "_getframe"):
+        # sys._getframe is not available with all python interpreters, so use inspect.stack as fallback option
+        return inspect.stack()[1+level][1]
+    frame = sys._getframe(1+level)
     try:
-        if frame is None:
-            # inspect.currentframe is not available with all python interpreters, so use inspect.stack as fallback option
-            filename = inspect.stack()[1+level][1]
-        else:
-            filename = inspect.getframeinfo(frame)[0]
+        filename = frame.f_code.co_filename
     finally:
         # make sure the reference to the frame is deleted in any case (avoid cycles, see http://docs.python.org/library/inspect.html#the-interpreter-stack)
         del frame
@@ -189,13 +189,9 @@ class GenericProject(VeryGenericProject):
         VeryGenericProject.__init__(self, _name, _type, _sourceRootFolder, _categories, _context)
         
         # TODO: Remove this code in CSnake 3.0. Then this process is done exclusively in the subclass for third parties.
-        self.thirdPartyIndex = 0
-        count = 0
-        for folder in self.context.GetThirdPartyFolders():
-            if csnUtility.NormalizePath(folder) == os.path.dirname(_sourceRootFolder):
-                self.thirdPartyIndex = count
-                break
-            count += 1
+        self.thirdPartyIndex = self.context.GetThirdPartyFolderIndex(os.path.dirname(_sourceRootFolder))
+        if self.thirdPartyIndex is None:
+            self.thirdPartyIndex = 0
         
         self.rules = dict()
         self.customCommands = []
@@ -209,15 +205,7 @@ class GenericProject(VeryGenericProject):
         self.listCmakeInsertAfterTarget = list()
         self.listCmakeInsertBeginning = list()
         
-        for flag in globalCurrentContext.GetCompiler().GetCompileFlags():
-            self.__compileManager.private.definitions.append(flag)
-        
-        # Function called before "ADD_LIBARRY"
-        self.CMakeInsertBeforeTarget = new.instancemethod(SetCMakeInsertBeforeTarget, self)
-        # Function called after "ADD_LIBARRY"
-        self.CMakeInsertAfterTarget = new.instancemethod(SetCMakeInsertAfterTarget, self)
-        # Function called at the beginning of the CMakeList
-        self.CMakeInsertBeginning = new.instancemethod(SetCMakeInsertBeginning, self)
+        self.__compileManager.private.definitions.extend(globalCurrentContext.GetCompiler().GetCompileFlags())
         
 
     def AddSources(self, _listOfSourceFiles, _moc = 0, _ui = 0, _sourceGroup = "", _checkExists = 1, _forceAdd = 0):
@@ -407,6 +395,21 @@ class GenericProject(VeryGenericProject):
     def AddCMakeInsertBeginning(self, callback, wrappedProject, parameters = {}):
         self.listCmakeInsertBeginning.append((callback, wrappedProject, parameters))
 
+    # The functions below can be replaced for a single project by assigning a bound function to the attribute of the
+    # project (see csnCilab.CilabModuleProject).
+
+    def CMakeInsertBeforeTarget(self, _file):
+        """ Function called before "ADD_LIBARRY" """
+        SetCMakeInsertBeforeTarget(self, _file)
+
+    def CMakeInsertAfterTarget(self, _file):
+        """ Function called after "ADD_LIBARRY" """
+        SetCMakeInsertAfterTarget(self, _file)
+
+    def CMakeInsertBeginning(self, _file):
+        """ Function called at the beginning of the CMakeList """
+        SetCMakeInsertBeginning(self, _file)
+
 
 def SetCMakeInsertBeforeTarget(self, _file):
     for (callback, wrappedProject, parameters) in self.listCmakeInsertBeforeTarget:
@@ -443,13 +446,9 @@ class ThirdPartyProject(VeryGenericProject):
         VeryGenericProject.__init__(self, name, "third party", sourceRootFolder, None, context)
         
         # Get the thirdPartyBuildFolder index
-        self.thirdPartyIndex = 0
-        count = 0
-        for folder in self.context.GetThirdPartyFolders():
-            if csnUtility.NormalizePath(folder) == os.path.dirname(sourceRootFolder):
-                self.thirdPartyIndex = count
-                break
-            count += 1
+        self.thirdPartyIndex = self.context.GetThirdPartyFolderIndex(os.path.dirname(sourceRootFolder))
+        if self.thirdPartyIndex is None:
+            self.thirdPartyIndex = 0
     
     def GetBuildFolder(self):
         return self.context.GetThirdPartyBuildFolderByIndex(self.thirdPartyIndex)
@@ -0,0 +1,217 @@
+## @package csnProjectCache
+# Definition of the ProjectCache class.
+import cPickle
+import inspect
+import logging
+import new
+import os
+import pickle
+import sys
+import tempfile
+import types
+from cStringIO import StringIO
+
+class UncacheableError(StandardError):
+    pass
+
+def GetCacheFilename(_folder):
+    """ Returns the file in which the ProjectCache of build folder _folder is stored. """
+    return "%s/csnakeProjectCache.pickle" % _folder
+
+def _GetFileState(_filename):
+    """ Returns the size and modification time of _filename, or None if it does not exist. """
+    try:
+        stat = os.stat(_filename)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+def _IsInFolders(_filename, _folders):
+    for folder in _folders:
+        if _filename.startswith(folder + os.sep):
+            return True
+    return False
+
+class ProjectCache:
+    """
+    Stores the evaluated graph of a project (the projects, their sources, settings, files to install, rules and
+    dependencies) in a file, so that it can be loaded without running the csnake files again.
+    The stored graph is used while its fingerprint did not change. The fingerprint consists of:
+    - a key (the context values on which the graph depends, see Handler.__GetReloadKey);
+    - the size and modification time of the loaded csnake files, and of the CSnake modules;
+    - the results of the globs done while the graph was built (see Record).
+    The context is not stored: the loaded projects refer to the current context.
+    Functions, classes and methods are stored by reference to the module that defines them. A graph that refers to a
+    function or class defined in a csnake file (such as a custom command or a post cmake task defined in a csnake file),
+    or to a function that cannot be referenced (such as a lambda), is not stored: Save raises UncacheableError.
+    """
+    version = 1
+
+    def __init__(self, _filename, _key, _folders):
+        """
+        _filename - File in which the cache is stored.
+        _key - Picklable value on which the graph depends (compared with ==).
+        _folders - The folders with csnake files (root folders, third party folders, csnake file folder and prebuilt
+        projects folder).
+        """
+        self.filename = _filename
+        self.key = [self.version, sys.version, _key]
+        self.folders = [os.path.abspath(x) for x in _folders]
+        self.csnakeFolder = os.path.dirname(os.path.abspath(__file__))
+        self.__index = None
+        self.__globs = []
+
+    def Record(self, _index):
+        """ Starts recording the globs of FileSystemIndex _index (that are done while building the graph). """
+        self.__index = _index
+        self.__globs = []
+        _index.globListeners.append(self.__OnGlob)
+
+    def StopRecording(self):
+        if not self.__index is None:
+            self.__index.globListeners.remove(self.__OnGlob)
+            self.__index = None
+
+    def __OnGlob(self, _pattern, _result):
+        self.__globs.append((_pattern, list(_result)))
+
+    def Load(self, _context, _index):
+        """
+        Returns the graph stored in the cache file, with _context as context of the projects, or None if there is
+        no cache file or its fingerprint changed. _index is used to check the globs.
+        """
+        try:
+            cacheFile = open(self.filename, 'rb')
+            try:
+                data = cPickle.load(cacheFile)
+            finally:
+                cacheFile.close()
+        except (IOError, EOFError, ValueError, TypeError, cPickle.UnpicklingError):
+            return None
+        if not isinstance(data, dict) or data.get("key") != self.key:
+            return None
+        for (filename, state) in data["files"]:
+            if _GetFileState(filename) != state:
+                return None
+        for (pattern, result) in data["globs"]:
+            if _index.Glob(pattern) != result:
+                return None
+        unpickler = cPickle.Unpickler(StringIO(data["graph"]))
+        unpickler.persistent_load = lambda pid: self.__PersistentLoad(pid, _context)
+        try:
+            return unpickler.load()
+        except (AttributeError, ImportError, EOFError, ValueError, TypeError, cPickle.UnpicklingError):
+            return None
+
+    def Save(self, _graph, _context):
+        """ Stores _graph (of which the projects refer to _context), with the fingerprint of the current state. """
+        graphFile = StringIO()
+        pickler = cPickle.Pickler(graphFile, 2)
+        pickler.persistent_id = lambda obj: self.__PersistentId(obj, _context)
+        try:
+            pickler.dump(_graph)
+        except (pickle.PicklingError, cPickle.PicklingError, TypeError), e:
+            raise UncacheableError(str(e))
+        data = {
+            "key" : self.key,
+            "files" : [(x, _GetFileState(x)) for x in self.__GetLoadedFiles()],
+            "globs" : self.__globs,
+            "graph" : graphFile.getvalue()
+        }
+        folder = os.path.dirname(self.filename) or os.curdir
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        (handle, tmpFilename) = tempfile.mkstemp(prefix = os.path.basename(self.filename) + ".", suffix = ".tmp", dir = folder)
+        try:
+            cacheFile = os.fdopen(handle, 'wb')
+            try:
+                cPickle.dump(data, cacheFile, 2)
+            finally:
+                cacheFile.close()
+            if sys.platform == "win32" and os.path.exists(self.filename):
+                # os.rename does not replace an existing file on Windows
+                os.remove(self.filename)
+            os.rename(tmpFilename, self.filename)
+        except:
+            if os.path.exists(tmpFilename):
+                os.remove(tmpFilename)
+            raise
+
+    def Remove(self):
+        """ Removes the cache file. """
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def __GetLoadedFiles(self):
+        """ Returns the sources of the loaded modules that are csnake files or CSnake modules. """
+        result = []
+        for module in sys.modules.values():
+            filename = self.__GetSourceFilename(module)
+            if not filename is None and (self.__IsCsnakeFile(filename) or _IsInFolders(filename, [self.csnakeFolder])):
+                result.append(filename)
+        return sorted(result)
+
+    def __GetSourceFilename(self, _module):
+        filename = getattr(_module, "__file__", None)
+        if filename is None:
+            return None
+        (base, extension) = os.path.splitext(filename)
+        if extension in (".pyc", ".pyo"):
+            filename = base + ".py"
+        return os.path.abspath(filename)
+
+    def __IsCsnakeFile(self, _filename):
+        return _IsInFolders(_filename, self.folders)
+
+    def __IsDefinedInCsnakeFile(self, _moduleName):
+        return self.__IsCsnakeFile(self.__GetSourceFilename(sys.modules.get(_moduleName)) or "")
+
+    def __PersistentId(self, _obj, _context):
+        """
+        Functions and classes are stored by module and name (the modules that the csnake files imported, such as
+        csnCilab, may have been unloaded after loading the csnake files, so pickle cannot check them).
+        """
+        if _obj is _context:
+            return "context"
+        objType = type(_obj)
+        if objType is types.MethodType:
+            # a method of a class is stored by name, other functions bound to an object (new.instancemethod) by themselves
+            if not _obj.im_class is None:
+                for cls in inspect.getmro(_obj.im_class):
+                    for (name, value) in vars(cls).items():
+                        if value is _obj.im_func:
+                            return ("method", name, _obj.im_self, _obj.im_class)
+            return ("function", _obj.im_func, _obj.im_self, _obj.im_class)
+        if objType is types.FunctionType:
+            if _obj.func_globals.get(_obj.__name__) is not _obj:
+                raise UncacheableError("Function %s of module %s cannot be referenced" % (_obj.__name__, _obj.__module__))
+            if self.__IsCsnakeFile(_obj.func_globals.get("__file__") or ""):
+                raise UncacheableError("Function %s is defined in csnake file %s" % (_obj.__name__, _obj.__module__))
+            return ("global", _obj.__module__, _obj.__name__)
+        if objType in (types.ClassType, type):
+            if self.__IsDefinedInCsnakeFile(_obj.__module__):
+                raise UncacheableError("Class %s is defined in csnake file %s" % (_obj.__name__, _obj.__module__))
+            if _obj.__module__ != "__builtin__":
+                return ("global", _obj.__module__, _obj.__name__)
+        elif objType is types.ModuleType:
+            raise UncacheableError("Module %s cannot be stored" % _obj.__name__)
+        elif isinstance(_obj, logging.Logger):
+            # loggers refer to their handlers (which have locks), they are shared anyway
+            if _obj is logging.getLogger():
+                return ("logger", None)
+            return ("logger", _obj.name)
+        return None
+
+    def __PersistentLoad(self, _pid, _context):
+        if _pid == "context":
+            return _context
+        if isinstance(_pid, tuple) and _pid[0] == "method":
+            return new.instancemethod(getattr(_pid[3], _pid[1]).im_func, _pid[2], _pid[3])
+        if isinstance(_pid, tuple) and _pid[0] == "function":
+            return new.instancemethod(*_pid[1:])
+        if isinstance(_pid, tuple) and _pid[0] == "logger":
+            return logging.getLogger(_pid[1])
+        if isinstance(_pid, tuple) and _pid[0] == "global":
+            __import__(_pid[1])
+            return getattr(sys.modules[_pid[1]], _pid[2])
+        raise cPickle.UnpicklingError("Unknown persistent id: %s" % (_pid,))
@@ -1,6 +1,5 @@
 ## @package csnProjectPaths
 # Definition of the Project path handling related class. 
-import glob
 import os
 import csnUtility
 
@@ -22,6 +21,9 @@ class Manager:
         self.useFilePath = "%s/Use%s.cmake" % (self.buildSubFolder, self.project.name)
         self.cmakeListsSubpath = "%s/CMakeLists.txt" % (self.buildSubFolder)
         self.sourceRootFolder = _sourceRootFolder
+        # pattern -> last result of each glob of this project, used to find out if the project must be evaluated again
+        # (keyed by pattern: kept projects glob the same patterns again when they are generated again)
+        self.globs = dict()
         
     def PrependRootFolderToRelativePath(self, _path):
         """ 
@@ -37,6 +39,8 @@ class Manager:
         Returns a list of files that match _path (which can be absolute, or relative to self.sourceRootFolder). 
         If _path is a list, then every element of _path will be Globbed.
         The return paths are absolute, containing only forward slashes.
+        Patterns in the root folders and third party source folders of the context are matched against the in-memory
+        snapshot in csnUtility.fileSystemIndex.
         """
         if type(_path) == type(list()):
             result = []
@@ -45,7 +49,15 @@ class Manager:
                 result.extend(moreResults)
             return [csnUtility.NormalizePath(x) for x in result]
         else:
-            return [csnUtility.NormalizePath(x) for x in glob.glob(self.PrependRootFolderToRelativePath(_path))]
+            context = self.project.context
+            csnUtility.fileSystemIndex.SetFolders(
+                context.GetRootFolders() + context.GetThirdPartyFolders(),
+                [context.GetBuildFolder()] + context.GetThirdPartyBuildFolders()
+            )
+            pattern = self.PrependRootFolderToRelativePath(_path)
+            result = csnUtility.fileSystemIndex.Glob(pattern)
+            self.globs[pattern] = result
+            return [csnUtility.NormalizePath(x) for x in result]
         
     def GetPathToUseFile(self):
         """ 
@@ -0,0 +1,123 @@
+## @package csnScheduler
+# Definition of the Scheduler class.
+import threading
+import Queue
+import sys
+import csnThreadPool
+
+class CyclicDependencyError(StandardError):
+    pass
+
+class Scheduler:
+    """
+    Runs a function for a list of tasks, on a bounded number of worker threads (slots), such that a task is only started
+    when all tasks it depends on have succeeded. Tasks that do not depend on each other run concurrently.
+    The tasks can post events (e.g. progress) while they run. The events are handled in the thread that called Run, so
+    that listeners (such as the GUI) are not called from the worker threads.
+    With one slot, the tasks run in the calling thread.
+    """
+    def __init__(self, _nSlots = None):
+        """ _nSlots - Maximum number of tasks that run at the same time (default: the number of cores). """
+        if _nSlots is None:
+            _nSlots = csnThreadPool.GetNumberOfCores()
+        self.nSlots = max(1, int(_nSlots))
+
+    def Run(self, _tasks, _dependencies, _function, _onEvent = None, _isCanceled = None):
+        """
+        Calls _function(task, postEvent) for each task in _tasks, and returns a dictionary from task to result: True if
+        _function returned a true value, False if it returned a false value or raised an exception, and None if the task
+        was not started (because a task it depends on did not succeed, or because Run was canceled).
+        _tasks - List of tasks. When several tasks can be started, they are started in this order.
+        _dependencies - Dictionary from task to the list of tasks that must succeed before it is started (tasks that
+        are not in _tasks are ignored).
+        _onEvent - If not None, _onEvent(task, event) is called for each postEvent(event) of a task.
+        _isCanceled - If not None, no more tasks are started once _isCanceled() returns true.
+        If a task raised an exception, the exception of the first such task (in the order of _tasks) is raised again
+        after all running tasks finished.
+        """
+        tasks = list(_tasks)
+        dependencies = dict()
+        for task in tasks:
+            dependencies[task] = [x for x in _dependencies.get(task, []) if x in tasks and x != task]
+        self.__CheckCycles(tasks, dependencies)
+
+        results = dict()
+        errors = dict()
+        pending = list(tasks)
+        running = set()
+        messages = Queue.Queue()
+
+        def Dispatch(_task, _event):
+            if not _onEvent is None:
+                _onEvent(_task, _event)
+
+        def Execute(_task, _postEvent):
+            try:
+                return (bool(_function(_task, _postEvent)), None)
+            except:
+                return (False, sys.exc_info())
+
+        def Worker(_task):
+            (result, error) = Execute(_task, lambda event: messages.put(("event", _task, event)))
+            messages.put(("done", _task, (result, error)))
+
+        def Finish(_task, _result, _error):
+            results[_task] = _result
+            if not _error is None:
+                errors[_task] = _error
+
+        while True:
+            # start the tasks of which the dependencies succeeded, skip the tasks of which a dependency did not succeed
+            startedOrSkipped = True
+            while startedOrSkipped:
+                startedOrSkipped = False
+                canceled = not _isCanceled is None and _isCanceled()
+                for task in list(pending):
+                    if canceled or [x for x in dependencies[task] if x in results and not results[x]]:
+                        pending.remove(task)
+                        results[task] = None
+                        startedOrSkipped = True
+                    elif len(running) < self.nSlots and not [x for x in dependencies[task] if not x in results]:
+                        pending.remove(task)
+                        startedOrSkipped = True
+                        if self.nSlots == 1:
+                            (result, error) = Execute(task, lambda event, task = task: Dispatch(task, event))
+                            Finish(task, result, error)
+                            break
+                        running.add(task)
+                        thread = threading.Thread(target = Worker, args = (task,))
+                        thread.setDaemon(True)
+                        thread.start()
+            if not len(running):
+                break
+            # wait for events of the running tasks (with a timeout, so that the calling thread can be interrupted)
+            try:
+                message = messages.get(True, 0.1)
+            except Queue.Empty:
+                continue
+            if message[0] == "event":
+                Dispatch(message[1], message[2])
+            else:
+                running.remove(message[1])
+                Finish(message[1], *message[2])
+
+        if len(errors):
+            (excType, excValue, excTraceback) = errors[[x for x in tasks if x in errors][0]]
+            raise excType, excValue, excTraceback
+        return results
+
+    def __CheckCycles(self, _tasks, _dependencies):
+        """ Raises CyclicDependencyError if _dependencies contain a cycle. """
+        # remove tasks without unresolved dependencies until no task can be removed
+        remaining = list(_tasks)
+        resolved = set()
+        progress = True
+        while progress:
+            progress = False
+            for task in list(remaining):
+                if not [x for x in _dependencies[task] if not x in resolved]:
+                    remaining.remove(task)
+                    resolved.add(task)
+                    progress = True
+        if len(remaining):
+            raise CyclicDependencyError("Cyclic dependencies between: %s" % ", ".join([str(x) for x in remaining]))
@@ -0,0 +1,64 @@
+## @package csnThreadPool
+# Definition of the ThreadPool class.
+import threading
+import Queue
+import sys
+
+def GetNumberOfCores():
+    """ Returns the number of cores of this computer (1 if it cannot be determined). """
+    try:
+        import multiprocessing
+        return max(1, multiprocessing.cpu_count())
+    except (ImportError, NotImplementedError):
+        return 1
+
+class ThreadPool:
+    """
+    Runs a function for a list of items on a bounded number of worker threads.
+    With one thread (or a single item), the function is called in the calling thread.
+    """
+    def __init__(self, _nThreads = None):
+        """ _nThreads - Maximum number of worker threads (default: the number of cores). """
+        if _nThreads is None:
+            _nThreads = GetNumberOfCores()
+        self.nThreads = max(1, int(_nThreads))
+
+    def Map(self, _function, _items):
+        """
+        Calls _function(item) for each item in _items and returns the list of results, in the order of _items.
+        If a call raises an exception, the remaining calls are still done, and afterwards the exception of the
+        first failing item (in the order of _items) is raised again.
+        """
+        items = list(_items)
+        nThreads = min(self.nThreads, len(items))
+        if nThreads <= 1:
+            return [_function(item) for item in items]
+
+        results = [None] * len(items)
+        errors = dict()
+        work = Queue.Queue()
+        for index in range(len(items)):
+            work.put(index)
+
+        def Worker():
+            while True:
+                try:
+                    index = work.get_nowait()
+                except Queue.Empty:
+                    return
+                try:
+                    results[index] = _function(items[index])
+                except:
+                    errors[index] = sys.exc_info()
+
+        threads = [threading.Thread(target = Worker) for x in range(nThreads)]
+        for thread in threads:
+            thread.setDaemon(True)
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if len(errors):
+            (excType, excValue, excTraceback) = errors[min(errors.keys())]
+            raise excType, excValue, excTraceback
+        return results
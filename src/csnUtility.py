@@ -1,9 +1,14 @@
 ## @package csnUtility
 # Definition of utility methods. 
+import errno
 import re
 import sys
 import GlobDirectoryWalker
+import csnPathCanonicalizer
+import csnFileSystemIndex
+import csnDigestIndex
 import shutil
+import tempfile
 import inspect
 import os.path
 import logging.config
@@ -13,26 +18,31 @@ if sys.platform == 'win32':
 if sys.platform != 'win32':
     import commands
 
+# memoized implementation of CorrectPath and NormalizePath
+pathCanonicalizer = csnPathCanonicalizer.PathCanonicalizer()
+fileSystemIndex = csnFileSystemIndex.FileSystemIndex()
+# index of the third party build folders, used to resolve the files to install (see csnInstall)
+thirdPartyBuildIndex = csnFileSystemIndex.FileSystemIndex(fileSystemIndex)
+
 def CorrectPath(path):
-    (first,second) = os.path.split(path)
-    
-    if second != "":
-        firstCorrected = CorrectPath(first)
-        secondCorrected = second
-        if os.path.exists(first):
-            for name in os.listdir(first):
-                if name.lower() == second.lower():
-                    secondCorrected = name
-        return os.path.join(firstCorrected, secondCorrected)
-    else:
-        return first
+    """ Returns path, with the case of each part replaced by the case of the matching file or folder on disk. """
+    return pathCanonicalizer.CorrectPath(path)
 
 def NormalizePath(path, _correctCase = True):
-    path = os.path.normpath(path)
-    if _correctCase:
-        path = CorrectPath(path)
-    path = path.replace("\\", "/")
-    return path
+    """ 
+    Returns the normalized path, with forward slashes. If _correctCase is true, the case of the path is corrected 
+    (see CorrectPath), but only on platforms with case insensitive file systems.
+    """
+    return pathCanonicalizer.Normalize(path, _correctCase)
+
+def InvalidatePathCache(_folder = None):
+    """
+    Tells CorrectPath, NormalizePath and the file system indices that files were added to, renamed in or removed from
+    _folder (or its subfolders). If _folder is None, all cached folder listings are invalidated.
+    """
+    pathCanonicalizer.Invalidate(_folder)
+    fileSystemIndex.Invalidate(_folder)
+    thirdPartyBuildIndex.Invalidate(_folder)
 
 def UnNormalizePath(path):
     return os.path.normpath(path).replace("/", "\\")
@@ -55,6 +65,7 @@ def CopyFolder(fromFolder, toFolder, excludedFolderList = None):
             if not os.path.exists(targetFolder):
                 os.makedirs(targetFolder)
             shutil.copy(file, target)
+    InvalidatePathCache(toFolder)
             
 def IsWindowsPlatform():
     """ Returns true if the python script is running on Windows. """
@@ -87,14 +98,9 @@ def Join(_theList, _addQuotes = 0):
     Returns a string that contains the items of theList separated by spaces.
     _addQuotes - If true, then each item is also placed in "quotes".
     """
-    joined = ""
-    
-    for x in _theList:
-        item = str(x)
-        if _addQuotes:
-            item = '"' + item + '"'
-        joined = joined + item + " "
-    return joined
+    if _addQuotes:
+        return "".join(['"' + str(x) + '" ' for x in _theList])
+    return "".join([str(x) + " " for x in _theList])
 
 def LoadModule(_folder, _name):
     """ 
@@ -136,19 +142,85 @@ def GetDummyCppFilename():
     """
     return GetRootOfCSnake() + "/resources/csnake_dummy.cpp"
 
-def ReplaceDestinationFileIfDifferent(sourceFile, destinationFile):
-    if FileToString(sourceFile) != FileToString(destinationFile):
-        result = (0 != shutil.copy(sourceFile, destinationFile))
-        assert result, "\n\nError: Could not copy from %s to %s/n" % (sourceFile, destinationFile)
+def ReplaceDestinationFileIfDifferent(sourceFile, destinationFile, _digestIndex = None):
+    """
+    Copies the text of sourceFile to destinationFile, unless destinationFile already has this text.
+    _digestIndex - csnDigestIndex.DigestIndex with the digests of the previously written files (optional).
+    """
+    WriteFileIfDifferent(destinationFile, FileToString(sourceFile), _digestIndex = _digestIndex)
         
 # (YM) debug output of the overwritten file to check differences
-def ReplaceDestinationFileIfDifferentAndSaveBackup(sourceFile, destinationFile):
-    if FileToString(sourceFile) != FileToString(destinationFile):
-        if os.path.exists(destinationFile):
-            result = (0 != shutil.copy(destinationFile, (destinationFile + ".old")))
-            assert result, "\n\nError: Could not copy from %s to %s/n" % (destinationFile, (destinationFile + ".old"))
-        result = (0 != shutil.copy(sourceFile, destinationFile))
-        assert result, "\n\nError: Could not copy from %s to %s/n" % (sourceFile, destinationFile)
+def ReplaceDestinationFileIfDifferentAndSaveBackup(sourceFile, destinationFile, _saveBackup = True, _digestIndex = None):
+    """
+    As ReplaceDestinationFileIfDifferent. If _saveBackup is true, the replaced destinationFile is copied to destinationFile.old.
+    """
+    WriteFileIfDifferent(destinationFile, FileToString(sourceFile), _saveBackup = _saveBackup, _digestIndex = _digestIndex)
+
+def FileHasText(_filename, _text, _digestIndex = None):
+    """
+    Returns true if file _filename exists and contains _text. The file is compared by its size (if the platform does not
+    translate line endings) and by the md5 digest of its contents, which is computed while reading the file in blocks.
+    _digestIndex - If not None, the digest is taken from this csnDigestIndex.DigestIndex if the file did not change since
+    it was recorded.
+    """
+    size = None
+    if os.linesep == "\n":
+        size = len(_text)
+    if not _digestIndex is None:
+        return _digestIndex.FileHasDigest(_filename, csnDigestIndex.TextDigest(_text), size)
+    if not os.path.isfile(_filename):
+        return False
+    if not size is None and os.path.getsize(_filename) != size:
+        return False
+    return csnDigestIndex.FileDigest(_filename) == csnDigestIndex.TextDigest(_text)
+
+def _CreateTemporaryFile(_filename):
+    """
+    Creates a new file next to _filename, and returns its handle and name. Unlike tempfile.mkstemp, the file gets the
+    permissions of a new file (0666 minus the umask at this moment), so that it can replace a file that does not exist yet.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0) | getattr(os, "O_NOINHERIT", 0)
+    for attempt in range(tempfile.TMP_MAX):
+        tmpFilename = "%s.%s.tmp" % (_filename, os.urandom(6).encode("hex"))
+        try:
+            return (os.open(tmpFilename, flags, 0666), tmpFilename)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+    raise IOError(errno.EEXIST, "No temporary file name available for %s" % _filename)
+
+def WriteFileIfDifferent(_filename, _text, _saveBackup = False, _digestIndex = None):
+    """
+    Writes _text to file _filename, unless the file already contains _text. Returns true if the file was written.
+    The file is replaced atomically: _text is written to a temporary file in the same folder, which is then renamed.
+    _saveBackup - If true, the previous version of the file is copied to _filename.old.
+    _digestIndex - If not None, the csnDigestIndex.DigestIndex that is used to compare the file, and in which the
+    digest of the written file is recorded.
+    """
+    if FileHasText(_filename, _text, _digestIndex):
+        return False
+    (handle, tmpFilename) = _CreateTemporaryFile(_filename)
+    try:
+        f = os.fdopen(handle, 'w')
+        try:
+            f.write(_text)
+        finally:
+            f.close()
+        if os.path.exists(_filename):
+            shutil.copymode(_filename, tmpFilename)
+            if _saveBackup:
+                shutil.copy(_filename, _filename + ".old")
+            if IsWindowsPlatform():
+                # os.rename does not replace an existing file on Windows
+                os.remove(_filename)
+        os.rename(tmpFilename, _filename)
+    except:
+        if os.path.exists(tmpFilename):
+            os.remove(tmpFilename)
+        raise
+    if not _digestIndex is None:
+        _digestIndex.Record(_filename, csnDigestIndex.TextDigest(_text))
+    return True
 
 def Matches(string, pattern):
     result = False
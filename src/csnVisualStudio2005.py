@@ -74,9 +74,10 @@ class Compiler64(Compiler):
         return True
 
 class PostProcessor:
-    def Do(self, _project):
+    def Do(self, _project, _digestIndex = None):
         """
         Post processes the vcproj file generated for _project.
+        _digestIndex - csnDigestIndex.DigestIndex of the generated files (not used).
         """
         
         if not _project.dependenciesManager.isTopLevel:
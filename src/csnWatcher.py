@@ -0,0 +1,273 @@
+## @package csnWatcher
+# Definition of the Watcher classes, which report the files that are added, removed or changed in a set of folders.
+import errno
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+try:
+    # optional: inotify is used through the C library on Linux
+    import ctypes
+except ImportError:
+    ctypes = None
+
+# inotify event flags (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+_eventHeader = struct.Struct("iIII")
+
+def _LoadLibC():
+    if ctypes is None or not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno = True)
+        # check that the C library has inotify
+        libc.inotify_init
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+_libc = _LoadLibC()
+
+def _ToBytes(_path):
+    # the watched paths are byte strings, so that they can be joined with the names in the inotify events
+    if isinstance(_path, unicode):
+        return _path.encode(sys.getfilesystemencoding() or "utf-8")
+    return _path
+
+def _SplitPath(_path):
+    return [x for x in os.path.normpath(_path).replace("\\", "/").split("/") if x != ""]
+
+def MatchesPattern(_path, _pattern):
+    """
+    True if adding, removing or renaming _path can change the result of glob pattern _pattern: _path matches the
+    pattern, or _path is a folder in which files matching the pattern may be found (e.g. folder a/b for pattern a/*/*.cpp).
+    """
+    pathParts = _SplitPath(_path)
+    patternParts = _SplitPath(_pattern)
+    if len(pathParts) > len(patternParts):
+        return False
+    for (pathPart, patternPart) in zip(pathParts, patternParts):
+        if not fnmatch.fnmatch(pathPart, patternPart):
+            return False
+    return True
+
+def IsInotifySupported():
+    """ True if the folders can be watched with inotify (on Linux). """
+    return not _libc is None
+
+def CreateWatcher(_folders, _excludedFolders = (), _pollInterval = 1.0, _usePolling = False):
+    """
+    Returns an InotifyWatcher for _folders if inotify is supported, else (or if _usePolling is true, or if the folders
+    cannot be watched with inotify) a PollingWatcher that scans the folders every _pollInterval seconds.
+    """
+    if not _usePolling and IsInotifySupported():
+        try:
+            return InotifyWatcher(_folders, _excludedFolders)
+        except OSError, e:
+            # e.g. the limit of inotify watches per user (fs.inotify.max_user_watches) is reached
+            logging.getLogger("CSnake").warn("Cannot watch the folders with inotify (%s), polling them instead." % e)
+    return PollingWatcher(_folders, _excludedFolders, _pollInterval)
+
+class Watcher:
+    """
+    Base class of the watchers. A watcher reports the files and folders that are added, removed or changed below the
+    watched folders (not below the excluded folders) since the previous report. Subclasses implement ReadChanges.
+    """
+    name = "none"
+
+    def __init__(self, _folders, _excludedFolders = ()):
+        # nested folders are watched once
+        folders = sorted(set([os.path.abspath(_ToBytes(x)) for x in _folders if x != ""]))
+        self.folders = [x for x in folders if not self.__IsBelow(x, [y for y in folders if y != x])]
+        self.excludedFolders = [os.path.abspath(_ToBytes(x)) for x in _excludedFolders if x != ""]
+
+    def __IsBelow(self, _path, _folders):
+        for folder in _folders:
+            if _path == folder or _path.startswith(os.path.join(folder, "")):
+                return True
+        return False
+
+    def IsExcluded(self, _path):
+        return self.__IsBelow(_path, self.excludedFolders)
+
+    def ReadChanges(self, _timeout):
+        """ Waits at most _timeout seconds for changes, and returns the set of changed paths (empty if there were none). """
+        raise NotImplementedError()
+
+    def WaitForChanges(self, _debounce = 0.5, _timeout = None):
+        """
+        Waits for changes, and returns the sorted list of the changed paths. A burst of changes (such as a checkout)
+        is reported at once: after a change, the changes are collected until there is no change for _debounce seconds.
+        Returns an empty list if there was no change within _timeout seconds (None: wait until there is a change).
+        """
+        if _timeout is None:
+            deadline = None
+        else:
+            deadline = time.time() + _timeout
+        changes = set()
+        while not len(changes):
+            if deadline is None:
+                timeout = 3600.0
+            else:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    return []
+            changes |= self.ReadChanges(timeout)
+        while True:
+            moreChanges = self.ReadChanges(_debounce)
+            if not len(moreChanges):
+                break
+            changes |= moreChanges
+        return sorted(changes)
+
+    def Close(self):
+        pass
+
+class PollingWatcher(Watcher):
+    """ Finds the changes by comparing the size and modification time of the files in snapshots of the folders. """
+    name = "polling"
+
+    def __init__(self, _folders, _excludedFolders = (), _pollInterval = 1.0):
+        Watcher.__init__(self, _folders, _excludedFolders)
+        self.pollInterval = _pollInterval
+        self.__snapshot = self.__Scan()
+
+    def __Scan(self):
+        """ Returns a dictionary from the paths below the watched folders to their (size, modification time), or None for folders. """
+        result = dict()
+        for folder in self.folders:
+            for (path, folderNames, fileNames) in os.walk(folder):
+                folderNames[:] = [x for x in folderNames if not self.IsExcluded(os.path.join(path, x))]
+                for name in folderNames:
+                    result[os.path.join(path, name)] = None
+                for name in fileNames:
+                    filename = os.path.join(path, name)
+                    try:
+                        stat = os.stat(filename)
+                    except OSError:
+                        continue
+                    result[filename] = (stat.st_size, stat.st_mtime)
+        return result
+
+    def ReadChanges(self, _timeout):
+        deadline = time.time() + _timeout
+        while True:
+            time.sleep(max(0, min(self.pollInterval, deadline - time.time())))
+            snapshot = self.__Scan()
+            changes = set()
+            for (path, state) in snapshot.iteritems():
+                if not path in self.__snapshot or self.__snapshot[path] != state:
+                    changes.add(path)
+            for path in self.__snapshot:
+                if not path in snapshot:
+                    changes.add(path)
+            self.__snapshot = snapshot
+            if len(changes) or time.time() >= deadline:
+                return changes
+
+class InotifyWatcher(Watcher):
+    """ Receives the changes from the Linux kernel (inotify), with a watch on each folder. """
+    name = "inotify"
+    mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+
+    def __init__(self, _folders, _excludedFolders = ()):
+        """ Raises OSError if inotify is not supported, or if a folder cannot be watched. """
+        Watcher.__init__(self, _folders, _excludedFolders)
+        if _libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not supported on this platform")
+        self.__fd = _libc.inotify_init()
+        if self.__fd < 0:
+            self.__RaiseError()
+        # watch descriptor -> watched folder
+        self.__watches = dict()
+        try:
+            for folder in self.folders:
+                self.__AddWatches(folder)
+        except:
+            self.Close()
+            raise
+
+    def __RaiseError(self, _path = None):
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), _path)
+
+    def __AddWatches(self, _folder):
+        """ Watches _folder and its subfolders. Returns the files and folders found below _folder. """
+        result = []
+        for (path, folderNames, fileNames) in os.walk(_folder):
+            folderNames[:] = [x for x in folderNames if not self.IsExcluded(os.path.join(path, x))]
+            wd = _libc.inotify_add_watch(self.__fd, path, self.mask)
+            if wd < 0:
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                    # removed while walking
+                    continue
+                self.__RaiseError(path)
+            self.__watches[wd] = path
+            result.extend([os.path.join(path, x) for x in folderNames + fileNames])
+        return result
+
+    def ReadChanges(self, _timeout):
+        try:
+            (readable, unused, unused) = select.select([self.__fd], [], [], max(0, _timeout))
+        except select.error, e:
+            if e.args[0] == errno.EINTR:
+                return set()
+            raise
+        if not len(readable):
+            return set()
+        data = os.read(self.__fd, 65536)
+        changes = set()
+        offset = 0
+        while offset + _eventHeader.size <= len(data):
+            (wd, mask, cookie, nameLength) = _eventHeader.unpack_from(data, offset)
+            offset += _eventHeader.size
+            name = data[offset:offset + nameLength].rstrip("\0")
+            offset += nameLength
+            if mask & IN_Q_OVERFLOW:
+                # events were lost: report the watched folders
+                changes.update(self.folders)
+                continue
+            folder = self.__watches.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                # the folder was removed (its removal is reported by the parent folder)
+                del self.__watches[wd]
+                continue
+            if name == "":
+                changes.add(folder)
+                continue
+            path = os.path.join(folder, name)
+            if self.IsExcluded(path):
+                continue
+            changes.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # files may have been added to the new folder before it was watched
+                try:
+                    changes.update(self.__AddWatches(path))
+                except OSError, e:
+                    logging.getLogger("CSnake").warn("Cannot watch %s: %s" % (path, e))
+        return changes
+
+    def Close(self):
+        if not self.__fd is None:
+            os.close(self.__fd)
+            self.__fd = None
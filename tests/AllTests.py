@@ -14,9 +14,23 @@ from csnGUIHandlerTests import csnGUIHandlerTests
 from csnProjectTests import csnProjectTests
 from csnUtilityTests import csnUtilityTests
 from csnContextTests import csnContextTests
+from csnDependenciesTests import csnDependenciesTests
 from csnGUIOptionsTests import csnGUIOptionsTests
+from csnProfilerTests import csnProfilerTests
+from csnFileSystemStatsTests import csnFileSystemStatsTests
+from csnThreadPoolTests import csnThreadPoolTests
+from csnPathCanonicalizerTests import csnPathCanonicalizerTests
+from csnFileSystemIndexTests import csnFileSystemIndexTests
+from csnDigestIndexTests import csnDigestIndexTests
+from csnSchedulerTests import csnSchedulerTests
+from csnProcessTests import csnProcessTests
+from csnModuleTrackerTests import csnModuleTrackerTests
+from csnProjectCacheTests import csnProjectCacheTests
+from csnDaemonTests import csnDaemonTests
+from csnWatcherTests import csnWatcherTests
 from aboutTests import AboutTests
 from versionTests import VersionTests
+from orderedSetTests import OrderedSetTests
 from csnInstallTests import csnInstallTests
 from csnCilabTests import csnCilabTests
 from csnAPITests import csnAPITests
@@ -84,13 +98,27 @@ class AllTests:
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnBuildTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnCilabTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnContextTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnDependenciesTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnGUIHandlerTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnGUIOptionsTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnProfilerTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnFileSystemStatsTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnInstallTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnPathCanonicalizerTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnFileSystemIndexTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnDigestIndexTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnSchedulerTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnProcessTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnModuleTrackerTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnProjectCacheTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnDaemonTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnWatcherTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnProjectTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(csnThreadPoolTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(csnUtilityTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(AboutTests) )
         tests.append( unittest.TestLoader().loadTestsFromTestCase(VersionTests) )
+        tests.append( unittest.TestLoader().loadTestsFromTestCase(OrderedSetTests) )
         # main suite
         self.__suite = unittest.TestSuite(tests)
         # output file name
@@ -0,0 +1,60 @@
+## @package fileSystemIndexBenchmark
+# Benchmark of the FileSystemIndex class.
+# \ingroup tests
+#
+# Creates a synthetic source tree with libmodules (each with a src and an include folder) in a temporary folder,
+# and times the glob patterns of AddLibraryModules (one per module folder and file extension) with glob.glob,
+# with a cold index (each folder is listed once) and with a warm index (no folder is listed).
+# Run from the tests folder with the csnake src folder in the python path:
+#   python benchmarks/fileSystemIndexBenchmark.py [number of modules ...]
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+import csnUtility
+import csnFileSystemIndex
+
+def CreateTree(_folder, _nModules, _nFiles = 10):
+    """ Creates _nModules libmodules in _folder, returns the list of glob patterns to evaluate. """
+    patterns = []
+    extensions = csnUtility.GetSourceFileExtensions() + csnUtility.GetIncludeFileExtensions()
+    for module in range(_nModules):
+        for (subFolder, extension) in (("src", "cpp"), ("include", "h")):
+            folder = "%s/libmodules/module%s/%s" % (_folder, module, subFolder)
+            os.makedirs(folder)
+            for index in range(_nFiles):
+                open("%s/file%s.%s" % (folder, index, extension), "w").close()
+            patterns.extend(["%s/*.%s" % (folder, x) for x in extensions])
+    return patterns
+
+def Measure(_glob, _patterns):
+    start = time.time()
+    nFiles = 0
+    for pattern in _patterns:
+        nFiles += len(_glob(pattern))
+    return (time.time() - start, nFiles)
+
+def main():
+    sizes = [10, 100, 1000]
+    if len(sys.argv) > 1:
+        sizes = [int(x) for x in sys.argv[1:]]
+    print "%10s %10s %15s %15s %15s %12s" % ("modules", "patterns", "glob (s)", "cold index (s)", "warm index (s)", "listdirs")
+    for size in sizes:
+        folder = tempfile.mkdtemp()
+        try:
+            patterns = CreateTree(folder, size)
+            (timeGlob, nGlob) = Measure(glob.glob, patterns)
+            index = csnFileSystemIndex.FileSystemIndex()
+            index.SetFolders([folder])
+            (timeCold, nCold) = Measure(index.Glob, patterns)
+            (timeWarm, nWarm) = Measure(index.Glob, patterns)
+            assert nGlob == nCold == nWarm
+            print "%10d %10d %15.5f %15.5f %15.5f %12d" % (size, len(patterns), timeGlob, timeCold, timeWarm, index.GetStatistics()["listdirCalls"])
+        finally:
+            shutil.rmtree(folder)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
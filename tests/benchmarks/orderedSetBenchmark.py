@@ -0,0 +1,57 @@
+## @package orderedSetBenchmark
+# Micro-benchmark of the OrderedSet class.
+# \ingroup tests
+#
+# Compares the hash indexed OrderedSet with the previous list based implementation
+# (linear membership tests) for a growing number of elements.
+# Run from the tests folder with the csnake src folder in the python path:
+#   python benchmarks/orderedSetBenchmark.py
+import sys
+import timeit
+from OrderedSet import OrderedSet
+
+class ListOrderedSet(list):
+    """ Reference implementation: the list based OrderedSet from CSnake <= 2.5.1. """
+    def add(self, element):
+        if not element in self:
+            list.append(self, element)
+
+    def update(self, iterable):
+        for element in iterable:
+            self.add(element)
+
+class Element(object):
+    """ Hashable by identity, like the csnake projects. """
+    pass
+
+def Fill(_class, _elements):
+    """ Add every element twice (the second time is a pure membership test), and subtract half of them. """
+    orderedSet = _class()
+    orderedSet.update(_elements)
+    orderedSet.update(_elements)
+    half = _class()
+    half.update(_elements[::2])
+    return [x for x in orderedSet if not x in half]
+
+def Measure(_class, _elements, _repeat):
+    timer = timeit.Timer(lambda: Fill(_class, _elements))
+    return min(timer.repeat(repeat = _repeat, number = 1))
+
+def main():
+    sizes = [100, 1000, 10000]
+    if len(sys.argv) > 1:
+        sizes = [int(x) for x in sys.argv[1:]]
+    print "%10s %15s %15s %10s" % ("elements", "list (s)", "indexed (s)", "speedup")
+    for size in sizes:
+        elements = [Element() for _ in range(size)]
+        # the list based version is quadratic, do not repeat the big runs too often
+        repeat = 3
+        if size > 1000:
+            repeat = 1
+        timeList = Measure(ListOrderedSet, elements, repeat)
+        timeIndexed = Measure(OrderedSet, elements, 3)
+        print "%10d %15.5f %15.5f %9.1fx" % (size, timeList, timeIndexed, timeList / max(timeIndexed, 1e-9))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
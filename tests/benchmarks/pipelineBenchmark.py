@@ -0,0 +1,220 @@
+## @package pipelineBenchmark
+# Benchmark of the phases of configuring a synthetic project tree (see syntheticProjects) with csnGUIHandler.Handler.
+# \ingroup tests
+#
+# For each number of projects, a tree is created in a temporary folder, and the time of each phase is measured:
+# loading the context file, loading the csnake modules, creating the project instance, resolving the files to install,
+# generating the cmake files, generating them again (nothing changed), writing projectData.json, post-processing and
+# installing the third party files. The results are printed as a scaling report, and can be written to a json file
+# and compared with the json file of an earlier run (e.g. of another commit).
+# Run from the tests folder with the csnake src folder in the python path:
+#   python benchmarks/pipelineBenchmark.py [options] [number of projects ...]
+# For example, to compare a commit with the baseline:
+#   python benchmarks/pipelineBenchmark.py --output baseline.json 10 100 1000 10000
+#   python benchmarks/pipelineBenchmark.py --compare baseline.json 10 100 1000 10000
+import json
+import math
+import optparse
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import csnGUIHandler
+import csnModuleTracker
+import syntheticProjects
+
+# the phases, in the order in which they are run
+phases = ["context", "modules", "instance", "resolveInstall", "generate", "regenerate", "dump", "postProcess", "install"]
+
+def GetCommit():
+    """ Returns the git commit of the csnake sources, or None if it is not known. """
+    folder = os.path.dirname(os.path.abspath(csnGUIHandler.__file__))
+    try:
+        process = subprocess.Popen(["git", "rev-parse", "--short", "HEAD"], cwd = folder, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        output = process.communicate()[0].strip()
+    except OSError:
+        return None
+    if process.returncode != 0 or output == "":
+        return None
+    return output
+
+def RunPhases(_contextFilename, _numberOfJobs = None):
+    """ Configures the tree of context file _contextFilename, and returns a dictionary from phase to time in seconds. """
+    times = dict()
+    state = dict()
+    handler = csnGUIHandler.Handler()
+    handler.SetUseProjectCache(False)
+    if not _numberOfJobs is None:
+        handler.SetNumberOfJobs(_numberOfJobs)
+    handler.generator.numberOfJobs = handler.GetNumberOfJobs()
+    def Instance():
+        state["manager"] = handler.GetInstallManager()
+        state["instance"] = state["manager"].project
+    steps = {
+        "context" : lambda: handler.LoadContext(_contextFilename),
+        "modules" : handler.GetListOfPossibleTargets,
+        "instance" : Instance,
+        "resolveInstall" : lambda: state["manager"].ResolvePathsOfFilesToInstall(),
+        "generate" : lambda: handler.generator.Generate(state["instance"]),
+        "regenerate" : lambda: handler.generator.Generate(state["instance"]),
+        "dump" : lambda: handler.WriteDumpFileAndProjectStructureToBuildFolder(state["instance"]),
+        "postProcess" : lambda: handler.generator.PostProcess(state["instance"]),
+        "install" : handler.InstallBinariesToBuildFolder
+    }
+    try:
+        for phase in phases:
+            start = time.time()
+            steps[phase]()
+            times[phase] = time.time() - start
+        instance = state["instance"]
+        counts = {
+            "projects" : len(instance.GetProjects(_recursive = True, _includeSelf = True)),
+            "sources" : sum([len(x.GetSources()) for x in instance.GetProjects(_recursive = True, _includeSelf = True)]),
+            "installedFiles" : len(state["manager"].PlanInstallBinariesToBuildFolder())
+        }
+    finally:
+        # the next tree has modules with the same names
+        csnModuleTracker.tracker.Clear()
+    return (times, counts)
+
+def Run(_parameters, _repeat = 1, _numberOfJobs = None, _keepFolder = None):
+    """
+    Creates a tree with _parameters, and configures it _repeat times (from scratch). Returns the result of the run
+    (the fastest time of each phase). If _keepFolder is given, the tree is created in that folder and kept.
+    """
+    if _keepFolder is None:
+        folder = os.path.realpath(tempfile.mkdtemp())
+    else:
+        folder = os.path.realpath(_keepFolder)
+    try:
+        start = time.time()
+        contextFilename = syntheticProjects.CreateTree(folder, _parameters)
+        creationTime = time.time() - start
+        best = None
+        for index in range(_repeat):
+            # start from an empty build folder
+            if os.path.exists("%s/build/bin" % folder):
+                shutil.rmtree("%s/build/bin" % folder)
+            (times, counts) = RunPhases(contextFilename, _numberOfJobs)
+            if best is None:
+                best = times
+            else:
+                for phase in phases:
+                    best[phase] = min(best[phase], times[phase])
+    finally:
+        if _keepFolder is None:
+            shutil.rmtree(folder)
+    return {
+        "parameters" : _parameters.Dump(),
+        "counts" : counts,
+        "treeCreation" : creationTime,
+        "phases" : best,
+        "total" : sum(best.values())
+    }
+
+def GetScalingExponent(_runA, _runB, _phase):
+    """ Returns k in time ~ projects^k between two runs, or None if it cannot be determined (times too small). """
+    (nA, nB) = (_runA["parameters"]["nProjects"], _runB["parameters"]["nProjects"])
+    if _phase == "total":
+        (tA, tB) = (_runA["total"], _runB["total"])
+    else:
+        (tA, tB) = (_runA["phases"][_phase], _runB["phases"][_phase])
+    if nA == nB or tA < 1e-3 or tB < 1e-3:
+        return None
+    return math.log(tB / tA) / math.log(float(nB) / nA)
+
+def PrintReport(_runs):
+    columns = phases + ["total"]
+    print "Time (s)"
+    print "%10s" % "projects" + "".join(["%15s" % x for x in columns]) + "%15s" % "per project"
+    for run in _runs:
+        values = [run["phases"][x] for x in phases] + [run["total"]]
+        perProject = "%.0f us" % (run["total"] * 1e6 / run["parameters"]["nProjects"])
+        print "%10d" % run["parameters"]["nProjects"] + "".join(["%15.3f" % x for x in values]) + "%15s" % perProject
+    if len(_runs) > 1:
+        print
+        print "Scaling exponent (time ~ projects^k, 1 is linear)"
+        print "%10s" % "projects" + "".join(["%15s" % x for x in columns])
+        for (runA, runB) in zip(_runs[:-1], _runs[1:]):
+            line = "%10s" % ("%s-%s" % (runA["parameters"]["nProjects"], runB["parameters"]["nProjects"]))
+            for phase in columns:
+                exponent = GetScalingExponent(runA, runB, phase)
+                if exponent is None:
+                    line += "%15s" % "-"
+                else:
+                    line += "%15.2f" % exponent
+            print line
+
+def PrintComparison(_runs, _baseline):
+    """ Prints the ratio of the times of _runs and the times of the runs with the same parameters in _baseline. """
+    print
+    print "Compared with %s (new time / old time)" % (_baseline.get("commit") or "the baseline")
+    columns = phases + ["total"]
+    print "%10s" % "projects" + "".join(["%15s" % x for x in columns])
+    for run in _runs:
+        matching = [x for x in _baseline["runs"] if x["parameters"] == run["parameters"]]
+        if not len(matching):
+            print "%10d %s" % (run["parameters"]["nProjects"], "not in the baseline")
+            continue
+        line = "%10d" % run["parameters"]["nProjects"]
+        for phase in columns:
+            if phase == "total":
+                (new, old) = (run["total"], matching[0]["total"])
+            else:
+                (new, old) = (run["phases"][phase], matching[0]["phases"].get(phase))
+            if old is None or old < 1e-3:
+                line += "%15s" % "-"
+            else:
+                line += "%15.2f" % (new / old)
+        print line
+
+def main():
+    parser = optparse.OptionParser(usage = "%prog [options] [number of projects ...]")
+    parser.add_option("--depth", type = "int", default = 5, help = "number of layers of libraries")
+    parser.add_option("--fan-out", dest = "fanOut", type = "int", default = 3, help = "number of libraries that a library uses")
+    parser.add_option("--sources", type = "int", default = 10, help = "number of sources (and headers) per library")
+    parser.add_option("--third-party-folders", dest = "thirdPartyFolders", type = "int", default = 5, help = "number of third party folders")
+    parser.add_option("--install-patterns", dest = "installPatterns", type = "int", default = 2, help = "number of install patterns per third party project")
+    parser.add_option("--files-per-pattern", dest = "filesPerPattern", type = "int", default = 4, help = "number of files that an install pattern finds")
+    parser.add_option("--repeat", type = "int", default = 1, help = "configure each tree this number of times, and keep the fastest times")
+    parser.add_option("-j", "--jobs", dest = "jobs", type = "int", default = None, help = "number of jobs of the generator and the install")
+    parser.add_option("--output", default = None, help = "write the results to this json file")
+    parser.add_option("--compare", default = None, help = "compare the results with this json file (of an earlier run)")
+    parser.add_option("--keep", default = None, help = "create the tree in this folder and keep it (only with one number of projects)")
+    (options, args) = parser.parse_args()
+    sizes = [10, 100, 1000, 10000]
+    if len(args):
+        sizes = [int(x) for x in args]
+    if not options.keep is None and len(sizes) != 1:
+        parser.error("--keep needs one number of projects")
+
+    runs = []
+    for size in sizes:
+        parameters = syntheticProjects.Parameters(size, options.depth, options.fanOut, options.sources, options.thirdPartyFolders,
+            options.installPatterns, options.filesPerPattern)
+        runs.append(Run(parameters, options.repeat, options.jobs, options.keep))
+        sys.stdout.write(".")
+        sys.stdout.flush()
+    print
+    PrintReport(runs)
+
+    results = {
+        "commit" : GetCommit(),
+        "python" : platform.python_version(),
+        "platform" : platform.platform(),
+        "date" : time.strftime("%Y-%m-%d %H:%M:%S"),
+        "runs" : runs
+    }
+    if not options.compare is None:
+        PrintComparison(runs, json.load(open(options.compare)))
+    if not options.output is None:
+        f = open(options.output, "w")
+        f.write(json.dumps(results, sort_keys = True, indent = 2))
+        f.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+## @package projectConstructionBenchmark
+# Benchmark of the construction of projects.
+# \ingroup tests
+#
+# Creates projects as a large csnake graph does (applications and their test projects), in a context with a number of
+# third party folders, and reports the cost per project, and the cost of the caller lookup (FindFilename) and of the
+# third party folder lookup that each project does.
+# Run from the tests folder with the csnake src folder in the python path:
+#   python benchmarks/projectConstructionBenchmark.py [number of projects ...]
+import os
+import sys
+import time
+import tempfile
+import csnContext
+import csnProject
+
+def CreateContext(_nThirdPartyFolders = 20):
+    context = csnContext.Context()
+    context.GetData()._SetCompilername("Unix Makefiles")
+    context.FindCompiler()
+    folder = tempfile.gettempdir()
+    for index in range(_nThirdPartyFolders):
+        context.AddThirdPartySrcAndBuildFolder("%s/thirdParty%s" % (folder, index), "%s/build/thirdParty%s" % (folder, index))
+    csnProject.globalCurrentContext = context
+    return context
+
+def CreateProjects(_nProjects):
+    """ Creates _nProjects projects (half of them executables, half of them libraries), with the source root folder of this file. """
+    projects = []
+    for index in range(_nProjects / 2):
+        projects.append(csnProject.Project("App%s" % index, "executable"))
+        projects.append(csnProject.Project("Lib%s" % index, "library"))
+    return projects
+
+def Measure(_function, *_args):
+    start = time.time()
+    _function(*_args)
+    return time.time() - start
+
+def main():
+    sizes = [100, 1000, 5000]
+    if len(sys.argv) > 1:
+        sizes = [int(x) for x in sys.argv[1:]]
+    context = CreateContext()
+    folder = os.path.dirname(os.path.abspath(__file__))
+    print "%10s %12s %20s %20s %20s" % ("projects", "total (s)", "per project (us)", "FindFilename (us)", "tp index (us)")
+    for size in sizes:
+        timeProjects = Measure(CreateProjects, size)
+        timeFindFilename = Measure(lambda: [csnProject.FindFilename() for x in xrange(size)])
+        timeIndex = Measure(lambda: [context.GetThirdPartyFolderIndex(folder) for x in xrange(size)])
+        print "%10d %12.3f %20.1f %20.1f %20.1f" % (size, timeProjects, timeProjects * 1e6 / size, timeFindFilename * 1e6 / size, timeIndex * 1e6 / size)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
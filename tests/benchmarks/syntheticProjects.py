@@ -0,0 +1,161 @@
+## @package syntheticProjects
+# Creation of synthetic csnake project trees and context files, for the benchmarks.
+# \ingroup tests
+#
+# A tree has an executable (instance "app") that uses layers of libraries: the libraries of a layer use libraries of
+# the layer below, and the libraries of the bottom layer use third party projects. The third party projects install
+# files that are found in their build folders with wildcard patterns. Each library has sources and headers that are
+# found with globs, as in a real source tree:
+#
+#   folder/context.txt
+#   folder/src/App/csnBenchApp.py
+#   folder/src/Lib<i>/csnLib<i>.py, src/*.cpp, include/*.h
+#   folder/thirdParty<k>/Tp<k>/csnTp<k>.py
+#   folder/build/thirdParty<k>/Release/tp<k>/lib<p>/*.so
+#   folder/build/bin                                (the build folder of the context)
+import os
+import random
+import csnContext
+
+class Parameters:
+    """
+    Shape of a synthetic tree.
+    nProjects -- Number of projects: the executable and nProjects - 1 libraries (the third party projects are not counted).
+    depth -- Number of layers of libraries.
+    fanOut -- Number of libraries (of the layer below) that a library uses.
+    nSources -- Number of sources (and of headers) of each library.
+    nThirdPartyFolders -- Number of third party folders, with a third party project in each folder.
+    nInstallPatterns -- Number of install patterns of each third party project.
+    nFilesPerPattern -- Number of files that each install pattern finds.
+    seed -- Seed of the random choice of the libraries that a library uses.
+    """
+    def __init__(self, nProjects = 100, depth = 5, fanOut = 3, nSources = 10, nThirdPartyFolders = 5, nInstallPatterns = 2,
+            nFilesPerPattern = 4, seed = 0):
+        self.nProjects = nProjects
+        self.depth = depth
+        self.fanOut = fanOut
+        self.nSources = nSources
+        self.nThirdPartyFolders = nThirdPartyFolders
+        self.nInstallPatterns = nInstallPatterns
+        self.nFilesPerPattern = nFilesPerPattern
+        self.seed = seed
+
+    def Dump(self):
+        return dict(vars(self))
+
+def _Write(_filename, _text):
+    if not os.path.exists(os.path.dirname(_filename)):
+        os.makedirs(os.path.dirname(_filename))
+    f = open(_filename, "w")
+    f.write(_text)
+    f.close()
+
+def GetLayers(_parameters):
+    """ Returns the indices of the libraries in each layer (bottom layer first). """
+    nLibraries = max(0, _parameters.nProjects - 1)
+    depth = max(1, min(_parameters.depth, nLibraries))
+    layers = [[] for x in range(depth)]
+    for index in range(nLibraries):
+        layers[index * depth / nLibraries].append(index)
+    return layers
+
+def GetDependencies(_parameters):
+    """
+    Returns a dictionary from the index of each library to the indices of the libraries that it uses: fanOut random
+    libraries of the layer below. Each library is used by a library of the layer above, so that all projects are in the graph.
+    """
+    generator = random.Random(_parameters.seed)
+    layers = GetLayers(_parameters)
+    result = dict()
+    for (layerIndex, layer) in enumerate(layers):
+        for index in layer:
+            result[index] = set()
+            if layerIndex > 0:
+                below = layers[layerIndex - 1]
+                result[index].update(generator.sample(below, min(_parameters.fanOut, len(below))))
+        if layerIndex > 0:
+            for (position, index) in enumerate(layers[layerIndex - 1]):
+                result[layer[position % len(layer)]].add(index)
+    for index in result.keys():
+        result[index] = sorted(result[index])
+    return result
+
+def CreateTree(_folder, _parameters):
+    """
+    Creates the csnake files, sources and third party build folders of a tree with shape _parameters (see Parameters)
+    in _folder, and returns the name of the context file.
+    """
+    layers = GetLayers(_parameters)
+    dependencies = GetDependencies(_parameters)
+    nThirdParties = _parameters.nThirdPartyFolders
+
+    # third party projects, and the files that they install
+    for tp in range(nThirdParties):
+        patterns = ", ".join(["'tp%s/lib%s/*.so'" % (tp, x) for x in range(_parameters.nInstallPatterns)])
+        _Write("%s/thirdParty%s/Tp%s/csnTp%s.py" % (_folder, tp, tp, tp),
+            "import csnProject\n\n"
+            "tp%(tp)s = csnProject.Project('Tp%(tp)s', 'third party')\n"
+            "tp%(tp)s.pathsManager.useFilePath = '%%s/Tp%(tp)s/UseTp%(tp)s.cmake' %% tp%(tp)s.GetBuildFolder()\n"
+            "tp%(tp)s.pathsManager.configFilePath = '%%s/Tp%(tp)s/Tp%(tp)sConfig.cmake' %% tp%(tp)s.GetBuildFolder()\n"
+            "tp%(tp)s.AddFilesToInstall([%(patterns)s])\n" % { "tp" : tp, "patterns" : patterns })
+        for pattern in range(_parameters.nInstallPatterns):
+            for index in range(_parameters.nFilesPerPattern):
+                _Write("%s/build/thirdParty%s/Release/tp%s/lib%s/libTp%s_%s.so" % (_folder, tp, tp, pattern, tp, index), "")
+
+    # libraries
+    def GetUsedProjects(_index):
+        if len(dependencies[_index]):
+            return ["lib%s" % x for x in dependencies[_index]]
+        elif nThirdParties:
+            return ["tp%s" % (_index % nThirdParties)]
+        return []
+    for layer in layers:
+        for index in layer:
+            used = GetUsedProjects(index)
+            imports = ""
+            for name in used:
+                if name.startswith("lib"):
+                    imports += "from Lib%s.csnLib%s import %s\n" % (name[3:], name[3:], name)
+                else:
+                    imports += "%s = csnProject.LoadThirdPartyModule('Tp%s', 'csnTp%s').%s\n" % (name, name[2:], name[2:], name)
+            _Write("%s/src/Lib%s/__init__.py" % (_folder, index), "")
+            _Write("%s/src/Lib%s/csnLib%s.py" % (_folder, index, index),
+                "import csnProject\n%(imports)s\n"
+                "lib%(index)s = csnProject.Project('Lib%(index)s', 'library')\n"
+                "lib%(index)s.AddSources(['src/*.cpp', 'include/*.h'])\n"
+                "lib%(index)s.AddIncludeFolders(['include'])\n"
+                "lib%(index)s.AddProjects([%(used)s])\n" % { "imports" : imports, "index" : index, "used" : ", ".join(used) })
+            for source in range(_parameters.nSources):
+                _Write("%s/src/Lib%s/src/Lib%s_%s.cpp" % (_folder, index, index, source), "#include \"Lib%s_%s.h\"\n" % (index, source))
+                _Write("%s/src/Lib%s/include/Lib%s_%s.h" % (_folder, index, index, source), "")
+
+    # the executable uses the libraries of the top layer
+    topLayer = []
+    if len(layers):
+        topLayer = layers[-1]
+    imports = "".join(["from Lib%s.csnLib%s import lib%s\n" % (x, x, x) for x in topLayer])
+    _Write("%s/src/App/__init__.py" % _folder, "")
+    _Write("%s/src/App/src/main.cpp" % _folder, "int main() { return 0; }\n")
+    _Write("%s/src/App/csnBenchApp.py" % _folder,
+        "import csnProject\n%s\n"
+        "app = csnProject.Project('BenchApp', 'executable')\n"
+        "app.AddSources(['src/*.cpp'])\n"
+        "app.AddProjects([%s])\n" % (imports, ", ".join(["lib%s" % x for x in topLayer])))
+
+    return CreateContextFile(_folder, _parameters)
+
+def CreateContextFile(_folder, _parameters, _compiler = "Unix Makefiles"):
+    """ Creates the context file for the tree in _folder, and returns its name. """
+    context = csnContext.Context()
+    context.GetData()._SetCompilername(_compiler)
+    context.FindCompiler()
+    context.SetField("_ContextData__configurationName", "Release")
+    context.SetBuildFolder("%s/build/bin" % _folder)
+    context.AddRootFolder("%s/src" % _folder)
+    for tp in range(_parameters.nThirdPartyFolders):
+        context.AddThirdPartySrcAndBuildFolder("%s/thirdParty%s" % (_folder, tp), "%s/build/thirdParty%s" % (_folder, tp))
+    context.SetCsnakeFile("%s/src/App/csnBenchApp.py" % _folder)
+    context.SetInstance("app")
+    filename = "%s/context.txt" % _folder
+    context.Save(filename)
+    return filename
@@ -5,7 +5,9 @@ import unittest
 import csnBuild
 import csnProject
 import shutil
+import os
 import csnContext
+import csnUtility
 
 class csnBuildTests(unittest.TestCase):
     """ Generic build tests. """
@@ -34,5 +36,73 @@ class csnBuildTests(unittest.TestCase):
         # clean up
         shutil.rmtree( csnProject.globalCurrentContext.GetBuildFolder() )
         
+    def __CreateProjects(self, _definitions):
+        """ Creates a dummy executable that uses a dummy library with the given definitions. """
+        dummyLib = csnProject.Project("DummyLib", "library")
+        dummyLib.AddDefinitions(_definitions)
+        dummyExe = csnProject.Project("DummyExe", "executable")
+        dummyExe.AddProjects([dummyLib])
+        return dummyExe
+        
+    def testIncrementalGenerate(self):
+        """ csnBuildTest: test that projects of which the cmake files are up-to-date are skipped. """
+        # load fake context
+        self.context = csnContext.Load("config/csnake_context.txt")
+        # change the build folder
+        self.context.SetBuildFolder(self.context.GetBuildFolder() + "/build")
+        # set it as global context
+        csnProject.globalCurrentContext = self.context
+        
+        generator = csnBuild.Generator()
+        generator.numberOfJobs = 4
+        try:
+            generator.Generate(self.__CreateProjects([]))
+            self.assertEqual((generator.nRegeneratedProjects, generator.nSkippedProjects), (2, 0))
+            self.assertTrue(os.path.exists(generator.GetManifestFilename(self.__CreateProjects([]))))
+            # nothing changed
+            generator.Generate(self.__CreateProjects([]))
+            self.assertEqual((generator.nRegeneratedProjects, generator.nSkippedProjects), (0, 2))
+            # new definition in the library
+            dummyExe = self.__CreateProjects(["-DDUMMY_DEFINITION"])
+            generator.Generate(dummyExe)
+            self.assertEqual((generator.nRegeneratedProjects, generator.nSkippedProjects), (1, 1))
+            dummyLib = dummyExe.GetProjects()[0]
+            self.assertTrue("DUMMY_DEFINITION" in csnUtility.FileToString(dummyLib.pathsManager.GetPathToUseFile()))
+            # removed file
+            os.remove(dummyExe.GetCMakeListsFilename())
+            generator.Generate(self.__CreateProjects(["-DDUMMY_DEFINITION"]))
+            self.assertEqual((generator.nRegeneratedProjects, generator.nSkippedProjects), (1, 1))
+            self.assertTrue(os.path.exists(dummyExe.GetCMakeListsFilename()))
+        finally:
+            # clean up
+            shutil.rmtree( csnProject.globalCurrentContext.GetBuildFolder() )
+        
+    def testInsertCallbacks(self):
+        """ csnBuildTest: the functions that insert text in the CMakeLists are called once per generation. """
+        # load fake context
+        self.context = csnContext.Load("config/csnake_context.txt")
+        # change the build folder
+        self.context.SetBuildFolder(self.context.GetBuildFolder() + "/build")
+        # set it as global context
+        csnProject.globalCurrentContext = self.context
+        
+        calls = []
+        def InsertText(_project):
+            calls.append(_project.name)
+            return "# inserted by %s" % _project.name
+        generator = csnBuild.Generator()
+        try:
+            for expected in ("regenerated", "skipped"):
+                dummyExe = self.__CreateProjects([])
+                dummyExe.AddCMakeInsertBeforeTarget(InsertText, dummyExe)
+                del calls[:]
+                generator.Generate(dummyExe)
+                self.assertEqual(calls, ["DummyExe"], expected)
+                self.assertTrue("# inserted by DummyExe" in csnUtility.FileToString(dummyExe.GetCMakeListsFilename()))
+            self.assertEqual((generator.nRegeneratedProjects, generator.nSkippedProjects), (0, 2))
+        finally:
+            # clean up
+            shutil.rmtree( csnProject.globalCurrentContext.GetBuildFolder() )
+        
 if __name__ == "__main__":
     unittest.main() 
@@ -57,6 +57,52 @@ class csnContextTests(unittest.TestCase):
         # test the context conversion
         self.ReadContextTest(2.1, "context21a.txt")
 
+    def testThirdPartyDependencies(self):
+        ''' csnContextTests: the declared dependencies between third party folders are saved and read. '''
+        context = Context()
+        context.Load("context21a.txt")
+        self.assertEqual( context.GetThirdPartyDependencies(), dict() )
+        context.AddThirdPartySrcAndBuildFolder("E:/devel/src/other", "E:/devel/bin/other")
+        context.SetThirdPartyDependencies("E:/devel/src/other", ["E:/devel/src/toolkit/clean/thirdParty"])
+        filename = "new_context21a_dependencies.txt"
+        context.Save(filename)
+        try:
+            newContext = Context()
+            newContext.Load(filename)
+            self.assertEqual( newContext.GetThirdPartyDependencies(), { "E:/devel/src/other" : ["E:/devel/src/toolkit/clean/thirdParty"] } )
+            self.assertTrue( newContext.GetData().Equal(context.GetData()) )
+        finally:
+            os.remove(filename)
+
+    def testNumberOfJobs(self):
+        ''' csnContextTests: the number of jobs is optional, and is saved and read. '''
+        context = Context()
+        context.Load("context21a.txt")
+        self.assertEqual( context.GetNumberOfJobs(), 0 )
+        context.SetNumberOfJobs(12)
+        filename = "new_context21a_jobs.txt"
+        context.Save(filename)
+        try:
+            newContext = Context()
+            newContext.Load(filename)
+            self.assertEqual( newContext.GetNumberOfJobs(), 12 )
+            self.assertTrue( newContext.GetData().Equal(context.GetData()) )
+        finally:
+            os.remove(filename)
+
+    def testThirdPartyFolderIndex(self):
+        ''' csnContextTests: the index of a third party folder is found after normalization, and follows the changes of the folders. '''
+        context = Context()
+        context.AddThirdPartySrcAndBuildFolder("/devel/src/one", "/devel/bin/one")
+        context.AddThirdPartySrcAndBuildFolder("/devel/src/two/", "/devel/bin/two")
+        self.assertEqual( context.GetThirdPartyFolderIndex("/devel/src/two"), 1 )
+        self.assertEqual( context.GetThirdPartyFolderIndex("/devel/src/three"), None )
+        context.MoveUpThirdPartySrcAndBuildFolder(1)
+        self.assertEqual( context.GetThirdPartyFolderIndex("/devel/src/two"), 0 )
+        context.RemoveThirdPartySrcAndBuildFolderByIndex(0)
+        self.assertEqual( context.GetThirdPartyFolderIndex("/devel/src/two"), None )
+        self.assertEqual( context.GetThirdPartyFolderIndex("/devel/src/one"), 0 )
+
     def ValuesTest(self, version, context):
         # [CSnake]
         self.assertEqual( context.GetInstallFolder(), "E:/devel/bin/toolkit/clean/install" )
@@ -0,0 +1,131 @@
+## @package csnDaemonTests
+# Definition of the csnDaemonTests class.
+# \ingroup tests
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+import csnConsole
+import csnContext
+import csnDaemon
+from cStringIO import StringIO
+
+class csnDaemonTests(unittest.TestCase):
+    """ Unit tests for the Daemon class and its client functions. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = os.path.realpath(tempfile.mkdtemp())
+        self.contextFilename = "%s/context.txt" % self.folder
+        self.__SaveContext("%s/build" % self.folder)
+        self.handlers = []
+
+    def tearDown(self):
+        """ Run after test. """
+        shutil.rmtree(self.folder)
+
+    def __SaveContext(self, _buildFolder, _numberOfJobs = 0):
+        context = csnContext.Context()
+        context.SetBuildFolder(_buildFolder)
+        context.SetNumberOfJobs(_numberOfJobs)
+        context.Save(self.contextFilename)
+
+    def __RunCommands(self, _handler, _options):
+        """ Fake commands: prints the build folder of the context, fails on request. """
+        self.handlers.append(_handler)
+        print "build folder: %s" % _handler.context.GetBuildFolder()
+        assert not _options.fail, "failed"
+
+    def __Request(self, _fail = False):
+        (stdout, stderr) = (StringIO(), StringIO())
+        exitCode = csnDaemon.SendRequest(self.contextFilename, { "command" : "run", "options" : { "fail" : _fail } }, stdout, stderr)
+        return (exitCode, stdout.getvalue(), stderr.getvalue())
+
+    def testRequests(self):
+        """ csnDaemonTests: requests are run by the daemon, with their output and exit code sent to the client. """
+        if not csnDaemon.IsSupported():
+            return
+        self.assertEqual(self.__Request(), (None, "", ""))
+        daemon = csnDaemon.Daemon(self.contextFilename, self.__RunCommands)
+        daemon.Listen()
+        thread = threading.Thread(target = daemon.Serve)
+        thread.setDaemon(True)
+        thread.start()
+        try:
+            self.assertTrue(csnDaemon.IsRunning(self.contextFilename))
+            self.assertRaises(csnDaemon.DaemonError, csnDaemon.Daemon(self.contextFilename, self.__RunCommands).Listen)
+            self.assertEqual(self.__Request(), (0, "build folder: %s/build\n" % self.folder, ""))
+            (exitCode, stdout, stderr) = self.__Request(_fail = True)
+            self.assertEqual(exitCode, 1)
+            self.assertTrue("AssertionError: failed" in stderr)
+            # the handler is kept, until the context file changes
+            self.assertTrue(self.handlers[0] is self.handlers[1])
+            time.sleep(0.01)
+            self.__SaveContext("%s/other build" % self.folder)
+            os.utime(self.contextFilename, (0, os.path.getmtime(self.contextFilename) + 10))
+            self.assertEqual(self.__Request(), (0, "build folder: %s/other build\n" % self.folder, ""))
+            self.assertFalse(self.handlers[2] is self.handlers[1])
+        finally:
+            self.assertTrue(csnDaemon.Stop(self.contextFilename))
+            thread.join(5)
+        self.assertFalse(thread.isAlive())
+        self.assertFalse(os.path.exists(daemon.socketFilename))
+        self.assertFalse(csnDaemon.IsRunning(self.contextFilename))
+
+    def __RunConsoleCommands(self, _handler, _options):
+        """ The commands of csnConsole (without a task), prints the number of jobs. """
+        csnConsole.RunDaemonCommands(_handler, _options)
+        print "jobs: %s" % _handler.GetNumberOfJobs()
+
+    def __RunAskingCommands(self, _handler, _options):
+        """ The commands of csnConsole (without a task), then a question such as the post cmake tasks can ask. """
+        csnConsole.RunDaemonCommands(_handler, _options)
+        askUser = csnConsole.GetAskUser(_options)
+        askUser.SetType(askUser.QuestionYesNo())
+        if askUser.Ask("Delete them?", askUser.AnswerNo()) == askUser.AnswerNo():
+            print "not deleted"
+
+    def testAskUser(self):
+        """ csnDaemonTests: questions asked during a request get their default answer. """
+        if not csnDaemon.IsSupported():
+            return
+        daemon = csnDaemon.Daemon(self.contextFilename, self.__RunAskingCommands)
+        daemon.Listen()
+        thread = threading.Thread(target = daemon.Serve)
+        thread.setDaemon(True)
+        thread.start()
+        try:
+            (options, args) = csnConsole.parser.parse_args([self.contextFilename])
+            (stdout, stderr) = (StringIO(), StringIO())
+            exitCode = csnDaemon.SendRequest(self.contextFilename, { "command" : "run", "options" : vars(options) }, stdout, stderr)
+            self.assertEqual((exitCode, stderr.getvalue()), (0, ""))
+            self.assertTrue("Delete them?" in stdout.getvalue())
+            self.assertTrue(stdout.getvalue().endswith("The answer is: \"no\"\nnot deleted\n"))
+        finally:
+            self.assertTrue(csnDaemon.Stop(self.contextFilename))
+            thread.join(5)
+
+    def testJobs(self):
+        """ csnDaemonTests: the number of jobs of a request is not used by the next requests. """
+        if not csnDaemon.IsSupported():
+            return
+        self.__SaveContext("%s/build" % self.folder, 3)
+        daemon = csnDaemon.Daemon(self.contextFilename, self.__RunConsoleCommands)
+        daemon.Listen()
+        thread = threading.Thread(target = daemon.Serve)
+        thread.setDaemon(True)
+        thread.start()
+        try:
+            for (arguments, jobs) in ((["-j", "2"], 2), ([], 3), (["--jobs", "5"], 5), ([], 3)):
+                (options, args) = csnConsole.parser.parse_args(arguments + [self.contextFilename])
+                (stdout, stderr) = (StringIO(), StringIO())
+                exitCode = csnDaemon.SendRequest(self.contextFilename, { "command" : "run", "options" : vars(options) }, stdout, stderr)
+                self.assertEqual((exitCode, stdout.getvalue(), stderr.getvalue()), (0, "jobs: %s\n" % jobs, ""))
+        finally:
+            self.assertTrue(csnDaemon.Stop(self.contextFilename))
+            thread.join(5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+## @package csnDependenciesTests
+# Definition of the csnDependenciesTests class.
+# \ingroup tests
+import unittest
+import random
+import csnProject
+import csnDependencies
+import csnContext
+
+class csnDependenciesTests(unittest.TestCase):
+    """ Unit tests for the dependencies Manager and its Graph snapshot. """
+
+    def setUp(self):
+        """ Run before test. """
+        # load fake context
+        self.context = csnContext.Load("config/csnake_context.txt")
+        # set it as global context
+        csnProject.globalCurrentContext = self.context
+        self.context.SetFilter(["Filtered"])
+
+    def tearDown(self):
+        """ Run after test. """
+        csnProject.globalCurrentContext = None
+
+    def __CreateRandomGraph(self, _nProjects, _seed):
+        """ Creates an acyclic graph with required and non-required dependencies, returns the root project. """
+        generator = random.Random(_seed)
+        projects = []
+        for index in range(_nProjects):
+            categories = ["Project%s" % index]
+            if generator.random() < 0.2:
+                categories.append("Filtered")
+            projects.append(csnProject.Project("Project%s" % index, "library", _categories = categories))
+        for index in range(1, _nProjects):
+            for other in generator.sample(projects[:index], min(index, 3)):
+                projects[index].AddProjects([other], _dependency = generator.random() < 0.7)
+        # an application holder that depends on the root, which does not depend on it (cycle of non-required dependencies)
+        holder = csnProject.Project("Holder", "container", _categories = ["Holder"])
+        holder.AddProjects([projects[-1]])
+        projects[-1].AddProjects([holder], _dependency = False)
+        return projects
+
+    def __Legacy(self, _project, **kwargs):
+        """ Result of the recursive walk of the manager (passing a cache disables the graph). """
+        return list(_project.dependenciesManager.GetProjects(_recursive = True, _cache = dict(), **kwargs))
+
+    def testGraphGetProjects(self):
+        """ csnDependenciesTests: the graph returns the same projects, in the same order, as the recursive walk. """
+        projects = self.__CreateRandomGraph(40, 1)
+        for project in projects:
+            for onlyRequired in (False, True):
+                for onlyNonRequired in (False, True):
+                    for filter in (False, True):
+                        for includeSelf in (False, True):
+                            flags = { "_onlyRequiredProjects" : onlyRequired, "_onlyNonRequiredProjects" : onlyNonRequired,
+                                "_filter" : filter, "_includeSelf" : includeSelf }
+                            self.assertEqual(list(project.GetProjects(_recursive = True, **flags)), self.__Legacy(project, **flags))
+
+    def testGraphDependsOn(self):
+        """ csnDependenciesTests: DependsOn uses the closure of the required projects. """
+        projects = self.__CreateRandomGraph(30, 2)
+        for project in projects:
+            required = self.__Legacy(project, _onlyRequiredProjects = True)
+            for other in projects:
+                self.assertEqual(project.dependenciesManager.DependsOn(other), other in required)
+                self.assertEqual(project.dependenciesManager.DependsOn(other), project.dependenciesManager.DependsOn(other, _skipList = []))
+
+    def testGraphSubProjectsToGenerate(self):
+        """ csnDependenciesTests: the transitive reduction gives the required projects that no other required project depends on. """
+        projects = self.__CreateRandomGraph(30, 3)
+        for project in projects:
+            directRequired = project.GetProjects(_recursive = False, _onlyRequiredProjects = True)
+            expected = []
+            for required in self.__Legacy(project, _onlyRequiredProjects = True):
+                if not [x for x in directRequired if x.dependenciesManager.DependsOn(required, _skipList = [])]:
+                    expected.append(required)
+            self.assertEqual(project.dependenciesManager.GetSubProjectsToGenerate(), expected)
+
+    def testGraphInvalidation(self):
+        """ csnDependenciesTests: the graph is rebuilt when dependencies or the filter change. """
+        projectA = csnProject.Project("A", "library", _categories = ["A"])
+        projectB = csnProject.Project("B", "library", _categories = ["B"])
+        projectC = csnProject.Project("C", "library", _categories = ["C"])
+        projectA.AddProjects([projectB])
+        self.assertEqual(list(projectA.GetProjects(_recursive = True)), [projectB])
+        graph = projectA.dependenciesManager.GetGraph()
+        self.assertTrue(projectA.dependenciesManager.GetGraph() is graph)
+        # new dependency
+        projectB.AddProjects([projectC], _dependency = False)
+        self.assertFalse(graph.IsValid())
+        self.assertEqual(list(projectA.GetProjects(_recursive = True)), [projectC, projectB])
+        self.assertFalse(projectA.dependenciesManager.DependsOn(projectC))
+        # filter change
+        self.context.SetFilter(["C"])
+        self.assertEqual(list(projectA.GetProjects(_recursive = True)), [projectB])
+
+    def testGraphCyclicDependency(self):
+        """ csnDependenciesTests: the graph still reports cyclic dependencies. """
+        projectA = csnProject.Project("A", "library")
+        projectB = csnProject.Project("B", "library")
+        projectC = csnProject.Project("C", "library")
+        projectA.AddProjects([projectB])
+        projectB.AddProjects([projectC])
+        projectC.AddProjects([projectA])
+        self.assertRaises(csnDependencies.DependencyError, projectA.GetProjects, _recursive = True, _onlyRequiredProjects = True)
+        self.assertTrue(projectA.dependenciesManager.DependsOn(projectC))
+        self.assertFalse(projectA.dependenciesManager.DependsOn(projectA))
+
+    def __LegacyProjectsToUse(self, _project):
+        """ Original ProjectsToUse algorithm (repeatedly moves projects that must be used later to the front). """
+        result = []
+        projectsToUse = [project for project in _project.GetProjects(_recursive = True, _onlyRequiredProjects = True)]
+        assert not _project in projectsToUse
+        projectsToUse.append(_project)
+        count = 0
+        while len(projectsToUse):
+            count += 1
+            assert count < 1000
+            project = projectsToUse.pop()
+            weShouldMoveProjectToBack = False
+            for otherProject in projectsToUse:
+                if otherProject.dependenciesManager.WantsToBeUsedBefore(project):
+                    assert not otherProject is _project
+                    weShouldMoveProjectToBack = True
+                    break
+            if weShouldMoveProjectToBack:
+                projectsToUse.insert(0, project)
+            else:
+                result.append(project)
+        result.remove(_project)
+        result.insert(0, _project)
+        return result
+
+    def testGraphProjectsToUse(self):
+        """ csnDependenciesTests: the topological sort gives the same order as the original algorithm. """
+        for seed in range(3):
+            projects = self.__CreateRandomGraph(30, seed)
+            generator = random.Random(seed)
+            for index in range(20):
+                (project, otherProject) = generator.sample(projects, 2)
+                try:
+                    project.dependenciesManager.UseBefore(otherProject)
+                except csnDependencies.DependencyError:
+                    pass
+            checked = 0
+            for project in projects[:-1]:
+                try:
+                    expected = self.__LegacyProjectsToUse(project)
+                except AssertionError:
+                    # inconsistent use-before relations
+                    self.assertRaises(csnDependencies.DependencyError, project.dependenciesManager.ProjectsToUse)
+                    continue
+                self.assertEqual(project.dependenciesManager.ProjectsToUse(), expected)
+                checked += 1
+            self.assertTrue(checked > 10)
+            self.assertTrue(projects[0].dependenciesManager.ProjectsToUse() is not projects[0].dependenciesManager.ProjectsToUse())
+
+    def testGraphProjectsToUseCycle(self):
+        """ csnDependenciesTests: a cyclic use-before relation is reported with the projects of the cycle. """
+        projectA = csnProject.Project("A", "library")
+        projectB = csnProject.Project("B", "library")
+        projectC = csnProject.Project("C", "library")
+        projectRoot = csnProject.Project("Root", "library")
+        projectB.AddProjects([projectC])
+        projectRoot.AddProjects([projectA, projectB])
+        projectA.dependenciesManager.UseBefore(projectB)
+        # B requires C, so B also wants to be used before A
+        projectC.dependenciesManager.UseBefore(projectA)
+        try:
+            projectRoot.dependenciesManager.ProjectsToUse()
+            self.fail("DependencyError expected")
+        except csnDependencies.DependencyError, error:
+            self.assertEqual(str(error), "Cyclic use-before relation: B -> A -> B")
+
+if __name__ == "__main__":
+    unittest.main()
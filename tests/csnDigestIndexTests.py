@@ -0,0 +1,109 @@
+## @package csnDigestIndexTests
+# Definition of the csnDigestIndexTests class.
+# \ingroup tests
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import csnContext
+import csnDigestIndex
+import csnGenerator
+import csnProject
+import csnUtility
+
+class csnDigestIndexTests(unittest.TestCase):
+    """ Unit tests for the DigestIndex class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = tempfile.mkdtemp()
+        self.indexFilename = csnDigestIndex.GetIndexFilename(self.folder)
+        self.filename = "%s/file.txt" % self.folder
+
+    def tearDown(self):
+        """ Run after test. """
+        shutil.rmtree(self.folder)
+
+    def __SetAge(self, _filename, _seconds):
+        """ Moves the modification time of _filename _seconds into the past. """
+        mtime = os.path.getmtime(_filename) - _seconds
+        os.utime(_filename, (mtime, mtime))
+
+    def testWriteFileIfDifferent(self):
+        """ csnDigestIndexTests: unchanged files are validated from the persisted index, without reading them. """
+        index = csnDigestIndex.DigestIndex(self.indexFilename)
+        self.assertTrue(csnUtility.WriteFileIfDifferent(self.filename, "one\n", _digestIndex = index))
+        index.Save()
+        # the entry is recorded right after writing, so it is not trusted yet
+        index = csnDigestIndex.DigestIndex(self.indexFilename)
+        self.assertFalse(csnUtility.WriteFileIfDifferent(self.filename, "one\n", _digestIndex = index))
+        self.assertEqual(index.GetStatistics(), { "hits" : 0, "reads" : 1 })
+        # an old file with a recorded entry is not read
+        self.__SetAge(self.filename, 10)
+        index.Record(self.filename, csnDigestIndex.TextDigest("one\n"))
+        index.Save()
+        index = csnDigestIndex.DigestIndex(self.indexFilename)
+        self.assertFalse(csnUtility.WriteFileIfDifferent(self.filename, "one\n", _digestIndex = index))
+        self.assertTrue(csnUtility.WriteFileIfDifferent(self.filename, "two\n", _digestIndex = index))
+        self.assertEqual(index.GetStatistics(), { "hits" : 2, "reads" : 0 })
+        self.assertEqual(csnUtility.FileToString(self.filename), "two\n")
+        self.assertFalse(os.path.exists(self.filename + ".old"))
+
+    def testModifiedFile(self):
+        """ csnDigestIndexTests: a file that was changed after recording its entry is read again. """
+        index = csnDigestIndex.DigestIndex(self.indexFilename)
+        csnUtility.WriteFileIfDifferent(self.filename, "one\n", _digestIndex = index)
+        self.__SetAge(self.filename, 10)
+        index.Record(self.filename, csnDigestIndex.TextDigest("one\n"))
+        f = open(self.filename, 'w')
+        f.write("two\n")
+        f.close()
+        self.assertEqual(index.GetDigest(self.filename), csnDigestIndex.TextDigest("two\n"))
+        self.assertEqual(index.GetStatistics()["reads"], 1)
+        self.assertEqual(index.GetDigest("%s/doesnotexist.txt" % self.folder), None)
+
+    def testCorruptIndex(self):
+        """ csnDigestIndexTests: an unreadable index file is treated as empty. """
+        f = open(self.indexFilename, 'w')
+        f.write("{ not json")
+        f.close()
+        index = csnDigestIndex.DigestIndex(self.indexFilename)
+        self.assertTrue(csnUtility.WriteFileIfDifferent(self.filename, "one\n", _digestIndex = index))
+        index.Save()
+        self.assertTrue(os.path.getsize(self.indexFilename) > 0)
+
+    def testPostProcess(self):
+        """ csnDigestIndexTests: the post processing of all the projects loads and saves the index once. """
+        context = csnContext.Context()
+        context.GetData()._SetCompilername("KDevelop3")
+        context.FindCompiler()
+        context.SetBuildFolder("%s/build" % self.folder)
+        context.SetKdevelopProjectFolder("%s/kdevelop" % self.folder)
+        csnProject.globalCurrentContext = context
+        save = csnDigestIndex.DigestIndex.Save
+        saves = []
+        def CountedSave(_index):
+            saves.append(_index)
+            save(_index)
+        csnDigestIndex.DigestIndex.Save = CountedSave
+        try:
+            a = csnProject.Project("A", "executable")
+            b = csnProject.Project("B", "library")
+            a.AddProjects([b])
+            for project in (a, b):
+                os.makedirs(project.GetBuildFolder())
+                open("%s/%s.kdevelop" % (project.GetBuildFolder(), project.name), "w").close()
+            csnGenerator.Generator().PostProcess(a)
+        finally:
+            csnDigestIndex.DigestIndex.Save = save
+            csnProject.globalCurrentContext = None
+        self.assertEqual(len(saves), 1)
+        entries = json.load(open(csnDigestIndex.GetIndexFilename(context.GetBuildFolder())))
+        for name in ("A", "B"):
+            filename = os.path.abspath("%s/kdevelop/%s.kdevelop.filelist" % (self.folder, name))
+            self.assertTrue(os.path.exists(filename))
+            self.assertTrue(filename in entries)
+
+if __name__ == "__main__":
+    unittest.main()
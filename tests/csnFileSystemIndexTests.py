@@ -0,0 +1,98 @@
+## @package csnFileSystemIndexTests
+# Definition of the csnFileSystemIndexTests class.
+# \ingroup tests
+import unittest
+import os
+import glob
+import shutil
+import tempfile
+import csnFileSystemIndex
+import GlobDirectoryWalker
+
+class csnFileSystemIndexTests(unittest.TestCase):
+    """ Unit tests for the FileSystemIndex class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = tempfile.mkdtemp()
+        for subFolder in ("src", "src/sub", "include", ".hidden", "build"):
+            os.makedirs("%s/%s" % (self.folder, subFolder))
+        for filename in ("src/a.cpp", "src/b.cpp", "src/b.h", "src/.c.cpp", "src/sub/d.cpp", "include/a.h", ".hidden/e.cpp", "build/f.cpp"):
+            open("%s/%s" % (self.folder, filename), "w").close()
+
+    def tearDown(self):
+        """ Run after test. """
+        shutil.rmtree(self.folder)
+
+    def __Patterns(self):
+        patterns = ["src/*.cpp", "src/*", "src/.*", "*/*.h", "*/", "src/sub", "src/sub/", "src/a.cpp", "src/a.cpp/",
+            "src/doesnotexist.cpp", "*/sub/*.cpp", "s?c/[ab].*", "src/../include/*.h", "src/.", ".hidden/*", "build/*.cpp",
+            "doesnotexist/*.cpp"]
+        return ["%s/%s" % (self.folder, pattern) for pattern in patterns]
+
+    def testGlob(self):
+        """ csnFileSystemIndexTests: Glob gives the same results as glob.glob. """
+        index = csnFileSystemIndex.FileSystemIndex()
+        index.SetFolders([self.folder], ["%s/build" % self.folder])
+        for pattern in self.__Patterns() + self.__Patterns():
+            self.assertEqual(index.Glob(pattern), glob.glob(pattern))
+        # patterns in the excluded build folder are passed to glob.glob
+        statistics = index.GetStatistics()
+        self.assertEqual(statistics["globs"], statistics["indexedGlobs"] + 2)
+        self.assertTrue(statistics["listingHits"] > 0)
+
+    def testGlobInTestData(self):
+        """ csnFileSystemIndexTests: Glob gives the same results as glob.glob in the test data folder. """
+        index = csnFileSystemIndex.FileSystemIndex()
+        index.SetFolders([os.path.abspath("data")])
+        for pattern in ("data/*", "data/*/*", "data/my src/*/*.py", "data/*/*/src/*.cpp", "data/*/*/*/*.h"):
+            self.assertEqual(index.Glob(pattern), glob.glob(pattern))
+        self.assertEqual(index.GetStatistics()["indexedGlobs"], 5)
+
+    def testWalk(self):
+        """ csnFileSystemIndexTests: Walk finds the same files as GlobDirectoryWalker, also through the fallback index. """
+        os.makedirs("%s/src/CVS" % self.folder)
+        open("%s/src/CVS/Entries" % self.folder, "w").close()
+        expected = [x for x in GlobDirectoryWalker.Walker(self.folder, ["*"], ["CVS"]) if not os.path.isdir(x)]
+        fallback = csnFileSystemIndex.FileSystemIndex()
+        index = csnFileSystemIndex.FileSystemIndex(fallback)
+        index.SetFolders(["%s/src" % self.folder])
+        self.assertEqual(index.Walk(self.folder, ["CVS"]), expected)
+        self.assertEqual(index.Walk("%s/src" % self.folder, ["CVS"]), [x for x in expected if x.startswith("%s/src/" % self.folder)])
+        self.assertTrue(index.IsDir("%s/src/sub" % self.folder))
+        self.assertFalse(index.IsDir("%s/src/a.cpp" % self.folder))
+        # patterns outside the indexed folders are answered by the fallback
+        self.assertEqual(index.Glob("%s/include/*.h" % self.folder), ["%s/include/a.h" % self.folder])
+        self.assertEqual(fallback.GetStatistics()["globs"], 1)
+
+    def testScan(self):
+        """ csnFileSystemIndexTests: after a Scan, Glob does not list folders on disk. """
+        index = csnFileSystemIndex.FileSystemIndex()
+        index.SetFolders([self.folder])
+        index.Scan(self.folder)
+        listdirCalls = index.GetStatistics()["listdirCalls"]
+        self.assertEqual(listdirCalls, 6)
+        for pattern in self.__Patterns():
+            self.assertEqual(index.Glob(pattern), glob.glob(pattern))
+        self.assertEqual(index.GetStatistics()["listdirCalls"], listdirCalls)
+
+    def testRefresh(self):
+        """ csnFileSystemIndexTests: new files are found after refreshing or invalidating their folder. """
+        index = csnFileSystemIndex.FileSystemIndex()
+        index.SetFolders([self.folder])
+        pattern = "%s/src/*.cpp" % self.folder
+        subPattern = "%s/src/sub/*.cpp" % self.folder
+        self.assertEqual(len(index.Glob(pattern)), 2)
+        self.assertEqual(len(index.Glob(subPattern)), 1)
+        open("%s/src/new.cpp" % self.folder, "w").close()
+        open("%s/src/sub/new.cpp" % self.folder, "w").close()
+        # the snapshot is not updated automatically
+        self.assertEqual(len(index.Glob(pattern)), 2)
+        index.Refresh("%s/src" % self.folder)
+        self.assertEqual(index.Glob(pattern), glob.glob(pattern))
+        self.assertEqual(len(index.Glob(subPattern)), 1)
+        index.Invalidate("%s/src" % self.folder)
+        self.assertEqual(index.Glob(subPattern), glob.glob(subPattern))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+## @package csnFileSystemStatsTests
+# Definition of the csnFileSystemStatsTests class.
+# \ingroup tests
+import unittest
+import glob
+import json
+import os
+import shutil
+import tempfile
+import csnFileSystemStats
+import csnProfiler
+
+class csnFileSystemStatsTests(unittest.TestCase):
+    """ Unit tests for the csnFileSystemStats class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = os.path.realpath(tempfile.mkdtemp())
+        for name in ("a.cpp", "b.cpp"):
+            open("%s/%s" % (self.folder, name), "w").close()
+        self.stats = csnFileSystemStats.FileSystemStats()
+        csnProfiler.profiler.Clear()
+
+    def tearDown(self):
+        """ Run after test. """
+        self.stats.Disable()
+        csnProfiler.profiler.Disable()
+        csnProfiler.profiler.Clear()
+        shutil.rmtree(self.folder)
+
+    def testCounts(self):
+        """ csnFileSystemStatsTests: the calls are counted by operation, call site, phase, project and script. """
+        listdir = os.listdir
+        self.stats.Enable()
+        self.assertFalse(os.listdir is listdir)
+        csnProfiler.profiler.Enable()
+        span = csnProfiler.profiler.Begin("Generate", { "project" : "Lib" })
+        try:
+            self.assertEqual(sorted(os.listdir(self.folder)), ["a.cpp", "b.cpp"])
+            self.assertTrue(os.path.exists("%s/a.cpp" % self.folder))
+            self.assertFalse(os.path.isdir("%s/c.cpp" % self.folder))
+            # the listdir of the glob is part of the glob
+            self.assertEqual(len(glob.glob("%s/*.cpp" % self.folder)), 2)
+        finally:
+            csnProfiler.profiler.End(span)
+        open("%s/a.cpp" % self.folder).close()
+        self.stats.Disable()
+        self.assertTrue(os.listdir is listdir)
+        os.listdir(self.folder)
+
+        totals = self.stats.GetTotals()
+        self.assertEqual(dict([(x, y[0]) for (x, y) in totals.items()]), { "listdir" : 1, "stat" : 2, "glob" : 1, "open" : 1 })
+        callSites = [x[0] for x in self.stats.GetTable("callSite")]
+        self.assertEqual(len(callSites), 5)
+        for callSite in callSites:
+            self.assertTrue(callSite.startswith("csnFileSystemStatsTests.py:"), callSite)
+            self.assertTrue(callSite.endswith(" testCounts"), callSite)
+        phases = self.stats.GetTable("phase")
+        self.assertEqual([x[0] for x in phases], ["Generate"])
+        self.assertEqual(sorted(phases[0][1].keys()), ["glob", "listdir", "stat"])
+        self.assertEqual([x[0] for x in self.stats.GetTable("project")], ["Lib"])
+        scripts = self.stats.GetTable("script")
+        self.assertEqual(len(scripts), 1)
+        self.assertTrue(scripts[0][0].endswith("/csnFileSystemStatsTests.py"))
+        self.assertEqual(sum([x[0] for x in scripts[0][1].values()]), 5)
+
+        self.stats.Clear()
+        self.assertEqual(self.stats.GetTotals()["stat"], (0, 0.0))
+        self.assertEqual(self.stats.GetTable("callSite"), [])
+
+    def testWrite(self):
+        """ csnFileSystemStatsTests: the statistics are written as json and as a summary, without counting the writing. """
+        self.stats.Enable()
+        os.path.exists(self.folder)
+        summary = self.stats.Write("%s/build" % self.folder)
+        self.assertTrue(self.stats.IsEnabled())
+        self.assertEqual(self.stats.GetTotals()["stat"][0], 1)
+        self.assertEqual(self.stats.GetTotals()["open"][0], 0)
+        self.stats.Disable()
+        self.assertEqual(open("%s/build/csnakeFileSystemStats.txt" % self.folder).read(), summary)
+        self.assertTrue("call site" in summary)
+        data = json.load(open("%s/build/csnakeFileSystemStats.json" % self.folder))
+        self.assertEqual(data["totals"]["stat"]["count"], 1)
+        self.assertEqual(data["callSite"][0]["stat"]["count"], 1)
+        self.assertEqual(data["phase"], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,15 @@
 import unittest
 import os.path
 import csnGUIHandler
+import csnContext
 import csnCreate
+import csnThreadPool
+import csnUtility
+import csnModuleTracker
+import json
 import shutil
+import sys
+import tempfile
 
 class csnGUIHandlerTests(unittest.TestCase):
     """ Unit tests for for the csnGUIHandler class. """
@@ -21,7 +28,8 @@ class csnGUIHandlerTests(unittest.TestCase):
     def tearDown(self):
         """ Run after test. """
         # clean up folders
-        shutil.rmtree(self.projectFolder1)
+        if os.path.exists(self.projectFolder1):
+            shutil.rmtree(self.projectFolder1)
         
     def testCreateCSnakeFolder(self):
         """ csnGUIHandlerTest: test create csnake folder."""
@@ -44,5 +52,226 @@ class csnGUIHandlerTests(unittest.TestCase):
         # create the project
         csnCreate.CreateCSnakeProject(self.projectFolder2, self.rootFolder, "Test2", "library")
         
+    def testNumberOfJobs(self):
+        """ csnGUIHandlerTest: the number of jobs is set by the user, else by the context, else the number of cores. """
+        self.handler.SetContext(csnContext.Context())
+        self.assertEqual(self.handler.GetNumberOfJobs(), csnThreadPool.GetNumberOfCores())
+        self.handler.context.SetNumberOfJobs(6)
+        self.assertEqual(self.handler.GetNumberOfJobs(), 6)
+        self.handler.SetNumberOfJobs(3)
+        self.assertEqual(self.handler.GetNumberOfJobs(), 3)
+        
+    def testGetBuildSlots(self):
+        """ csnGUIHandlerTest: the jobs are divided over the solutions that can be built at the same time. """
+        self.handler.SetContext(csnContext.Context())
+        self.handler.SetNumberOfJobs(8)
+        self.assertEqual(self.handler.GetBuildSlots({ 0 : [], 1 : [0], 2 : [0, 1] }), (1, 8))
+        self.assertEqual(self.handler.GetBuildSlots({ 0 : [], 1 : [], 2 : [0], 3 : [1], 4 : [] }), (3, 2))
+        self.handler.SetNumberOfJobs(2)
+        self.assertEqual(self.handler.GetBuildSlots({ 0 : [], 1 : [], 2 : [], 3 : [] }), (2, 1))
+        self.assertEqual(self.handler.GetBuildSlots(dict()), (1, 2))
+        
+    def testReloadChangedModules(self):
+        """ csnGUIHandlerTest: only the changed csnake modules, and the modules that import them, are loaded again. """
+        folder = os.path.realpath(tempfile.mkdtemp())
+        try:
+            open("%s/csnReloadLib.py" % folder, "w").write("value = 1\n")
+            open("%s/csnReloadOther.py" % folder, "w").write("value = 2\n")
+            open("%s/csnReloadMain.py" % folder, "w").write("import csnReloadLib, csnReloadOther\n")
+            context = csnContext.Context()
+            context.AddRootFolder(folder)
+            context.SetCsnakeFile("%s/csnReloadMain.py" % folder)
+            self.handler.SetContext(context)
+            self.handler.GetListOfPossibleTargets()
+            (main, lib, other) = (sys.modules["csnReloadMain"], sys.modules["csnReloadLib"], sys.modules["csnReloadOther"])
+            self.handler.GetListOfPossibleTargets()
+            self.assertTrue(sys.modules["csnReloadMain"] is main)
+            # change a module: the module and its importer are loaded again
+            open("%s/csnReloadLib.py" % folder, "w").write("value = 10\n")
+            os.utime("%s/csnReloadLib.py" % folder, (0, os.path.getmtime("%s/csnReloadLib.py" % folder) + 10))
+            self.handler.GetListOfPossibleTargets()
+            self.assertFalse(sys.modules["csnReloadLib"] is lib)
+            self.assertEqual(sys.modules["csnReloadLib"].value, 10)
+            self.assertFalse(sys.modules["csnReloadMain"] is main)
+            self.assertTrue(sys.modules["csnReloadOther"] is other)
+        finally:
+            csnModuleTracker.tracker.Clear()
+            shutil.rmtree(folder)
+        
+    def testProjectCache(self):
+        """ csnGUIHandlerTest: the project graph is loaded from the build folder while the csnake files do not change. """
+        folder = os.path.realpath(tempfile.mkdtemp())
+        try:
+            os.mkdir("%s/sources" % folder)
+            open("%s/sources/a.cpp" % folder, "w").close()
+            open("%s/csnCacheMain.py" % folder, "w").write(
+                "import csnProject\nlib = csnProject.Project('CacheLib', 'library')\nlib.AddSources(['sources/*.cpp'])\n"
+                "app = csnProject.Project('CacheApp', 'executable')\napp.AddProjects([lib])\n")
+            def Load():
+                handler = csnGUIHandler.Handler()
+                handler.SetUseProjectCache(True)
+                context = csnContext.Context()
+                context.GetData()._SetCompilername("Unix Makefiles")
+                context.FindCompiler()
+                context.AddRootFolder(folder)
+                context.SetCsnakeFile("%s/csnCacheMain.py" % folder)
+                context.SetInstance("app")
+                context.SetBuildFolder("%s/build" % folder)
+                handler.SetContext(context)
+                project = handler.GetProjectDependencies()[0]
+                loaded = "csnCacheMain" in sys.modules
+                csnModuleTracker.tracker.Clear()
+                return (loaded, project.GetSources(), project.context is context)
+            self.assertEqual(Load(), (True, ["%s/sources/a.cpp" % folder], True))
+            self.assertEqual(Load(), (False, ["%s/sources/a.cpp" % folder], True))
+            # a new source file (the sources are globbed when they are used)
+            open("%s/sources/b.cpp" % folder, "w").close()
+            sources = ["%s/sources/a.cpp" % folder, "%s/sources/b.cpp" % folder]
+            self.assertEqual(Load(), (False, sources, True))
+            # a changed csnake file
+            os.utime("%s/csnCacheMain.py" % folder, (0, os.path.getmtime("%s/csnCacheMain.py" % folder) + 10))
+            self.assertEqual(Load(), (True, sources, True))
+            self.assertEqual(Load(), (False, sources, True))
+        finally:
+            csnModuleTracker.tracker.Clear()
+            shutil.rmtree(folder)
+        
+    def testProjectsAffectedByChanges(self):
+        """ csnGUIHandlerTest: changed files are mapped to the projects of which a glob has a different result. """
+        folder = os.path.realpath(tempfile.mkdtemp())
+        try:
+            for name in ("lib", "app"):
+                os.makedirs("%s/%s/src" % (folder, name))
+                open("%s/%s/src/main.cpp" % (folder, name), "w").close()
+            open("%s/csnWatchMain.py" % folder, "w").write(
+                "import csnProject\nlib = csnProject.Project('WatchLib', 'library')\nlib.AddSources(['lib/src/*.cpp'])\n"
+                "app = csnProject.Project('WatchApp', 'executable')\napp.AddSources(['app/src/*.cpp'])\napp.AddProjects([lib])\n")
+            context = csnContext.Context()
+            context.GetData()._SetCompilername("Unix Makefiles")
+            context.FindCompiler()
+            context.AddRootFolder(folder)
+            context.SetCsnakeFile("%s/csnWatchMain.py" % folder)
+            context.SetInstance("app")
+            context.SetBuildFolder("%s/build" % folder)
+            self.handler.SetContext(context)
+            self.assertEqual(self.handler.GetWatchedFolders(), ([folder, folder], ["%s/build" % folder]))
+            self.handler.GetProjectDependencies()[0].GetSources()
+            # a changed source does not change a glob
+            self.assertEqual(self.handler.GetProjectsAffectedByChanges(["%s/lib/src/main.cpp" % folder]), [])
+            self.assertEqual(self.handler.GetChangedCsnakeModules(), [])
+            # a new source
+            open("%s/lib/src/new.cpp" % folder, "w").close()
+            projects = self.handler.GetProjectsAffectedByChanges(["%s/lib/src/new.cpp" % folder])
+            self.assertEqual([x.name for x in projects], ["WatchLib"])
+            self.assertEqual(self.handler.GetChangedCsnakeModules(), ["csnWatchMain"])
+            self.handler.ReloadChangedFiles()
+            self.assertEqual(sorted(self.handler.GetProjectDependencies()[0].GetSources()), ["%s/lib/src/main.cpp" % folder, "%s/lib/src/new.cpp" % folder])
+            self.assertEqual(self.handler.GetProjectsAffectedByChanges(["%s/lib/src/new.cpp" % folder]), [])
+        finally:
+            csnModuleTracker.tracker.Clear()
+            shutil.rmtree(folder)
+
+    def testProfile(self):
+        """ csnGUIHandlerTest: the phases of configuring are written to the build folder as a trace and a summary. """
+        folder = os.path.realpath(tempfile.mkdtemp())
+        try:
+            os.mkdir("%s/sources" % folder)
+            open("%s/sources/a.cpp" % folder, "w").close()
+            open("%s/csnProfileMain.py" % folder, "w").write(
+                "import csnProject\nlib = csnProject.Project('ProfileLib', 'library')\nlib.AddSources(['sources/*.cpp'])\n"
+                "app = csnProject.Project('ProfileApp', 'executable')\napp.AddProjects([lib])\n")
+            context = csnContext.Context()
+            context.GetData()._SetCompilername("Unix Makefiles")
+            context.FindCompiler()
+            context.AddRootFolder(folder)
+            context.SetCsnakeFile("%s/csnProfileMain.py" % folder)
+            context.SetInstance("app")
+            context.SetBuildFolder("%s/build" % folder)
+            self.handler.SetContext(context)
+            self.handler.SetProfile(True)
+            try:
+                self.assertTrue(self.handler.ConfigureProjectToBuildFolder(_alsoRunCMake = False))
+                summary = self.handler.WriteProfile()
+            finally:
+                self.handler.SetProfile(False)
+            trace = json.load(open("%s/build/csnakeProfile.json" % folder))
+            spans = [(x["name"], x["args"].get("project")) for x in trace["traceEvents"] if x["ph"] == "X"]
+            for span in [("Configure project", None), ("Create instance", None), ("Load csnake modules", None), ("Relocate prebuilt binaries", None),
+                    ("Resolve files to install", "ProfileApp"), ("Generate", "ProfileApp"), ("Generate", "ProfileLib"), ("Write project data", None)]:
+                self.assertTrue(span in spans, span)
+            self.assertEqual(open("%s/build/csnakeProfile.txt" % folder).read(), summary)
+            self.assertFalse(os.path.exists("%s/build/csnakeProfile" % folder))
+        finally:
+            csnModuleTracker.tracker.Clear()
+            shutil.rmtree(folder)
+
+    def testFileSystemStats(self):
+        """ csnGUIHandlerTest: the file system calls of configuring are written next to projectData.json. """
+        folder = os.path.realpath(tempfile.mkdtemp())
+        try:
+            os.mkdir("%s/sources" % folder)
+            open("%s/sources/a.cpp" % folder, "w").close()
+            open("%s/csnStatsMain.py" % folder, "w").write(
+                "import csnProject, os\nos.listdir(os.path.dirname(__file__))\n"
+                "lib = csnProject.Project('StatsLib', 'library')\nlib.AddSources(['sources/*.cpp'])\n"
+                "app = csnProject.Project('StatsApp', 'executable')\napp.AddProjects([lib])\n")
+            context = csnContext.Context()
+            context.GetData()._SetCompilername("Unix Makefiles")
+            context.FindCompiler()
+            context.AddRootFolder(folder)
+            context.SetCsnakeFile("%s/csnStatsMain.py" % folder)
+            context.SetInstance("app")
+            context.SetBuildFolder("%s/build" % folder)
+            self.handler.SetContext(context)
+            self.handler.SetProfile(True)
+            self.handler.SetFileSystemStats(True)
+            try:
+                self.assertTrue(self.handler.ConfigureProjectToBuildFolder(_alsoRunCMake = False))
+                self.handler.WriteFileSystemStats()
+            finally:
+                self.handler.SetFileSystemStats(False)
+                self.handler.SetProfile(False)
+            self.assertTrue(os.path.exists("%s/build/executable/StatsApp/projectData.json" % folder))
+            stats = json.load(open("%s/build/executable/StatsApp/csnakeFileSystemStats.json" % folder))
+            self.assertTrue(stats["totals"]["listdir"]["count"] >= 1)
+            self.assertTrue("Load csnake modules" in [x["phase"] for x in stats["phase"]])
+            self.assertTrue("StatsLib" in [x["project"] for x in stats["project"]])
+            scripts = dict([(x["script"], x) for x in stats["script"]])
+            self.assertEqual(scripts["%s/csnStatsMain.py" % folder]["listdir"]["count"], 1)
+            self.assertTrue(os.path.exists("%s/build/executable/StatsApp/csnakeFileSystemStats.txt" % folder))
+        finally:
+            csnModuleTracker.tracker.Clear()
+            shutil.rmtree(folder)
+
+    def testBuildMultiple(self):
+        """ csnGUIHandlerTest: independent third party solutions are built at the same time, with a log for each solution. """
+        folder = tempfile.mkdtemp()
+        try:
+            context = csnContext.Context()
+            context.GetData()._SetCompilername("Unix Makefiles")
+            solutions = []
+            for (index, command) in enumerate(["echo one", "echo two", "echo failed >&2; false"]):
+                context.AddThirdPartySrcAndBuildFolder("%s/src%s" % (folder, index), "%s/build%s" % (folder, index))
+                os.makedirs("%s/src%s" % (folder, index))
+                os.makedirs("%s/build%s/Release" % (folder, index))
+                makefile = open("%s/build%s/Release/Makefile" % (folder, index), 'w')
+                makefile.write("all:\n\t@echo '[ 50%%] Building'\n\t@%s\n" % command)
+                makefile.close()
+                solutions.append("%s/build%s/CILAB_TOOLKIT.sln" % (folder, index))
+            context.SetThirdPartyDependencies("%s/src1" % folder, ["%s/src2" % folder])
+            self.handler.SetContext(context)
+            self.handler.SetNumberOfJobs(4)
+            
+            self.assertFalse(self.handler.BuildMultiple(solutions, "Release", True))
+            # solution 1 depends on the solution that failed
+            message = self.handler.GetErrorMessage()
+            self.assertTrue("failed" in message)
+            self.assertTrue("Not built" in message)
+            self.assertTrue(solutions[1] in message)
+            logFilename = "%s/buildLog0.txt" % csnUtility.GetCSnakeUserFolder()
+            self.assertEqual(open(logFilename).read(), "[ 50%] Building\none\n")
+        finally:
+            shutil.rmtree(folder)
+        
 if __name__ == "__main__":
     unittest.main() 
@@ -24,6 +24,21 @@ class csnGUIOptionsTests(unittest.TestCase):
         # test the options conversion
         self.ReadOptionsTest(1.1, "options11a.txt")
 
+    def testProfile(self):
+        ''' csnGUIOptionsTests: the profile option is saved (older files do not have it). '''
+        options = Options()
+        options.Load("options11a.txt")
+        self.assertEqual(options.GetProfile(), False)
+        options.SetField("_Options__profile", True)
+        filename = "test_profile_options.txt"
+        options.Save(filename)
+        try:
+            newOptions = Options()
+            newOptions.Load(filename)
+            self.assertEqual(newOptions.GetProfile(), True)
+        finally:
+            os.remove(filename)
+
     def ValuesTest(self, version, options):
         self.assertEqual( options.GetAskToLaunchIDE(), True )
         self.assertEqual( options.GetContextFilename(), "E:\\devel\\src\\toolkit\\module_clean.CSnakeGUI" )
@@ -4,8 +4,11 @@
 import unittest
 import csnContext
 import csnProject
+import csnInstall
 import shutil
 import os.path
+import tempfile
+import threading
 import csnUtility
 
 class csnInstallTests(unittest.TestCase):
@@ -55,5 +58,176 @@ class csnInstallTests(unittest.TestCase):
             assert project.installManager.filesToInstall["Release"][location] == ["Bye.h"]
             assert project.installManager.filesToInstall["Debug"][location] == ["Bye.h"]
         
+    def testInstallFile(self):
+        """ csnInstallTests: install a file in each mode, files that are up to date are not installed again. """
+        folder = tempfile.mkdtemp()
+        try:
+            source = "%s/source.txt" % folder
+            csnUtility.WriteFileIfDifferent(source, "one\n")
+            for mode in csnInstall.installModes:
+                destination = "%s/%s.txt" % (folder, mode)
+                self.assertTrue(csnInstall.InstallFile(source, destination, mode))
+                self.assertEqual(csnUtility.FileToString(destination), "one\n")
+                self.assertFalse(csnInstall.InstallFile(source, destination, mode))
+            if hasattr(os, "link"):
+                self.assertTrue(os.path.samefile(source, "%s/hardlink.txt" % folder))
+            if hasattr(os, "symlink"):
+                self.assertTrue(os.path.islink("%s/symlink.txt" % folder))
+            # a file installed with another mode is installed again (the destination is the same file as a link)
+            if hasattr(os, "link") and hasattr(os, "symlink"):
+                destination = "%s/switched.txt" % folder
+                self.assertTrue(csnInstall.InstallFile(source, destination, "symlink"))
+                self.assertTrue(csnInstall.InstallFile(source, destination, "copy"))
+                self.assertFalse(os.path.islink(destination))
+                self.assertFalse(os.path.samefile(source, destination))
+                self.assertFalse(csnInstall.InstallFile(source, destination, "copy"))
+                self.assertFalse(csnInstall.InstallFile(source, destination, "reflink"))
+                self.assertTrue(csnInstall.InstallFile(source, destination, "hardlink"))
+                self.assertTrue(os.path.samefile(source, destination))
+                self.assertTrue(csnInstall.InstallFile(source, destination, "copy"))
+                self.assertFalse(os.path.samefile(source, destination))
+                self.assertTrue(csnInstall.InstallFile(source, destination, "symlink"))
+                self.assertTrue(os.path.islink(destination))
+            # a newer source replaces a copy, without changing the old source through a link
+            mtime = os.path.getmtime(source) + 10
+            newSource = "%s/newSource.txt" % folder
+            csnUtility.WriteFileIfDifferent(newSource, "two\n")
+            os.utime(newSource, (mtime, mtime))
+            for mode in csnInstall.installModes:
+                self.assertTrue(csnInstall.InstallFile(newSource, "%s/%s.txt" % (folder, mode), "copy"))
+                self.assertEqual(csnUtility.FileToString("%s/%s.txt" % (folder, mode)), "two\n")
+            self.assertEqual(csnUtility.FileToString(source), "one\n")
+        finally:
+            shutil.rmtree(folder)
+            
+    def testInstallInThreads(self):
+        """ csnInstallTests: install files with several threads, the progress is notified in the calling thread. """
+        folder = tempfile.mkdtemp()
+        try:
+            files = []
+            for index in range(20):
+                files.append("%s/file%s.txt" % (folder, index))
+                csnUtility.WriteFileIfDifferent(files[-1], "%s\n" % index)
+            project = csnProject.Project("DummyInstall", "library")
+            project.AddFilesToInstall(files, _WIN32 = 1, _NOT_WIN32 = 1)
+            project.AddFilesToInstall(files[0:5], "sub", _debugOnly = 1, _WIN32 = 1, _NOT_WIN32 = 1)
+            self.assertEqual(len(project.installManager.PlanInstallBinariesToBuildFolder()), 45)
+            
+            class Listener:
+                def __init__(self, _onUpdate):
+                    self.progress = []
+                    self.threads = set()
+                    self.onUpdate = _onUpdate
+                def Update(self, _event):
+                    self.progress.append(_event.GetProgress())
+                    self.threads.add(threading.currentThread())
+                    self.onUpdate()
+            listener = Listener(lambda: None)
+            project.installManager.AddListener(listener)
+            project.installManager.batchSize = 4
+            self.assertTrue(project.installManager.InstallBinariesToBuildFolder("copy", 4))
+            self.assertEqual(listener.threads, set([threading.currentThread()]))
+            self.assertEqual(listener.progress, sorted(listener.progress))
+            self.assertEqual(len(listener.progress), 46)
+            buildFolder = csnProject.globalCurrentContext.GetBuildFolder()
+            self.assertEqual(csnUtility.FileToString("build/bin/Debug/sub/file4.txt"), "4\n")
+            self.assertEqual(csnUtility.FileToString("build/bin/Release/file19.txt"), "19\n")
+            
+            # cancel after the first file
+            shutil.rmtree(buildFolder)
+            project = csnProject.Project("DummyInstall", "library")
+            project.AddFilesToInstall(files, _WIN32 = 1, _NOT_WIN32 = 1)
+            listener.onUpdate = project.installManager.Cancel
+            project.installManager.AddListener(listener)
+            project.installManager.batchSize = 4
+            self.assertFalse(project.installManager.InstallBinariesToBuildFolder("copy", 1))
+            self.assertFalse(os.path.exists("build/bin/Release/file19.txt"))
+        finally:
+            shutil.rmtree(folder)
+            if os.path.exists(csnProject.globalCurrentContext.GetBuildFolder()):
+                shutil.rmtree(csnProject.globalCurrentContext.GetBuildFolder())
+        
+    def testInstallManifest(self):
+        """ csnInstallTests: unchanged files are skipped using the install manifest, stale files are removed. """
+        folder = tempfile.mkdtemp()
+        try:
+            files = []
+            for index in range(3):
+                files.append("%s/file%s.txt" % (folder, index))
+                csnUtility.WriteFileIfDifferent(files[-1], "%s\n" % index)
+            def Install(_files, _mode = "copy"):
+                project = csnProject.Project("DummyInstall", "library")
+                project.AddFilesToInstall(_files, _releaseOnly = 1, _WIN32 = 1, _NOT_WIN32 = 1)
+                self.assertTrue(project.installManager.InstallBinariesToBuildFolder(_mode))
+                manager = project.installManager
+                return (manager.nInstalledFiles, manager.nSkippedFiles, manager.nRemovedFiles)
+            
+            self.assertEqual(Install(files), (3, 0, 0))
+            self.assertEqual(Install(files), (0, 3, 0))
+            # an unchanged entry is skipped without looking at the installed file
+            os.remove("build/bin/Release/file0.txt")
+            self.assertEqual(Install(files), (0, 3, 0))
+            self.assertFalse(os.path.exists("build/bin/Release/file0.txt"))
+            # a changed source is installed again
+            mtime = os.path.getmtime(files[1]) + 10
+            csnUtility.WriteFileIfDifferent(files[1], "changed\n")
+            os.utime(files[1], (mtime, mtime))
+            self.assertEqual(Install(files), (1, 2, 0))
+            self.assertEqual(csnUtility.FileToString("build/bin/Release/file1.txt"), "changed\n")
+            # files that are no longer installed are removed
+            self.assertEqual(Install(files[1:2]), (0, 1, 1))
+            self.assertFalse(os.path.exists("build/bin/Release/file2.txt"))
+            self.assertTrue(os.path.exists("build/bin/Release/file1.txt"))
+            # a change of the install mode installs the files again, with the new mode
+            if hasattr(os, "link") and hasattr(os, "symlink"):
+                installed = "build/bin/Release/file1.txt"
+                self.assertEqual(Install(files[1:2], "symlink"), (1, 0, 0))
+                self.assertTrue(os.path.islink(installed))
+                self.assertEqual(Install(files[1:2], "symlink"), (0, 1, 0))
+                self.assertEqual(Install(files[1:2], "copy"), (1, 0, 0))
+                self.assertFalse(os.path.islink(installed))
+                self.assertFalse(os.path.samefile(files[1], installed))
+                self.assertEqual(Install(files[1:2], "hardlink"), (1, 0, 0))
+                self.assertTrue(os.path.samefile(files[1], installed))
+                self.assertEqual(Install(files[1:2], "copy"), (1, 0, 0))
+                self.assertFalse(os.path.samefile(files[1], installed))
+                self.assertEqual(Install(files[1:2], "copy"), (0, 1, 0))
+        finally:
+            shutil.rmtree(folder)
+            if os.path.exists(csnProject.globalCurrentContext.GetBuildFolder()):
+                shutil.rmtree(csnProject.globalCurrentContext.GetBuildFolder())
+        
+    def testResolveOnce(self):
+        """ csnInstallTests: the paths of the files to install are resolved again only when the inputs changed. """
+        folder = tempfile.mkdtemp()
+        try:
+            os.makedirs("%s/lib/CVS" % folder)
+            for filename in ("a.dll", "lib/b.dll", "lib/CVS/Entries"):
+                csnUtility.WriteFileIfDifferent("%s/%s" % (folder, filename), "")
+            project = csnProject.Project("DummyInstall", "library")
+            project.AddFilesToInstall(["%s/*.dll" % folder, "%s/lib" % folder], "plugins", _WIN32 = 1, _NOT_WIN32 = 1)
+            index = csnUtility.thirdPartyBuildIndex
+            index.ResetStatistics()
+            project.installManager.ResolvePathsOfFilesToInstall()
+            expected = { "plugins" : ["%s/a.dll" % folder, "%s/lib/b.dll" % folder] }
+            self.assertEqual(project.installManager.filesToInstall["Debug"], expected)
+            self.assertEqual(project.installManager.filesToInstall["Release"], expected)
+            # each pattern is resolved once, for both modes
+            nGlobs = index.GetStatistics()["globs"]
+            self.assertEqual(nGlobs, 2)
+            project.installManager.ResolvePathsOfFilesToInstall()
+            self.assertEqual(index.GetStatistics()["globs"], nGlobs)
+            # a new file is found after invalidating, and after adding files to install
+            csnUtility.WriteFileIfDifferent("%s/c.dll" % folder, "")
+            csnUtility.InvalidatePathCache(folder)
+            project.installManager.ResolvePathsOfFilesToInstall()
+            self.assertEqual(project.installManager.filesToInstall["Debug"]["plugins"], ["%s/a.dll" % folder, "%s/c.dll" % folder, "%s/lib/b.dll" % folder])
+            project.AddFilesToInstall(["%s/lib/b.dll" % folder], _releaseOnly = 1, _WIN32 = 1, _NOT_WIN32 = 1)
+            project.installManager.ResolvePathsOfFilesToInstall()
+            self.assertEqual(project.installManager.filesToInstall["Release"]["."], ["%s/lib/b.dll" % folder])
+            self.assertFalse("." in project.installManager.filesToInstall["Debug"])
+        finally:
+            shutil.rmtree(folder)
+        
 if __name__ == "__main__":
     unittest.main()
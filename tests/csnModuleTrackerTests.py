@@ -0,0 +1,103 @@
+## @package csnModuleTrackerTests
+# Definition of the csnModuleTrackerTests class.
+# \ingroup tests
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import csnFileSystemIndex
+import csnModuleTracker
+
+class csnModuleTrackerTests(unittest.TestCase):
+    """ Unit tests for the ModuleTracker class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = os.path.realpath(tempfile.mkdtemp())
+        self.index = csnFileSystemIndex.FileSystemIndex()
+        self.index.SetFolders([self.folder])
+        self.tracker = csnModuleTracker.ModuleTracker()
+        os.mkdir("%s/sources" % self.folder)
+        self.__Write("mtBase", "value = 1\n")
+        self.__Write("mtUser", "import mtBase\nvalue = mtBase.value + 1\n")
+        self.__Write("mtByName", "def Load():\n    return __import__('mtBase')\n")
+        self.__Write("mtOther", "value = 3\n")
+        self.__Write("mtProject", "class Object:\n    pass\nproject = Object()\nproject.pathsManager = Object()\nproject.pathsManager.globs = dict()\n")
+        self.__Write("mtGlobber", "sources = index.Glob(%r)\n" % ("%s/sources/*.cpp" % self.folder))
+        sys.path.append(self.folder)
+        self.dontWriteBytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+
+    def tearDown(self):
+        """ Run after test. """
+        self.tracker.Clear()
+        sys.dont_write_bytecode = self.dontWriteBytecode
+        sys.path.remove(self.folder)
+        shutil.rmtree(self.folder)
+
+    def __Write(self, _name, _text):
+        open("%s/%s.py" % (self.folder, _name), "w").write(_text)
+
+    def __Load(self):
+        """ Loads all test modules, returns the modules that were unloaded before loading. """
+        unloaded = self.tracker.Prepare("key", [self.folder], self.index)
+        self.index.Invalidate()
+        self.tracker.Begin()
+        try:
+            for name in ("mtBase", "mtUser", "mtByName", "mtOther", "mtProject"):
+                __import__(name)
+            if not "mtGlobber" in sys.modules:
+                # the module globs while it is loaded
+                sys.modules["mtGlobber"] = module = type(sys)("mtGlobber")
+                module.__file__ = "%s/mtGlobber.py" % self.folder
+                module.index = self.index
+                exec open(module.__file__).read() in vars(module)
+        finally:
+            self.tracker.End()
+        return unloaded
+
+    def __Touch(self, _name):
+        filename = "%s/%s.py" % (self.folder, _name)
+        stat = os.stat(filename)
+        os.utime(filename, (stat.st_atime, stat.st_mtime + 10))
+
+    def testReload(self):
+        """ csnModuleTrackerTests: only changed modules and the modules that refer to them are reloaded. """
+        self.assertEqual(self.__Load(), [])
+        self.assertEqual(self.tracker.GetTrackedModules(), ["mtBase", "mtByName", "mtGlobber", "mtOther", "mtProject", "mtUser"])
+        other = sys.modules["mtOther"]
+        # nothing changed
+        self.assertEqual(self.__Load(), [])
+        self.assertTrue(sys.modules["mtOther"] is other)
+        # a changed module and the modules that refer to it
+        self.__Write("mtBase", "value = 10\n")
+        self.__Touch("mtBase")
+        self.assertEqual(self.__Load(), ["mtBase", "mtByName", "mtUser"])
+        self.assertEqual(sys.modules["mtUser"].value, 11)
+        self.assertTrue(sys.modules["mtOther"] is other)
+        # a new file that matches a glob of a module
+        open("%s/sources/new.cpp" % self.folder, "w").close()
+        self.assertEqual(self.__Load(), ["mtGlobber"])
+        self.assertEqual(sys.modules["mtGlobber"].sources, ["%s/sources/new.cpp" % self.folder])
+        # a new file that matches a glob that a project did after loading
+        pattern = "%s/sources/*.h" % self.folder
+        sys.modules["mtProject"].project.pathsManager.globs[pattern] = self.index.Glob(pattern)
+        self.assertEqual(self.__Load(), [])
+        open("%s/sources/new.h" % self.folder, "w").close()
+        self.assertEqual(self.__Load(), ["mtProject"])
+        # a different key reloads everything
+        self.assertEqual(self.tracker.Prepare("other key", [self.folder]), ["mtBase", "mtByName", "mtGlobber", "mtOther", "mtProject", "mtUser"])
+        self.assertFalse("mtOther" in sys.modules)
+
+    def testKeepBytecode(self):
+        """ csnModuleTrackerTests: the bytecode of unchanged modules is kept, the bytecode of changed modules is removed. """
+        self.__Load()
+        self.__Touch("mtBase")
+        self.tracker.Prepare("key", [self.folder], self.index)
+        self.assertFalse(os.path.exists("%s/mtBase.pyc" % self.folder))
+        self.assertTrue(os.path.exists("%s/mtUser.pyc" % self.folder))
+        self.assertTrue(os.path.exists("%s/mtOther.pyc" % self.folder))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+## @package csnPathCanonicalizerTests
+# Definition of the csnPathCanonicalizerTests class.
+# \ingroup tests
+import unittest
+import os
+import shutil
+import tempfile
+import csnPathCanonicalizer
+
+def LegacyCorrectPath(path):
+    """ The original (not memoized) implementation of csnUtility.CorrectPath. """
+    (first,second) = os.path.split(path)
+    if second != "":
+        firstCorrected = LegacyCorrectPath(first)
+        secondCorrected = second
+        if os.path.exists(first):
+            for name in os.listdir(first):
+                if name.lower() == second.lower():
+                    secondCorrected = name
+        return os.path.join(firstCorrected, secondCorrected)
+    else:
+        return first
+
+class csnPathCanonicalizerTests(unittest.TestCase):
+    """ Unit tests for the PathCanonicalizer class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """ Run after test. """
+        shutil.rmtree(self.folder)
+        
+    def testCorrectPath(self):
+        """ csnPathCanonicalizerTests: CorrectPath gives the same results as the original implementation. """
+        canonicalizer = csnPathCanonicalizer.PathCanonicalizer()
+        paths = ["", ".", "data/my src/", "data/my src/DuMMyLib/libmodules", "data/my src/DummyLib/liBmoDules", 
+            "data/mY sRc/DuMMyLib/doEsnoTexist", "doEs/nOt/eXist", os.path.abspath("data/MY SRC/dummylib")]
+        for path in paths + paths:
+            self.assertEqual(canonicalizer.CorrectPath(path), LegacyCorrectPath(path))
+        
+    def testStatistics(self):
+        """ csnPathCanonicalizerTests: folders are listed once, later results come from the caches. """
+        os.makedirs("%s/One/Two" % self.folder)
+        canonicalizer = csnPathCanonicalizer.PathCanonicalizer(_correctCase = True)
+        path = "%s/one/two/three" % self.folder
+        self.assertEqual(canonicalizer.Normalize(path), LegacyCorrectPath(os.path.normpath(path)).replace("\\", "/"))
+        listdirCalls = canonicalizer.GetStatistics()["listdirCalls"]
+        self.assertTrue(listdirCalls > 0)
+        self.assertEqual(canonicalizer.GetStatistics()["hits"], 0)
+        canonicalizer.Normalize("%s/one/two/three" % self.folder)
+        canonicalizer.Normalize("%s/one/two/four" % self.folder)
+        statistics = canonicalizer.GetStatistics()
+        self.assertEqual(statistics["listdirCalls"], listdirCalls)
+        self.assertEqual(statistics["hits"], 2)
+        
+    def testNoCaseCorrection(self):
+        """ csnPathCanonicalizerTests: without case correction, Normalize does not access the file system. """
+        os.makedirs("%s/One" % self.folder)
+        canonicalizer = csnPathCanonicalizer.PathCanonicalizer(_correctCase = False)
+        self.assertEqual(canonicalizer.Normalize("%s/one/./x/../two" % self.folder), "%s/one/two" % self.folder.replace("\\", "/"))
+        self.assertEqual(canonicalizer.GetStatistics()["listdirCalls"], 0)
+        
+    def testInvalidate(self):
+        """ csnPathCanonicalizerTests: after invalidating a folder, its new contents are found. """
+        canonicalizer = csnPathCanonicalizer.PathCanonicalizer(_correctCase = True)
+        path = os.path.join(self.folder, "newfolder", "sub")
+        self.assertEqual(canonicalizer.CorrectPath(path), path)
+        os.makedirs(os.path.join(self.folder, "NewFolder", "Sub"))
+        self.assertEqual(canonicalizer.CorrectPath(path), path)
+        canonicalizer.Invalidate(self.folder)
+        self.assertEqual(canonicalizer.CorrectPath(path), LegacyCorrectPath(path))
+        self.assertTrue(canonicalizer.CorrectPath(path).startswith(os.path.join(self.folder, "NewFolder")))
+        
+if __name__ == "__main__":
+    unittest.main()
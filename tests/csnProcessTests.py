@@ -0,0 +1,111 @@
+## @package csnProcessTests
+# Definition of the csnProcessTests class.
+# \ingroup tests
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+import csnProcess
+
+# fake build tool: writes progress lines to stdout and a lot of output to stderr at the same time
+fakeMake = """
+import sys
+for percent in (10, 50, 100):
+    sys.stdout.write("[%3d%%] Building\\n" % percent)
+    sys.stdout.flush()
+    sys.stderr.write("warning\\n" * 20000)
+    sys.stderr.flush()
+sys.stdout.write("no newline")
+sys.exit(2)
+"""
+
+# fake build tool that starts a child process that keeps running, and writes the pid of the child to a file
+fakeHang = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+open(sys.argv[1], "w").write(str(child.pid))
+sys.stdout.write("-- Processing one\\n")
+sys.stdout.flush()
+time.sleep(60)
+"""
+
+class csnProcessTests(unittest.TestCase):
+    """ Unit tests for the ProcessRunner class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """ Run after test. """
+        shutil.rmtree(self.folder)
+
+    def testStreams(self):
+        """ csnProcessTests: both streams are read at the same time, the last lines are kept, progress is matched. """
+        progress = []
+        output = []
+        runner = csnProcess.ProcessRunner([sys.executable, "-c", fakeMake], self.folder, [csnProcess.PercentMatcher()],
+            progress.append, output.append, _bufferSize = 100)
+        self.assertEqual(runner.Run(), 2)
+        self.assertEqual(progress, [10, 50, 99])
+        self.assertEqual(output, ["[ 10%] Building\n", "[ 50%] Building\n", "[100%] Building\n", "no newline"])
+        self.assertEqual(runner.GetOutput(), output)
+        self.assertEqual(runner.GetErrors(), ["warning\n"] * 100)
+        self.assertEqual(runner.GetNumberOfErrorLines(), 60000)
+        self.assertFalse(runner.IsCanceled())
+
+    def testCountMatcher(self):
+        """ csnProcessTests: the progress of counted lines. """
+        matcher = csnProcess.CountMatcher("-- Processing", 4)
+        self.assertEqual([matcher.Match(x) for x in ["-- Processing a", "other", "-- Processing b"]], [0, None, 25])
+
+    def testCancel(self):
+        """ csnProcessTests: canceling kills the process and the processes it started. """
+        if sys.platform == "win32":
+            return
+        pidFilename = "%s/pid.txt" % self.folder
+        progress = []
+        runner = csnProcess.ProcessRunner([sys.executable, "-c", fakeHang, pidFilename], self.folder,
+            [csnProcess.CountMatcher("-- Processing", 2)], progress.append, _isCanceled = lambda: len(progress) > 0)
+        start = time.time()
+        self.assertEqual(runner.Run(), None)
+        self.assertTrue(runner.IsCanceled())
+        self.assertTrue(time.time() - start < 30)
+        childPid = int(open(pidFilename).read())
+        # the child is killed (give the init process a moment to reap it)
+        deadline = time.time() + 5
+        while time.time() < deadline and self.__IsRunning(childPid):
+            time.sleep(0.05)
+        self.assertFalse(self.__IsRunning(childPid))
+
+    def __IsRunning(self, _pid):
+        try:
+            os.kill(_pid, 0)
+        except OSError:
+            return False
+        # a zombie process is not running
+        statusFilename = "/proc/%s/status" % _pid
+        if os.path.exists(statusFilename):
+            return not "zombie" in open(statusFilename).read()
+        return True
+
+    def testConcurrentRunners(self):
+        """ csnProcessTests: several processes run at the same time, in different threads. """
+        results = dict()
+        def Run(_index):
+            runner = csnProcess.ProcessRunner([sys.executable, "-c", "import time; time.sleep(0.5); print %s" % _index])
+            results[_index] = (runner.Run(), runner.GetOutput())
+        threads = [threading.Thread(target = Run, args = (x,)) for x in range(4)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(time.time() - start < 1.9)
+        self.assertEqual(results, dict([(x, (0, ["%s\n" % x])) for x in range(4)]))
+
+if __name__ == "__main__":
+    unittest.main()
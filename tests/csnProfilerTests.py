@@ -0,0 +1,92 @@
+## @package csnProfilerTests
+# Definition of the csnProfilerTests class.
+# \ingroup tests
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+import csnProfiler
+
+class csnProfilerTests(unittest.TestCase):
+    """ Unit tests for the csnProfiler class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.profiler = csnProfiler.Profiler()
+
+    def testDisabled(self):
+        """ csnProfilerTests: a disabled profiler records nothing. """
+        span = self.profiler.Begin("phase")
+        self.assertTrue(span is None)
+        self.profiler.End(span)
+        self.assertEqual(self.profiler.GetSpans(), [])
+
+    def testSpans(self):
+        """ csnProfilerTests: nested spans are written as a trace, and summarized with their self time. """
+        self.profiler.Enable()
+        outer = self.profiler.Begin("outer", { "project" : "A" })
+        for index in range(2):
+            inner = self.profiler.Begin("inner")
+            time.sleep(0.01)
+            self.profiler.End(inner)
+        self.profiler.End(outer)
+
+        spans = self.profiler.GetSpans()
+        self.assertEqual([(x.name, x.depth) for x in spans], [("outer", 0), ("inner", 1), ("inner", 1)])
+        self.assertTrue(spans[0].childDuration >= 0.02)
+        self.assertTrue(spans[0].duration >= spans[0].childDuration)
+
+        events = [x for x in self.profiler.GetTrace()["traceEvents"] if x["ph"] == "X"]
+        self.assertEqual([x["name"] for x in events], ["outer", "inner", "inner"])
+        self.assertEqual(events[0]["args"], { "project" : "A" })
+        self.assertTrue(events[1]["ts"] >= events[0]["ts"])
+        self.assertTrue(events[1]["ts"] + events[1]["dur"] <= events[0]["ts"] + events[0]["dur"] + 1)
+
+        lines = self.profiler.GetSummary().splitlines()
+        self.assertEqual([x.split()[0] for x in lines], ["span", "outer", "inner"])
+        self.assertEqual(lines[2].split()[1], "2")
+
+        self.profiler.Clear()
+        self.assertEqual(self.profiler.GetSpans(), [])
+
+    def testThreads(self):
+        """ csnProfilerTests: spans in other threads are nested within their own thread. """
+        self.profiler.Enable()
+        outer = self.profiler.Begin("outer")
+        def Work():
+            self.profiler.End(self.profiler.Begin("work"))
+        thread = threading.Thread(target = Work)
+        thread.start()
+        thread.join()
+        self.profiler.End(outer)
+        spans = dict([(x.name, x) for x in self.profiler.GetSpans()])
+        self.assertEqual(spans["work"].depth, 0)
+        self.assertNotEqual(spans["work"].threadIndex, spans["outer"].threadIndex)
+        self.assertEqual(spans["outer"].childDuration, 0.0)
+        threadNames = [x for x in self.profiler.GetTrace()["traceEvents"] if x["ph"] == "M"]
+        self.assertEqual(len(threadNames), 2)
+
+    def testProfilePhases(self):
+        """ csnProfilerTests: the outermost phases are profiled with cProfile, and written with the trace and summary. """
+        if csnProfiler.cProfile is None:
+            return
+        folder = tempfile.mkdtemp()
+        try:
+            self.profiler.Enable(_profilePhases = True)
+            phase = self.profiler.Begin("Load csnake modules", _phase = True)
+            self.profiler.End(self.profiler.Begin("Create instance", _phase = True))
+            self.profiler.End(phase)
+            self.profiler.End(self.profiler.Begin("Generate", _phase = True))
+            self.profiler.End(self.profiler.Begin("Run make"))
+            summary = self.profiler.Write(folder)
+            self.assertTrue("Generate" in summary)
+            self.assertEqual(open("%s/csnakeProfile.txt" % folder).read(), summary)
+            self.assertTrue(os.path.exists("%s/csnakeProfile.json" % folder))
+            self.assertEqual(sorted(os.listdir("%s/csnakeProfile" % folder)), ["000_LoadCsnakeModules.prof", "001_Generate.prof"])
+        finally:
+            shutil.rmtree(folder)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+## @package csnProjectCacheTests
+# Definition of the csnProjectCacheTests class.
+# \ingroup tests
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import csnContext
+import csnDependencies
+import csnFileSystemIndex
+import csnInstall
+import csnProject
+import csnProjectCache
+import csnUtility
+
+class csnProjectCacheTests(unittest.TestCase):
+    """ Unit tests for the ProjectCache class. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = os.path.realpath(tempfile.mkdtemp())
+        self.filename = csnProjectCache.GetCacheFilename("%s/build" % self.folder)
+        self.index = csnFileSystemIndex.FileSystemIndex()
+        os.mkdir("%s/sources" % self.folder)
+        open("%s/sources/a.cpp" % self.folder, "w").close()
+        # a csnake file
+        open("%s/csnCacheTest.py" % self.folder, "w").write("def Callback():\n    pass\n")
+        sys.path.append(self.folder)
+        import csnCacheTest
+        self.csnakeModule = csnCacheTest
+
+    def tearDown(self):
+        """ Run after test. """
+        del sys.modules["csnCacheTest"]
+        sys.path.remove(self.folder)
+        shutil.rmtree(self.folder)
+
+    def __Cache(self, _key = "key"):
+        return csnProjectCache.ProjectCache(self.filename, _key, [self.folder])
+
+    def __Save(self, _graph, _context):
+        cache = self.__Cache()
+        cache.Record(self.index)
+        try:
+            self.index.Glob("%s/sources/*.cpp" % self.folder)
+        finally:
+            cache.StopRecording()
+        cache.Save(_graph, _context)
+
+    def testLoad(self):
+        """ csnProjectCacheTests: the graph is loaded with the current context, functions and methods are restored. """
+        context = csnContext.Context()
+        manager = csnInstall.Manager(None)
+        graph = { "context" : context, "function" : csnUtility.NormalizePath, "method" : manager.AddFilesToInstall, "manager" : manager }
+        self.__Save(graph, context)
+        otherContext = csnContext.Context()
+        loaded = self.__Cache().Load(otherContext, self.index)
+        self.assertTrue(loaded["context"] is otherContext)
+        self.assertTrue(loaded["function"] is csnUtility.NormalizePath)
+        self.assertTrue(loaded["method"].im_self is loaded["manager"])
+        self.assertTrue(loaded["method"].im_func is csnInstall.Manager.AddFilesToInstall.im_func)
+
+    def testFingerprint(self):
+        """ csnProjectCacheTests: the graph is not loaded after a change of the key, the globbed folders or the csnake files. """
+        context = csnContext.Context()
+        self.__Save(["graph"], context)
+        self.assertEqual(self.__Cache().Load(context, self.index), ["graph"])
+        self.assertEqual(self.__Cache("other key").Load(context, self.index), None)
+        # a new file in a globbed folder
+        open("%s/sources/b.cpp" % self.folder, "w").close()
+        self.assertEqual(self.__Cache().Load(context, self.index), None)
+        self.__Save(["graph"], context)
+        self.assertEqual(self.__Cache().Load(context, self.index), ["graph"])
+        # a changed csnake file
+        filename = "%s/csnCacheTest.py" % self.folder
+        os.utime(filename, (0, os.path.getmtime(filename) + 10))
+        self.assertEqual(self.__Cache().Load(context, self.index), None)
+
+    def testDependencyGraph(self):
+        """ csnProjectCacheTests: the dependency graph snapshots are not stored, they would be outdated in another process. """
+        context = csnContext.Context()
+        context.GetData()._SetCompilername("Unix Makefiles")
+        context.FindCompiler()
+        context.SetBuildFolder("%s/build" % self.folder)
+        csnProject.globalCurrentContext = context
+        changes = csnDependencies._dependencyChanges
+        try:
+            a = csnProject.Project("A", "library")
+            b = csnProject.Project("B", "library")
+            a.AddProjects([b])
+            self.assertEqual([x.name for x in a.GetProjects(_recursive = 1)], ["B"])
+            self.__Save([a, b], context)
+            (a, b) = self.__Cache().Load(context, self.index)
+            self.assertTrue(a.dependenciesManager.graph is None)
+            # in a new process, the number of dependency changes can reach the value of the stored graph again
+            csnDependencies._dependencyChanges = changes
+            b.AddProjects([csnProject.Project("X", "library")])
+            self.assertEqual([x.name for x in a.GetProjects(_recursive = 1)], ["X", "B"])
+        finally:
+            csnDependencies._dependencyChanges = max(changes, csnDependencies._dependencyChanges) + 1
+            csnProject.globalCurrentContext = None
+
+    def testUncacheable(self):
+        """ csnProjectCacheTests: functions of csnake files and lambdas are not stored. """
+        context = csnContext.Context()
+        self.assertRaises(csnProjectCache.UncacheableError, self.__Save, [self.csnakeModule.Callback], context)
+        self.assertRaises(csnProjectCache.UncacheableError, self.__Save, [lambda: None], context)
+        self.assertFalse(os.path.exists(self.filename))
+
+if __name__ == "__main__":
+    unittest.main()
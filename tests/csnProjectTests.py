@@ -9,6 +9,7 @@ import csnProject
 import csnGenerator
 import csnDependencies
 import shutil
+import tempfile
 import csnContext
 
 class csnProjectTests(unittest.TestCase):
@@ -122,6 +123,9 @@ class csnProjectTests(unittest.TestCase):
         dummyExe.AddSources(["data/my src/DummyExe/src/*.cpp"])
         # should have 1 source files
         assert len(dummyExe.GetSources()) == 1, csnUtility.Join(dummyExe.GetSources(), _addQuotes=1)
+        # a glob that is done again replaces the recorded glob
+        dummyExe.Glob("data/my src/DummyExe/src/*.cpp")
+        self.assertEqual(len(dummyExe.pathsManager.globs), 1)
 
     def testSourceRootFolder(self):
         """ csnProjectTests: test that the source root folder, containing csnBuildTest.py, is deduced correctly by the parent class csnBuild.Project. """
@@ -132,5 +136,41 @@ class csnProjectTests(unittest.TestCase):
         # check folder
         self.assertEqual(os.path.abspath(dummyExe.sourceRootFolder), os.path.abspath(os.path.dirname(__file__)))
 
+    def testAddAndRemoveSources(self):
+        """ csnProjectTests: the sources, source groups, moc and ui sources keep the order in which the sources were added. """
+        folder = csnUtility.NormalizePath(os.path.realpath(tempfile.mkdtemp()))
+        try:
+            for name in ("d.cpp", "c.cpp", "b.h", "a.ui"):
+                open("%s/%s" % (folder, name), "w").close()
+            project = csnProject.Project("Sources", "library", folder)
+            project.AddSources(["d.cpp", "c.cpp", "d.cpp"], _sourceGroup = "Sources")
+            project.AddSources(["b.h"], _moc = 1, _sourceGroup = "Headers")
+            project.AddSources(["a.ui", "b.h"], _ui = 1, _moc = 1)
+            project.RemoveSources(["c.cpp", "missing.cpp"])
+            project.AddSources(["c.cpp"], _sourceGroup = "Headers")
+            compileManager = project.GetCompileManager()
+            self.assertEqual(compileManager.sources, ["%s/%s" % (folder, x) for x in ("d.cpp", "b.h", "a.ui", "c.cpp")])
+            self.assertEqual(compileManager.sourceGroups, { "Sources" : ["%s/d.cpp" % folder], "Headers" : ["%s/b.h" % folder, "%s/c.cpp" % folder] })
+            self.assertEqual(compileManager.sourcesToBeMoced, ["%s/b.h" % folder, "%s/a.ui" % folder])
+            self.assertEqual(compileManager.sourcesToBeUIed, ["%s/a.ui" % folder])
+            project.RemoveSources(["*.h", "a.ui"])
+            dump = project.GetCompileManager().Dump()
+            self.assertEqual(dump["sources"], ["%s/d.cpp" % folder, "%s/c.cpp" % folder])
+            self.assertEqual(dump["sourceGroups"], { "Sources" : ["%s/d.cpp" % folder], "Headers" : ["%s/c.cpp" % folder] })
+            self.assertEqual(dump["sourcesToBeMoced"], [])
+            self.assertEqual(dump["sourcesToBeUIed"], [])
+            self.assertTrue("%s/d.cpp" % folder in compileManager.sources)
+            self.assertFalse("%s/b.h" % folder in compileManager.sources)
+        finally:
+            shutil.rmtree(folder)
+
+    def testThirdPartyIndex(self):
+        """ csnProjectTests: the index of the third party folder that contains the source root folder of a project is found. """
+        folder = csnUtility.NormalizePath(os.path.dirname(os.path.abspath(__file__)))
+        self.context.AddThirdPartySrcAndBuildFolder(folder, folder + "/build/thirdParty")
+        project = csnProject.Project("DummyExe", "executable", folder + "/data")
+        self.assertEqual(project.thirdPartyIndex, self.context.GetNumberOfThirdPartyFolders() - 1)
+        self.assertEqual(csnProject.Project("DummyLib", "library").thirdPartyIndex, 0)
+
 if __name__ == "__main__":
     unittest.main()
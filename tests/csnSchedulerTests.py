@@ -0,0 +1,80 @@
+## @package csnSchedulerTests
+# Definition of the csnSchedulerTests class.
+# \ingroup tests
+import unittest
+import threading
+import time
+import csnScheduler
+
+class csnSchedulerTests(unittest.TestCase):
+    """ Unit tests for the Scheduler class. """
+
+    def __Run(self, _nSlots, _tasks, _dependencies, _failing = ()):
+        """ Runs the tasks, returns the results, the order in which the tasks finished and the maximum number of concurrent tasks. """
+        lock = threading.Lock()
+        finished = []
+        state = { "running" : 0, "maximum" : 0 }
+        def Function(_task, _postEvent):
+            lock.acquire()
+            state["running"] += 1
+            state["maximum"] = max(state["maximum"], state["running"])
+            lock.release()
+            time.sleep(0.02)
+            _postEvent(_task)
+            lock.acquire()
+            state["running"] -= 1
+            finished.append(_task)
+            lock.release()
+            return not _task in _failing
+        events = []
+        results = csnScheduler.Scheduler(_nSlots).Run(_tasks, _dependencies, Function, lambda task, event: events.append((task, event)))
+        self.assertEqual(sorted(events), sorted([(x, x) for x in finished]))
+        return (results, finished, state["maximum"])
+
+    def testDependencies(self):
+        """ csnSchedulerTests: a task starts after the tasks it depends on, independent tasks run concurrently. """
+        dependencies = { "c" : ["a", "b"], "d" : ["c"] }
+        for nSlots in (1, 2, 4):
+            (results, finished, maximum) = self.__Run(nSlots, ["a", "b", "c", "d", "e"], dependencies)
+            self.assertEqual(results, { "a" : True, "b" : True, "c" : True, "d" : True, "e" : True })
+            self.assertTrue(finished.index("c") > max(finished.index("a"), finished.index("b")))
+            self.assertTrue(finished.index("d") > finished.index("c"))
+            self.assertTrue(maximum <= nSlots)
+            if nSlots == 1:
+                self.assertEqual(finished, ["a", "b", "c", "d", "e"])
+            else:
+                self.assertTrue(maximum > 1)
+
+    def testFailure(self):
+        """ csnSchedulerTests: the tasks that depend on a failed task are not started. """
+        for nSlots in (1, 3):
+            (results, finished, maximum) = self.__Run(nSlots, ["a", "b", "c", "d"], { "b" : ["a"], "c" : ["b"] }, _failing = ["a"])
+            self.assertEqual(results, { "a" : False, "b" : None, "c" : None, "d" : True })
+            self.assertEqual(sorted(finished), ["a", "d"])
+
+    def testException(self):
+        """ csnSchedulerTests: an exception of a task is raised after the other tasks finished. """
+        finished = []
+        def Function(_task, _postEvent):
+            if _task == 1:
+                raise ValueError("task %s" % _task)
+            finished.append(_task)
+            return True
+        self.assertRaises(ValueError, csnScheduler.Scheduler(2).Run, [0, 1, 2], dict(), Function)
+        self.assertEqual(sorted(finished), [0, 2])
+
+    def testCycle(self):
+        """ csnSchedulerTests: cyclic dependencies are reported. """
+        self.assertRaises(csnScheduler.CyclicDependencyError, csnScheduler.Scheduler(2).Run, ["a", "b"], { "a" : ["b"], "b" : ["a"] }, lambda task, post: True)
+
+    def testCancel(self):
+        """ csnSchedulerTests: no tasks are started after canceling. """
+        started = []
+        def Function(_task, _postEvent):
+            started.append(_task)
+            return True
+        results = csnScheduler.Scheduler(1).Run(["a", "b"], dict(), Function, _isCanceled = lambda: len(started) > 0)
+        self.assertEqual(results, { "a" : True, "b" : None })
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+## @package csnThreadPoolTests
+# Definition of the csnThreadPoolTests class.
+# \ingroup tests
+import unittest
+import threading
+import time
+import csnThreadPool
+
+class csnThreadPoolTests(unittest.TestCase):
+    """ Unit tests for the csnThreadPool class. """
+
+    def testMapOrder(self):
+        """ csnThreadPoolTests: the results are returned in the order of the items. """
+        def Square(x):
+            time.sleep(0.001 * (x % 3))
+            return x * x
+        for nThreads in (1, 4):
+            pool = csnThreadPool.ThreadPool(nThreads)
+            self.assertEqual(pool.Map(Square, range(20)), [x * x for x in range(20)])
+        self.assertEqual(csnThreadPool.ThreadPool(4).Map(Square, []), [])
+
+    def testMapBounded(self):
+        """ csnThreadPoolTests: no more than nThreads calls run at the same time. """
+        lock = threading.Lock()
+        state = { "running" : 0, "maximum" : 0 }
+        def Work(x):
+            lock.acquire()
+            state["running"] += 1
+            state["maximum"] = max(state["maximum"], state["running"])
+            lock.release()
+            time.sleep(0.01)
+            lock.acquire()
+            state["running"] -= 1
+            lock.release()
+        csnThreadPool.ThreadPool(3).Map(Work, range(12))
+        self.assertTrue(state["maximum"] <= 3)
+        self.assertTrue(state["maximum"] > 1)
+
+    def testMapError(self):
+        """ csnThreadPoolTests: all calls are done, and the error of the first failing item is raised. """
+        done = []
+        def Work(x):
+            done.append(x)
+            if x in (3, 7):
+                raise ValueError("item %s" % x)
+        try:
+            csnThreadPool.ThreadPool(4).Map(Work, range(10))
+            self.fail("ValueError expected")
+        except ValueError, error:
+            self.assertEqual(str(error), "item 3")
+        self.assertEqual(sorted(done), range(10))
+
+if __name__ == "__main__":
+    unittest.main()
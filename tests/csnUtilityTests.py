@@ -5,6 +5,8 @@ import unittest
 import csnUtility
 import os
 import commands
+import shutil
+import tempfile
 
 class csnUtilityTests(unittest.TestCase):
     """ Unit tests for the csnUtility methods. """
@@ -53,6 +55,44 @@ class csnUtilityTests(unittest.TestCase):
         testPath5 = "doEs/nOt/eXist"
         self.assertEqual( csnUtility.CorrectPath(testPath5), refPath5 )  
         
+    def testJoin(self):
+        """ csnUtilityTests: test Join function. """
+        self.assertEqual( csnUtility.Join([]), "" )
+        self.assertEqual( csnUtility.Join(["a", 1]), "a 1 " )
+        self.assertEqual( csnUtility.Join(["a", "b c"], _addQuotes = 1), "\"a\" \"b c\" " )
+
+    def testWriteFileIfDifferent(self):
+        """ csnUtilityTests: test WriteFileIfDifferent function. """
+        folder = tempfile.mkdtemp()
+        try:
+            filename = "%s/file.txt" % folder
+            self.assertTrue( csnUtility.WriteFileIfDifferent(filename, "one\n", _saveBackup = True) )
+            self.assertEqual( csnUtility.FileToString(filename), "one\n" )
+            self.assertFalse( os.path.exists(filename + ".old") )
+            mtime = os.path.getmtime(filename)
+            self.assertFalse( csnUtility.WriteFileIfDifferent(filename, "one\n", _saveBackup = True) )
+            self.assertEqual( os.path.getmtime(filename), mtime )
+            # same size, other text
+            self.assertTrue( csnUtility.WriteFileIfDifferent(filename, "two\n", _saveBackup = True) )
+            self.assertEqual( csnUtility.FileToString(filename), "two\n" )
+            self.assertEqual( csnUtility.FileToString(filename + ".old"), "one\n" )
+            # no temporary files are left behind
+            self.assertEqual( sorted(os.listdir(folder)), ["file.txt", "file.txt.old"] )
+            if not csnUtility.IsWindowsPlatform():
+                # new files get the permissions of the current umask, replaced files keep their permissions
+                umask = os.umask(027)
+                try:
+                    self.assertTrue( csnUtility.WriteFileIfDifferent("%s/new.txt" % folder, "one\n") )
+                    self.assertEqual( os.stat("%s/new.txt" % folder).st_mode & 0777, 0640 )
+                    os.chmod(filename, 0604)
+                    self.assertTrue( csnUtility.WriteFileIfDifferent(filename, "three\n") )
+                    self.assertEqual( os.stat(filename).st_mode & 0777, 0604 )
+                    self.assertEqual( os.umask(027), 027 )
+                finally:
+                    os.umask(umask)
+        finally:
+            shutil.rmtree(folder)
+
     def testSearchProgramPath(self):
         if csnUtility.IsWindowsPlatform():
             # Hoping there is a cmake on the test machine
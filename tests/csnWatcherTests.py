@@ -0,0 +1,75 @@
+## @package csnWatcherTests
+# Definition of the csnWatcherTests class.
+# \ingroup tests
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+import csnWatcher
+
+class csnWatcherTests(unittest.TestCase):
+    """ Unit tests for the Watcher classes. """
+
+    def setUp(self):
+        """ Run before test. """
+        self.folder = os.path.realpath(tempfile.mkdtemp())
+        os.makedirs("%s/src" % self.folder)
+        os.makedirs("%s/build" % self.folder)
+        open("%s/src/a.cpp" % self.folder, "w").close()
+
+    def tearDown(self):
+        """ Run after test. """
+        shutil.rmtree(self.folder)
+
+    def testMatchesPattern(self):
+        """ csnWatcherTests: a path matches the patterns of which it can change the glob result. """
+        self.assertTrue(csnWatcher.MatchesPattern("/root/lib/src/a.cpp", "/root/lib/src/*.cpp"))
+        self.assertFalse(csnWatcher.MatchesPattern("/root/lib/src/a.h", "/root/lib/src/*.cpp"))
+        self.assertFalse(csnWatcher.MatchesPattern("/root/lib/src/sub/a.cpp", "/root/lib/src/*.cpp"))
+        # a folder in which matching files can be found
+        self.assertTrue(csnWatcher.MatchesPattern("/root/libmodules/new", "/root/libmodules/*/src/*.cpp"))
+        self.assertTrue(csnWatcher.MatchesPattern("/root/libmodules", "/root/libmodules/*/src/*.cpp"))
+        self.assertFalse(csnWatcher.MatchesPattern("/root/apps/new", "/root/libmodules/*/src/*.cpp"))
+
+    def __TestWatcher(self, _watcher):
+        try:
+            self.assertEqual(_watcher.folders, [self.folder])
+            self.assertEqual(_watcher.WaitForChanges(0.1, _timeout = 0.3), [])
+            # a burst of changes is reported at once; files in the excluded folder are not reported
+            def Change():
+                open("%s/src/b.cpp" % self.folder, "w").close()
+                open("%s/build/generated.cpp" % self.folder, "w").close()
+                time.sleep(0.2)
+                os.remove("%s/src/a.cpp" % self.folder)
+                os.makedirs("%s/new/src" % self.folder)
+                open("%s/new/src/c.cpp" % self.folder, "w").close()
+            thread = threading.Thread(target = Change)
+            thread.start()
+            changes = _watcher.WaitForChanges(0.5, _timeout = 5)
+            thread.join()
+            expected = ["%s/%s" % (self.folder, x) for x in ("new", "new/src", "new/src/c.cpp", "src/a.cpp", "src/b.cpp")]
+            self.assertEqual(changes, expected)
+            # the new folder is watched
+            open("%s/new/src/d.cpp" % self.folder, "w").close()
+            self.assertEqual(_watcher.WaitForChanges(0.1, _timeout = 5), ["%s/new/src/d.cpp" % self.folder])
+        finally:
+            _watcher.Close()
+
+    def testPollingWatcher(self):
+        """ csnWatcherTests: the polling watcher reports the added, removed and changed files. """
+        self.__TestWatcher(csnWatcher.PollingWatcher([self.folder, "%s/src" % self.folder], ["%s/build" % self.folder], 0.05))
+
+    def testInotifyWatcher(self):
+        """ csnWatcherTests: the inotify watcher reports the added, removed and changed files. """
+        if not csnWatcher.IsInotifySupported():
+            return
+        self.__TestWatcher(csnWatcher.InotifyWatcher([self.folder, "%s/src" % self.folder], ["%s/build" % self.folder]))
+        for (usePolling, name) in ((False, "inotify"), (True, "polling")):
+            watcher = csnWatcher.CreateWatcher([self.folder], _usePolling = usePolling)
+            self.assertEqual(watcher.name, name)
+            watcher.Close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+## @package orderedSetTests
+# Definition of the OrderedSetTests class.
+# \ingroup tests
+import unittest
+import copy
+import pickle
+from OrderedSet import OrderedSet
+
+class OrderedSetTests(unittest.TestCase):
+    """ Tests for the OrderedSet class. """
+
+    def setUp(self):
+        """ Run before test. """
+
+    def tearDown(self):
+        """ Run after test. """
+
+    def testOrderAndUniqueness(self):
+        """ OrderedSetTests: elements keep their insertion order and are only stored once. """
+        orderedSet = OrderedSet()
+        orderedSet.add("b")
+        orderedSet.append("a")
+        orderedSet.update(["c", "b", "a", "d"])
+        orderedSet.extend(["d", "e"])
+        self.assertEqual(orderedSet, ["b", "a", "c", "d", "e"])
+        self.assertTrue("c" in orderedSet)
+        self.assertFalse("z" in orderedSet)
+        self.assertEqual(len(orderedSet), 5)
+
+    def testListCompatibility(self):
+        """ OrderedSetTests: list style usage of the OrderedSet. """
+        orderedSet = OrderedSet(["a", "b", "c"])
+        # adding a list gives a plain list, as before
+        self.assertEqual(orderedSet + ["a"], ["a", "b", "c", "a"])
+        self.assertEqual(orderedSet[1], "b")
+        self.assertEqual(orderedSet[1:], ["b", "c"])
+        self.assertEqual(sorted(OrderedSet(["c", "a", "b"])), ["a", "b", "c"])
+        # the index follows the list mutations
+        orderedSet.remove("b")
+        self.assertFalse("b" in orderedSet)
+        self.assertEqual(orderedSet.pop(), "c")
+        self.assertFalse("c" in orderedSet)
+        orderedSet.insert(0, "c")
+        orderedSet.insert(0, "a")
+        self.assertEqual(orderedSet, ["c", "a"])
+        orderedSet[0] = "a"
+        self.assertEqual(orderedSet, ["a"])
+        del orderedSet[:]
+        self.assertFalse("a" in orderedSet)
+
+    def testSubtract(self):
+        """ OrderedSetTests: subtracting lists and sets. """
+        orderedSet = OrderedSet(["a", "b", "c", "d"])
+        result = orderedSet - ["b", "d"]
+        self.assertTrue(isinstance(result, OrderedSet))
+        self.assertEqual(result, ["a", "c"])
+        self.assertEqual(orderedSet - OrderedSet(["a"]), ["b", "c", "d"])
+
+    def testCopy(self):
+        """ OrderedSetTests: copies and pickles keep the index. """
+        orderedSet = OrderedSet(["a", "b"])
+        for other in (copy.copy(orderedSet), copy.deepcopy(orderedSet), pickle.loads(pickle.dumps(orderedSet, 2))):
+            self.assertTrue(isinstance(other, OrderedSet))
+            self.assertEqual(other, ["a", "b"])
+            other.add("a")
+            self.assertEqual(other, ["a", "b"])
+            self.assertTrue("b" in other)
+
+if __name__ == "__main__":
+    unittest.main()